@@ -3,7 +3,7 @@
 #   import admin_ext
 #   admin_ext.init_admin(app, get_db)
 
-from flask import session, redirect, url_for, render_template, request
+from flask import session, redirect, url_for, render_template, request, jsonify
 from functools import wraps
 import os
 
@@ -17,6 +17,10 @@ HARDCODED_ADMINS = {
 FORCE_ADMIN_USER_IDS = set()
 # ---------------------------------------------------------------------------
 
+# Users per page on /admin and /admin/api/users
+ADMIN_USERS_PAGE_SIZE = 50
+ADMIN_USERS_MAX_PAGE_SIZE = 200
+
 
 def init_admin(app, get_db):
     """Wire admin features (baseline admins + DB toggles) into the app."""
@@ -45,6 +49,9 @@ def init_admin(app, get_db):
                 cur.execute("ALTER TABLE users ADD COLUMN is_admin INTEGER NOT NULL DEFAULT 0")
             if "is_banned" not in cols:
                 cur.execute("ALTER TABLE users ADD COLUMN is_banned INTEGER NOT NULL DEFAULT 0")
+            # Case-insensitive prefix search on the admin user list
+            cur.execute("CREATE INDEX IF NOT EXISTS idx_users_email_nocase ON users(email COLLATE NOCASE)")
+            cur.execute("CREATE INDEX IF NOT EXISTS idx_users_username_nocase ON users(username COLLATE NOCASE)")
             conn.commit()
         except Exception:
             # Never block startup
@@ -90,6 +97,12 @@ def init_admin(app, get_db):
         return _email_from_session() or _email_from_db()
 
     # ---------- Hydrate session['is_admin'] each request ----------
+    def _set_admin_flag(value: bool) -> None:
+        # Only write on change: any assignment marks the session modified, which
+        # re-signs and re-sends the cookie (or rewrites the server-side session).
+        if bool(session.get("is_admin")) != value:
+            session["is_admin"] = value
+
     @app.before_request
     def _hydrate_admin_flag():
         try:
@@ -98,7 +111,7 @@ def init_admin(app, get_db):
 
             # Baseline (hardcoded/env) wins
             if (email and email in BASELINE_EMAIL_ADMINS) or (uid in BASELINE_ID_ADMINS):
-                session["is_admin"] = True
+                _set_admin_flag(True)
                 return
 
             # Otherwise check DB flag (extra admins)
@@ -108,9 +121,9 @@ def init_admin(app, get_db):
                 cur.execute("SELECT COALESCE(is_admin,0) FROM users WHERE id=?", (uid,))
                 row = cur.fetchone()
                 conn.close()
-                session["is_admin"] = bool(row[0]) if row else False
+                _set_admin_flag(bool(row[0]) if row else False)
             else:
-                session["is_admin"] = False
+                _set_admin_flag(False)
         except Exception:
             # best effort; never block
             pass
@@ -133,69 +146,179 @@ def init_admin(app, get_db):
 
     app.admin_required = admin_required  # make reusable elsewhere
 
-    # ---------- Views ----------
-    @app.route("/admin")
-    @admin_required
-    def admin_panel():
-        """Manage users. Supplies user.is_admin for your existing template."""
-        _ensure_user_control_columns()
+    # ---------- User list queries ----------
+    def _nocase(text: str) -> str:
+        """text as SQLite's NOCASE collation compares it (ASCII letters lowercased only)."""
+        return "".join(c.lower() if "A" <= c <= "Z" else c for c in text)
+
+    def _prefix_upper_bound(prefix: str) -> str:
+        """Smallest string greater than every string starting with prefix (prefix already NOCASE-folded)."""
+        return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+    def _baseline_admin_sql():
+        """SQL fragment + params matching baseline admins by email/id."""
+        parts = []
+        params = []
+        if BASELINE_EMAIL_ADMINS:
+            marks = ",".join("?" for _ in BASELINE_EMAIL_ADMINS)
+            parts.append(f"LOWER(TRIM(COALESCE(email,''))) IN ({marks})")
+            params.extend(sorted(BASELINE_EMAIL_ADMINS))
+        if BASELINE_ID_ADMINS:
+            marks = ",".join("?" for _ in BASELINE_ID_ADMINS)
+            parts.append(f"id IN ({marks})")
+            params.extend(sorted(BASELINE_ID_ADMINS))
+        if not parts:
+            return "0", []
+        return "(" + " OR ".join(parts) + ")", params
+
+    def _fetch_user_page(query: str, after_id: int, limit: int):
+        """Keyset page of users (id > after_id), optionally filtered by email/username prefix."""
+        where = ["id > ?"]
+        params = [after_id]
+        if query:
+            # Bound on the folded prefix: "Z" + 1 is "[", which sorts below every folded "z..." email.
+            query = _nocase(query)
+            hi = _prefix_upper_bound(query)
+            # "+id" keeps SQLite on the NOCASE prefix indexes instead of walking the rowid range.
+            where[0] = "+id > ?"
+            where.append(
+                "((email >= ? COLLATE NOCASE AND email < ? COLLATE NOCASE)"
+                " OR (username >= ? COLLATE NOCASE AND username < ? COLLATE NOCASE))"
+            )
+            params.extend([query, hi, query, hi])
         conn = get_db()
         cur = conn.cursor()
         try:
+            # Fetch one extra row to know whether another page exists.
             cur.execute(
                 "SELECT id, email, username, created_at, COALESCE(is_admin,0) as is_admin, COALESCE(is_banned,0) as is_banned "
-                "FROM users ORDER BY id"
+                f"FROM users WHERE {' AND '.join(where)} ORDER BY id LIMIT ?",
+                (*params, limit + 1),
             )
             rows = cur.fetchall()
-        except Exception:
+        finally:
+            conn.close()
+        has_more = len(rows) > limit
+        return rows[:limit], has_more
+
+    def _fetch_user_counts():
+        """Total / admin / banned counts, computed in SQL."""
+        baseline_sql, baseline_params = _baseline_admin_sql()
+        conn = get_db()
+        cur = conn.cursor()
+        try:
+            cur.execute(
+                "SELECT COUNT(*), "
+                f"COALESCE(SUM(CASE WHEN COALESCE(is_admin,0)=1 OR {baseline_sql} THEN 1 ELSE 0 END),0), "
+                "COALESCE(SUM(CASE WHEN COALESCE(is_banned,0)=1 THEN 1 ELSE 0 END),0) "
+                "FROM users",
+                baseline_params,
+            )
+            row = cur.fetchone()
+        finally:
             conn.close()
+        return {"total": row[0] or 0, "admins": row[1] or 0, "banned": row[2] or 0}
+
+    def _user_row_dict(r) -> dict:
+        uid = r[0]
+        email_raw = r[1] or ""
+        email_lc = email_raw.strip().lower()
+
+        baseline = (email_lc in BASELINE_EMAIL_ADMINS) or (uid in BASELINE_ID_ADMINS)
+        db_admin = bool(r[4])
+        is_banned = bool(r[5])
+        effective = baseline or db_admin
+
+        return {
+            "id": uid,
+            "email": email_raw,
+            "username": r[2],
+            "created_at": r[3],
+
+            # Back-compat with your template:
+            "is_admin": effective,
+
+            # Extra (keep if you want to show badges):
+            "is_admin_db": db_admin,
+            "is_admin_baseline": baseline,
+            "is_admin_effective": effective,
+            "is_banned": is_banned,
+            "can_ban": not baseline and uid != session.get("user_id"),
+        }
+
+    def _user_list_args():
+        query = (request.args.get("q") or "").strip()[:120]
+        try:
+            after_id = max(0, int(request.args.get("after", 0)))
+        except (TypeError, ValueError):
+            after_id = 0
+        try:
+            limit = int(request.args.get("limit", ADMIN_USERS_PAGE_SIZE))
+        except (TypeError, ValueError):
+            limit = ADMIN_USERS_PAGE_SIZE
+        limit = max(1, min(limit, ADMIN_USERS_MAX_PAGE_SIZE))
+        return query, after_id, limit
+
+    # ---------- Views ----------
+    @app.route("/admin")
+    @admin_required
+    def admin_panel():
+        """Manage users. First page is rendered here; further pages load from /admin/api/users."""
+        query, after_id, limit = _user_list_args()
+        try:
+            rows, has_more = _fetch_user_page(query, after_id, limit)
+            counts = _fetch_user_counts()
+        except Exception:
             return render_template(
                 "admin_panel.html",
                 users=[],
+                counts=None,
+                query=query,
+                next_after=None,
                 baseline_emails=sorted(BASELINE_EMAIL_ADMINS),
                 baseline_ids=sorted(list(BASELINE_ID_ADMINS)),
                 message="",
                 error="Could not load user list right now.",
             )
-        conn.close()
-
-        users = []
-        for r in rows:
-            uid = r[0]
-            email_raw = r[1] or ""
-            email_lc = email_raw.strip().lower()
-
-            baseline = (email_lc in BASELINE_EMAIL_ADMINS) or (uid in BASELINE_ID_ADMINS)
-            db_admin = bool(r[4])
-            is_banned = bool(r[5])
-            effective = baseline or db_admin
-
-            users.append({
-                "id": uid,
-                "email": email_raw,
-                "username": r[2],
-                "created_at": r[3],
-
-                # Back-compat with your template:
-                "is_admin": effective,
-
-                # Extra (keep if you want to show badges):
-                "is_admin_db": db_admin,
-                "is_admin_baseline": baseline,
-                "is_admin_effective": effective,
-                "is_banned": is_banned,
-                "can_ban": not baseline and uid != session.get("user_id"),
-            })
 
+        users = [_user_row_dict(r) for r in rows]
         return render_template(
             "admin_panel.html",
             users=users,
+            counts=counts,
+            query=query,
+            next_after=users[-1]["id"] if (users and has_more) else None,
             baseline_emails=sorted(BASELINE_EMAIL_ADMINS),
             baseline_ids=sorted(list(BASELINE_ID_ADMINS)),
             message=request.args.get("msg", ""),
             error=None,
         )
 
+    @app.route("/admin/api/users")
+    @admin_required
+    def admin_api_users():
+        """JSON page of users: ?after=<last id>&q=<email/username prefix>&limit=N."""
+        query, after_id, limit = _user_list_args()
+        try:
+            rows, has_more = _fetch_user_page(query, after_id, limit)
+        except Exception:
+            return jsonify({"ok": False, "error": "Could not load user list right now."}), 500
+
+        users = []
+        for r in rows:
+            user = _user_row_dict(r)
+            user["toggle_url"] = url_for("admin_toggle", user_id=user["id"])
+            user["ban_url"] = url_for("admin_ban", user_id=user["id"])
+            users.append(user)
+        payload = {
+            "ok": True,
+            "users": users,
+            "next_after": users[-1]["id"] if (users and has_more) else None,
+        }
+        if request.args.get("counts") == "1":
+            payload["counts"] = _fetch_user_counts()
+        return jsonify(payload)
+
     @app.route("/admin/toggle/<int:user_id>", methods=["POST"])
     @admin_required
     def admin_toggle(user_id):
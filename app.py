@@ -85,6 +85,10 @@ print(f"[socketio] async_mode={ASYNC_MODE}")
 print(f"[socketio] message_queue={'enabled' if SOCKETIO_MESSAGE_QUEUE else 'disabled'}")
 # --- end Socket.IO setup ---
 
+# Latency/DB/workbook metrics. Must run before any @socketio.on handler is registered.
+import metrics_ext
+metrics_ext.init_metrics(app, socketio)
+
 # ---------------------------------------------------------------------------
 # Auth DB
 def _default_auth_db_path() -> str:
@@ -115,10 +119,13 @@ app.config["AUTH_DB_PATH"] = DB_PATH
 os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
 
 def get_db():
-    conn = sqlite3.connect(DB_PATH)
+    conn = metrics_ext.connect(DB_PATH)
     conn.row_factory = sqlite3.Row
     return conn
 
+# Optional server-side sessions (SESSION_BACKEND=sqlite|redis|memory); default stays signed cookies.
+import session_ext
+
 def init_auth_db():
     conn = get_db()
     cur = conn.cursor()
@@ -144,6 +151,7 @@ def init_auth_db():
     conn.close()
 
 init_auth_db()
+session_ext.init_sessions(app, get_db)
 
 def is_admin():
     # read allow-lists from env (comma separated)
@@ -159,6 +167,10 @@ def is_admin():
 import admin_ext
 admin_ext.init_admin(app, get_db)
 
+# Admin-only ?__profile=1 request profiler (needs the admin flag hydrated above)
+import profiler_ext
+profiler_ext.init_profiler(app)
+
 # ------------------------------------------------------------------------------
 # Gallery folders / helpers
 # ------------------------------------------------------------------------------
@@ -224,7 +236,8 @@ CONDITIONS_MAP = None
 # Used to invalidate CONDITIONS_MAP when the Excel file changes.
 _CONDITIONS_MAP_MTIME = None
 try:
-    sheets_all = pd.read_excel(EXCEL_PATH, sheet_name=None)
+    with metrics_ext.track_workbook_parse("layer_list"):
+        sheets_all = pd.read_excel(EXCEL_PATH, sheet_name=None)
     RACES_SHEET_DF = sheets_all.get("Races")
     sheets = sheets_all
 except Exception as e:
@@ -254,6 +267,9 @@ sentient_ext.init_sentient(
     EXCEL_PATH,
     _login_required
 )
+# Background jobs (real worker threads) for slow map generation; must precede map skeletons.
+import jobs_ext
+jobs_ext.init_jobs(app, socketio)
 map_skeleton_ext.init_map_skeletons(app, socketio)
 SHEET_NAMES = list(sheets.keys())
 generator_sheets = [name for name in SHEET_NAMES if "Generator" in name]
@@ -264,7 +280,8 @@ generator_sheets = [name for name in SHEET_NAMES if "Generator" in name]
 @lru_cache(maxsize=4)
 def _load_races_df_cached(excel_path: str, mtime: float) -> pd.DataFrame:
     """Load and sanitize the Races sheet. Cached by file mtime."""
-    df = pd.read_excel(excel_path, sheet_name="Races")
+    with metrics_ext.track_workbook_parse("races"):
+        df = pd.read_excel(excel_path, sheet_name="Races")
     df = df.dropna(how="all")
 
     # The workbook can contain other tables below; keep only the actual race rows.
@@ -417,11 +434,12 @@ def read_events_df() -> pd.DataFrame:
     """Read the 'events' sheet and drop blank rows."""
     if not os.path.exists(EVENTS_XLSX):
         raise FileNotFoundError(f"Excel not found at {EVENTS_XLSX}")
-    try:
-        df = pd.read_excel(EVENTS_XLSX, sheet_name=EVENTS_SHEET, engine="openpyxl")
-    except Exception:
-        # fallback if openpyxl isn't installed
-        df = pd.read_excel(EVENTS_XLSX, sheet_name=EVENTS_SHEET)
+    with metrics_ext.track_workbook_parse("events"):
+        try:
+            df = pd.read_excel(EVENTS_XLSX, sheet_name=EVENTS_SHEET, engine="openpyxl")
+        except Exception:
+            # fallback if openpyxl isn't installed
+            df = pd.read_excel(EVENTS_XLSX, sheet_name=EVENTS_SHEET)
     return df.dropna(how="all")
 
 def _norm_key(s: str) -> str:
@@ -1277,7 +1295,8 @@ def generate(sheet):
 
 @app.route("/potion-generator")
 def potion_generator():
-    potion_df = pd.read_excel("static/Book 10.xlsx", sheet_name="Sheet1")
+    with metrics_ext.track_workbook_parse("potions"):
+        potion_df = pd.read_excel("static/Book 10.xlsx", sheet_name="Sheet1")
     potion_map = {
         str(row["Concat"]).strip(): row["POTION"]
         for _, row in potion_df.iterrows()
@@ -1351,7 +1370,8 @@ def _load_conditions_map_cached(path: str, mtime: float) -> dict:
     # Condition->Effect mapping from the Races sheet (cols A:B starting at row 111)
     try:
         # Row 111 (1-indexed) -> skip first 110 rows
-        df = pd.read_excel(path, sheet_name="Races", usecols="A:B", skiprows=110)
+        with metrics_ext.track_workbook_parse("conditions"):
+            df = pd.read_excel(path, sheet_name="Races", usecols="A:B", skiprows=110)
     except Exception:
         return {}
 
@@ -1596,10 +1616,11 @@ def guide():
 def classes_view():
     path = os.path.join("static", "Data", "Normalized_Abilities.xlsx")
 
-    table_df = pd.read_excel(path, sheet_name="Table").fillna("")
-    data_df = pd.read_excel(path, sheet_name="Data").fillna("")
-    affinity_df = pd.read_excel(path, sheet_name="Affinities S").fillna("")
-    class_df = pd.read_excel(path, sheet_name="Classes S").fillna("")
+    with metrics_ext.track_workbook_parse("classes"):
+        table_df = pd.read_excel(path, sheet_name="Table").fillna("")
+        data_df = pd.read_excel(path, sheet_name="Data").fillna("")
+        affinity_df = pd.read_excel(path, sheet_name="Affinities S").fillna("")
+        class_df = pd.read_excel(path, sheet_name="Classes S").fillna("")
 
     headers = table_df.columns.tolist()
     rows = table_df.values.tolist()
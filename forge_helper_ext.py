@@ -6,6 +6,8 @@ from typing import Dict, List, Optional
 import pandas as pd
 from flask import render_template, request
 
+import metrics_ext
+
 
 # -----------------------------------------------------------------------------
 # Forge Helper extension
@@ -157,14 +159,15 @@ def _load_forge_df(app_root: str) -> pd.DataFrame:
             "Expected data/Layer List (7).xlsx (Gear tab), or set FORGE_HELPER_XLSX."
         )
 
-    try:
-        if chosen_sheet:
-            df = pd.read_excel(chosen, sheet_name=chosen_sheet)
-        else:
+    with metrics_ext.track_workbook_parse("forge_helper"):
+        try:
+            if chosen_sheet:
+                df = pd.read_excel(chosen, sheet_name=chosen_sheet)
+            else:
+                df = pd.read_excel(chosen, sheet_name=0)
+        except ValueError:
+            # If the requested sheet name is missing, fall back to the first sheet.
             df = pd.read_excel(chosen, sheet_name=0)
-    except ValueError:
-        # If the requested sheet name is missing, fall back to the first sheet.
-        df = pd.read_excel(chosen, sheet_name=0)
 
     if "Final Name" not in df.columns:
         raise KeyError("Forge Helper sheet must include a 'Final Name' column.")
@@ -0,0 +1,377 @@
+# jobs_ext.py — background job queue for slow, CPU-bound work (map generation, exports)
+# Usage in app.py (after admin_ext so app.admin_required exists):
+#   import jobs_ext
+#   jobs_ext.init_jobs(app, socketio)
+#   ...
+#   job_id = app.job_queue.submit("preview", fn, arg1, arg2)   # fn(ctx, arg1, arg2) -> JSON-able result
+#
+# Jobs run on a small pool of real OS threads (not eventlet greenlets), so a long
+# generation no longer holds the request greenlet and every socket in the worker
+# keeps being served. Inside a job, ctx.progress(done, total, message) reports
+# progress and raises JobCancelled once cancellation was requested.
+#
+# Env:
+#   JOBS_WORKERS=2           worker threads per process
+#   JOBS_REDIS_URL/REDIS_URL keep job records in redis (any web worker can poll/cancel);
+#                            without it records live in this process only
+#   JOBS_RESULT_TTL_S=3600   how long finished jobs (and their results) are kept
+#
+# Polling: GET /api/jobs/<id>, POST /api/jobs/<id>/cancel (admins).
+# Socket.IO (admins): emit "job_subscribe" {job_id}; "job_update" is sent on every change
+# until the job finishes; "job_unsubscribe" {job_id} stops it.
+
+from __future__ import annotations
+
+import json
+import os
+import time
+import uuid
+from typing import Any, Callable, Dict
+
+from flask import has_request_context, jsonify, request, session
+
+try:
+    import redis as redis_lib
+except Exception:
+    redis_lib = None
+
+JOB_POLL_INTERVAL_S = 0.5
+FINISHED_STATES = {"done", "failed", "cancelled"}
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _original(module_name: str):
+    """The unpatched stdlib module when eventlet has monkey patched it (jobs need real threads)."""
+    try:
+        from eventlet import patcher
+
+        if patcher.is_monkey_patched("thread"):
+            return patcher.original(module_name)
+    except Exception:
+        pass
+    return __import__(module_name)
+
+
+class JobCancelled(Exception):
+    """Raised inside a job by ctx.progress() after the job was cancelled."""
+
+
+# ---------------------------------------------------------------------------
+# Stores: create(job), get(id) -> dict | None, update(id, fields), request_cancel(id),
+# cancel_requested(id). A job record is a JSON-able dict.
+# ---------------------------------------------------------------------------
+# Stores are shared by request greenlets and worker threads, hence the real locks.
+class MemoryJobStore:
+    def __init__(self, ttl_s: int):
+        self._ttl_s = ttl_s
+        self._lock = _original("threading").Lock()
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._cancel: set[str] = set()
+
+    def _purge(self, now: float) -> None:
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.get("finished_at") and now - job["finished_at"] > self._ttl_s
+        ]
+        for job_id in expired:
+            self._jobs.pop(job_id, None)
+            self._cancel.discard(job_id)
+
+    def create(self, job: Dict[str, Any]) -> None:
+        with self._lock:
+            self._purge(time.time())
+            self._jobs[job["id"]] = dict(job)
+
+    def get(self, job_id: str) -> Dict[str, Any] | None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def update(self, job_id: str, fields: Dict[str, Any]) -> None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                job.update(fields)
+                job["version"] = job.get("version", 0) + 1
+
+    def request_cancel(self, job_id: str) -> None:
+        with self._lock:
+            self._cancel.add(job_id)
+
+    def cancel_requested(self, job_id: str) -> bool:
+        with self._lock:
+            return job_id in self._cancel
+
+
+class RedisJobStore:
+    KEY_PREFIX = "job:"
+    CANCEL_PREFIX = "job_cancel:"
+
+    def __init__(self, url: str, ttl_s: int):
+        self._url = url
+        self._ttl_s = ttl_s
+        self._lock = _original("threading").Lock()
+        # One client per thread: worker threads must not share the web workers' connections.
+        self._local = _original("threading").local()
+
+    @property
+    def _client(self):
+        client = getattr(self._local, "client", None)
+        if client is None:
+            client = self._local.client = redis_lib.from_url(self._url, decode_responses=True)
+        return client
+
+    def create(self, job: Dict[str, Any]) -> None:
+        self._client.setex(self.KEY_PREFIX + job["id"], self._ttl_s, json.dumps(job))
+
+    def get(self, job_id: str) -> Dict[str, Any] | None:
+        raw = self._client.get(self.KEY_PREFIX + job_id)
+        if not raw:
+            return None
+        try:
+            return json.loads(raw)
+        except Exception:
+            return None
+
+    def update(self, job_id: str, fields: Dict[str, Any]) -> None:
+        # Only the worker running a job updates it, so read-modify-write is safe here.
+        with self._lock:
+            job = self.get(job_id)
+            if job is None:
+                return
+            job.update(fields)
+            job["version"] = job.get("version", 0) + 1
+            self._client.setex(self.KEY_PREFIX + job_id, self._ttl_s, json.dumps(job))
+
+    def request_cancel(self, job_id: str) -> None:
+        self._client.setex(self.CANCEL_PREFIX + job_id, self._ttl_s, "1")
+
+    def cancel_requested(self, job_id: str) -> bool:
+        return bool(self._client.exists(self.CANCEL_PREFIX + job_id))
+
+
+class JobContext:
+    """Handed to a running job: progress reporting and cooperative cancellation."""
+
+    # Progress writes are throttled; the final state is always written by the queue.
+    MIN_UPDATE_INTERVAL_S = 0.2
+
+    def __init__(self, store, job_id: str):
+        self.store = store
+        self.job_id = job_id
+        self._last_update = 0.0
+
+    @property
+    def cancelled(self) -> bool:
+        return self.store.cancel_requested(self.job_id)
+
+    def progress(self, done: float, total: float | None = None, message: str | None = None) -> None:
+        if self.cancelled:
+            raise JobCancelled(self.job_id)
+        now = time.monotonic()
+        if now - self._last_update < self.MIN_UPDATE_INTERVAL_S and (total is None or done < total):
+            return
+        self._last_update = now
+        fields: Dict[str, Any] = {"progress": round(min(1.0, done / total), 4) if total else done}
+        if message is not None:
+            fields["message"] = message
+        self.store.update(self.job_id, fields)
+
+
+class JobQueue:
+    """Runs submitted callables on real worker threads and records their state in a store."""
+
+    def __init__(self, app, store, workers: int):
+        self.app = app
+        self.store = store
+        self.workers = max(1, workers)
+        self._queue = _original("queue").Queue()
+        self._threads: list = []
+        self._start_lock = _original("threading").Lock()
+
+    def _ensure_workers(self) -> None:
+        if self._threads:
+            return
+        with self._start_lock:
+            if self._threads:
+                return
+            real_threading = _original("threading")
+            for n in range(self.workers):
+                thread = real_threading.Thread(target=self._run, name=f"job-worker-{n}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def submit(self, kind: str, fn: Callable[..., Any], *args, **kwargs) -> str:
+        """Queue fn(ctx, *args, **kwargs); returns the job id.
+
+        Called during a request, the job later runs inside a request context for
+        the same host (so url_for works); otherwise inside an app context.
+        """
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        self.store.create({
+            "id": job_id,
+            "kind": kind,
+            "status": "queued",
+            "progress": 0.0,
+            "message": "",
+            "result": None,
+            "error": None,
+            "owner": session.get("user_id") if has_request_context() else None,
+            "created_at": now,
+            "started_at": None,
+            "finished_at": None,
+            "version": 0,
+        })
+        base_url = request.host_url if has_request_context() else None
+        self._ensure_workers()
+        self._queue.put((job_id, fn, args, kwargs, base_url))
+        return job_id
+
+    def get(self, job_id: str) -> Dict[str, Any] | None:
+        return self.store.get(job_id)
+
+    def cancel(self, job_id: str) -> Dict[str, Any] | None:
+        job = self.store.get(job_id)
+        if job is None or job["status"] in FINISHED_STATES:
+            return job
+        self.store.request_cancel(job_id)
+        if job["status"] == "queued":
+            self.store.update(job_id, {"status": "cancelled", "finished_at": time.time()})
+        return self.store.get(job_id)
+
+    def _run(self) -> None:
+        while True:
+            job_id, fn, args, kwargs, base_url = self._queue.get()
+            try:
+                self._run_one(job_id, fn, args, kwargs, base_url)
+            except Exception as e:
+                print(f"[jobs] worker error on {job_id}: {e}")
+
+    def _run_one(self, job_id: str, fn, args, kwargs, base_url: str | None) -> None:
+        if self.store.cancel_requested(job_id):
+            return
+        self.store.update(job_id, {"status": "running", "started_at": time.time()})
+        ctx = JobContext(self.store, job_id)
+        app_ctx = self.app.test_request_context("/", base_url=base_url) if base_url else self.app.app_context()
+        try:
+            with app_ctx:
+                result = fn(ctx, *args, **kwargs)
+            fields = {"status": "done", "progress": 1.0, "result": result}
+        except JobCancelled:
+            fields = {"status": "cancelled"}
+        except Exception as e:
+            print(f"[jobs] {job_id} failed: {e}")
+            fields = {"status": "failed", "error": str(e)}
+        fields["finished_at"] = time.time()
+        self.store.update(job_id, fields)
+
+
+def _build_store(ttl_s: int):
+    url = os.getenv("JOBS_REDIS_URL") or os.getenv("REDIS_URL") or ""
+    if url and redis_lib is not None:
+        try:
+            store = RedisJobStore(url, ttl_s)
+            store._client.ping()
+            return store
+        except Exception as e:
+            print(f"[jobs] redis unavailable ({e}); keeping jobs in memory")
+    return MemoryJobStore(ttl_s)
+
+
+def _public(job: Dict[str, Any]) -> Dict[str, Any]:
+    return {k: v for k, v in job.items() if k != "owner"}
+
+
+def init_jobs(app, socketio=None):
+    """Attach app.job_queue plus the admin polling routes and Socket.IO subscriptions."""
+    if getattr(app, "job_queue", None) is not None:
+        return app.job_queue
+    ttl_s = max(60, _env_int("JOBS_RESULT_TTL_S", 3600))
+    store = _build_store(ttl_s)
+    queue = JobQueue(app, store, _env_int("JOBS_WORKERS", 2))
+    app.job_queue = queue
+    print(f"[jobs] store={type(store).__name__} workers={queue.workers}")
+
+    admin_required = app.admin_required
+
+    def _is_admin() -> bool:
+        # Socket.IO handlers cannot return a response, so run the guard on a stub view.
+        return admin_required(lambda: True)() is True
+
+    def _no_store(payload: Dict[str, Any], status: int = 200):
+        resp = jsonify(payload)
+        resp.status_code = status
+        resp.headers["Cache-Control"] = "no-store"
+        return resp
+
+    @app.route("/api/jobs/<job_id>", methods=["GET"])
+    @admin_required
+    def api_job_status(job_id: str):
+        job = queue.get(job_id)
+        if job is None:
+            return _no_store({"error": "Job not found"}, 404)
+        return _no_store(_public(job))
+
+    @app.route("/api/jobs/<job_id>/cancel", methods=["POST"])
+    @admin_required
+    def api_job_cancel(job_id: str):
+        job = queue.cancel(job_id)
+        if job is None:
+            return _no_store({"error": "Job not found"}, 404)
+        return _no_store(_public(job))
+
+    if socketio is None:
+        return queue
+
+    from flask_socketio import emit, join_room, leave_room
+
+    watched: Dict[str, int] = {}  # job id -> last version sent to its room
+    poller = {"running": False}
+
+    def _poll_jobs():
+        # Runs as a Socket.IO background task (a greenlet under eventlet), so emits are safe.
+        while watched:
+            socketio.sleep(JOB_POLL_INTERVAL_S)
+            for job_id, version in list(watched.items()):
+                job = queue.get(job_id)
+                if job is None:
+                    watched.pop(job_id, None)
+                    continue
+                if job.get("version", 0) != version:
+                    watched[job_id] = job.get("version", 0)
+                    socketio.emit("job_update", _public(job), to=f"job:{job_id}")
+                if job["status"] in FINISHED_STATES:
+                    watched.pop(job_id, None)
+        poller["running"] = False
+
+    @socketio.on("job_subscribe")
+    def on_job_subscribe(data):
+        if not _is_admin():
+            return
+        job_id = str((data or {}).get("job_id") or "")
+        job = queue.get(job_id)
+        if job is None:
+            emit("job_update", {"id": job_id, "status": "missing"})
+            return
+        join_room(f"job:{job_id}")
+        emit("job_update", _public(job))
+        if job["status"] not in FINISHED_STATES:
+            watched.setdefault(job_id, job.get("version", 0))
+            if not poller["running"]:
+                poller["running"] = True
+                socketio.start_background_task(_poll_jobs)
+
+    @socketio.on("job_unsubscribe")
+    def on_job_unsubscribe(data):
+        job_id = str((data or {}).get("job_id") or "")
+        if job_id:
+            leave_room(f"job:{job_id}")
+
+    return queue
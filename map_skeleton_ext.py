@@ -1,24 +1,52 @@
 from __future__ import annotations
 
+import hashlib
 import json
+import marshal
 import os
 import random
 import re
 import sqlite3
 import time
-from collections import defaultdict
+from array import array
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List
-
-from flask import jsonify, make_response, redirect, render_template, request, session, url_for
+from typing import Any, Dict, Iterable, List
+from urllib.parse import quote
+
+from flask import (
+    current_app,
+    jsonify,
+    make_response,
+    redirect,
+    render_template,
+    request,
+    session,
+    stream_with_context,
+    url_for,
+)
+from markupsafe import Markup
 from flask_socketio import emit, join_room, leave_room
 
+import jobs_ext
+import metrics_ext
+
+# The caches below are shared by request greenlets and the job queue's OS worker
+# threads, so their locks must be real ones even when eventlet has patched threading.
+_real_threading = jobs_ext._original("threading")
+
 try:
     import redis as redis_lib
 except Exception:
     redis_lib = None
 
+try:
+    import numpy as np
+except Exception:
+    np = None
+
 
 ROLE_DEFAULTS: Dict[str, Dict[str, Any]] = {
     "empty": {
@@ -100,6 +128,8 @@ ROLE_COLORS: Dict[str, str] = {
 
 OUTER_BIOME_HINTS = ("grass", "sakura", "sundune", "elysian", "frostreach", "desolation")
 CORE_BIOME_HINTS = ("blood", "grim", "under", "volcan", "corrupt", "desolat", "frost")
+# Region roles that draw from the core biome pool; every other role uses the outer pool.
+CORE_BIOME_ROLES = frozenset({"core_area", "center_ring", "center_core"})
 DISABLED_BIOMES = {"underspread"}
 OUTER_ENTITY_HINTS = ("weakling", "companion", "questgiver", "hand")
 CORE_ENTITY_HINTS = ("elite", "guardian")
@@ -144,7 +174,93 @@ OUTER_QUESTGIVER_MIN_HEXES = 10
 OUTER_COMPANION_MIN_HEXES = 10
 OUTER_LEGENDARY_MIN_HEXES = 12
 OUTER_LEGENDARY_SPAWN_DISTANCE = 3
+OUTER_CHEST_GUARDED_CHANCE = 0.5
+# Board-wide landmark / entity quotas, as a share of the free candidate hexes.
+OUTER_LANDMARK_RATIO = 0.08
+CORE_LANDMARK_RATIO = 0.14
+OUTER_ENTITY_RATIO = 0.10
+CORE_ENTITY_RATIO = 0.16
+PORTAL_PAIR_CHANCE = 0.45
+SHIPWRECK_CHANCE = 0.27
+# Generation profiles (?profile=<name> / --profile): JSON files overriding the values above.
+MAPGEN_PROFILE_DIR = Path(__file__).resolve().parent / "data" / "mapgen"
+
+# Compact per-cell encoding used by _HexGrid.
+MAP_ROLES = ("empty", "outer_area", "connector", "core_area", "center_ring", "center_core", "spawn", "water")
+ROLE_CODES: Dict[str, int] = {name: code for code, name in enumerate(MAP_ROLES)}
+(
+    ROLE_EMPTY,
+    ROLE_OUTER_AREA,
+    ROLE_CONNECTOR,
+    ROLE_CORE_AREA,
+    ROLE_CENTER_RING,
+    ROLE_CENTER_CORE,
+    ROLE_SPAWN,
+    ROLE_WATER,
+) = range(len(MAP_ROLES))
+CORE_ROLE_CODES = frozenset({ROLE_CORE_AREA, ROLE_CENTER_RING, ROLE_CENTER_CORE})
+WATERISH_ROLE_CODES = frozenset({ROLE_WATER, ROLE_EMPTY})
+CELL_ACTIVE = 1
+CELL_SPAWN = 2
+CELL_ALLOW_BIOMES = 4
+CELL_ALLOW_LANDMARKS = 8
+CELL_ALLOW_ENTITIES = 16
+# Odd-r neighbor offsets; the order matters to _connector_variant's opposite pairs.
+_EVEN_ROW_OFFSETS = ((-1, -1), (-1, 0), (0, -1), (0, 1), (1, -1), (1, 0))
+_ODD_ROW_OFFSETS = ((-1, 0), (-1, 1), (0, -1), (0, 1), (1, 0), (1, 1))
+# Every cell field the generator reads; the board cache is keyed on these.
+SKELETON_CELL_FIELDS = (
+    "row",
+    "col",
+    "role",
+    "region",
+    "active",
+    "spawn",
+    "special",
+    "allow_biomes",
+    "allow_landmarks",
+    "allow_entities",
+)
 OUTER_COMPANION_SPAWN_DISTANCE = 2
+CHEST_LANDMARK_KEYS = {"chest", "treasurechest", "legendarychest"}
+# MAPGEN_NUMPY=1 runs the texture-override passes vectorized (needs numpy). Seeded
+# output is deterministic within each mode but differs between the two.
+MAPGEN_NUMPY = (os.getenv("MAPGEN_NUMPY") or "").strip().lower() in {"1", "true", "yes", "on"}
+# MAPGEN_TRACE=1 attaches a per-phase trace to every preview (also ?trace=1 per request).
+MAPGEN_TRACE = (os.getenv("MAPGEN_TRACE") or "").strip().lower() in {"1", "true", "yes", "on"}
+# Generated-preview cache: entries kept in memory (0 disables), and
+# MAPGEN_PREVIEW_CACHE_DISK=1 to also keep up to _DISK_MAX of them as JSON files.
+try:
+    PREVIEW_CACHE_SIZE = max(0, int(os.getenv("MAPGEN_PREVIEW_CACHE_SIZE") or 32))
+except ValueError:
+    PREVIEW_CACHE_SIZE = 32
+PREVIEW_CACHE_DISK = (os.getenv("MAPGEN_PREVIEW_CACHE_DISK") or "").strip().lower() in {"1", "true", "yes", "on"}
+PREVIEW_CACHE_DISK_MAX = 512
+# Previews of boards with at least this many hexes stream their rows (?stream=0/1 overrides).
+PREVIEW_STREAM_MIN_CELLS = 64 * 64
+PREVIEW_STREAM_CHUNK_BYTES = 32 * 1024
+_STREAM_FLUSH = Markup("<!-- stream-flush -->")
+# Page loads that would generate a map hand it to app.job_queue and follow the job;
+# this many in-flight jobs are remembered so a reload joins its job instead of queueing another.
+PENDING_JOBS_TRACKED = 64
+# Generation draws from one RNG stream per phase (and per region for region
+# passes). A re-roll re-salts every stream of one layer, optionally for a single
+# region ("overlays:outer_3"); phases not listed here belong to "overlays".
+REROLL_LAYERS = ("biomes", "textures", "overlays")
+REROLL_REGION_LAYERS = frozenset({"biomes", "overlays"})
+_STREAM_LAYERS = {
+    "biomes": "biomes",
+    "variants": "biomes",
+    "center_core": "biomes",
+    "overrides": "textures",
+    "fill_textures": "textures",
+}
+# Finished maps kept per skeleton + seed, so ?reroll= previews reuse their upstream layers.
+MAP_STATE_CACHE_SIZE = 8
+# Seed exploration: per-call cap, and seeds per worker task.
+EXPLORE_MAX_SEEDS = 2000
+EXPLORE_CHUNK_SIZE = 16
+_EXPLORE_FILTER_RE = re.compile(r"^\s*([^<>=!]+?)\s*(>=|<=|==|!=|>|<)\s*(-?[0-9.]+)\s*$")
 
 
 def _parse_named_parts(stem: str) -> Dict[str, str]:
@@ -164,8 +280,12 @@ def _slugify_label(text: str) -> str:
     return re.sub(r"_+", "_", s).strip("_") or "asset"
 
 
+MAPGEN_STATIC_ROOT = Path(__file__).resolve().parent / "static" / "mapgen"
+MAPGEN_ASSET_FOLDERS = ("textures", "landmarks", "entities", "addons")
+
+
 def _load_texture_assets() -> List[Dict[str, Any]]:
-    base = Path(__file__).resolve().parent / "static" / "mapgen" / "textures"
+    base = MAPGEN_STATIC_ROOT / "textures"
     assets: List[Dict[str, Any]] = []
     if not base.exists():
         return assets
@@ -186,7 +306,7 @@ def _load_texture_assets() -> List[Dict[str, Any]]:
 
 
 def _load_landmark_assets() -> List[Dict[str, Any]]:
-    base = Path(__file__).resolve().parent / "static" / "mapgen" / "landmarks"
+    base = MAPGEN_STATIC_ROOT / "landmarks"
     assets: List[Dict[str, Any]] = []
     if not base.exists():
         return assets
@@ -208,7 +328,7 @@ def _load_landmark_assets() -> List[Dict[str, Any]]:
 
 
 def _load_entity_assets() -> List[Dict[str, Any]]:
-    base = Path(__file__).resolve().parent / "static" / "mapgen" / "entities"
+    base = MAPGEN_STATIC_ROOT / "entities"
     assets: List[Dict[str, Any]] = []
     if not base.exists():
         return assets
@@ -231,7 +351,7 @@ def _load_entity_assets() -> List[Dict[str, Any]]:
 
 
 def _load_addon_assets() -> Dict[str, Dict[str, Any]]:
-    base = Path(__file__).resolve().parent / "static" / "mapgen" / "addons"
+    base = MAPGEN_STATIC_ROOT / "addons"
     assets: Dict[str, Dict[str, Any]] = {}
     if not base.exists():
         return assets
@@ -245,6 +365,205 @@ def _load_addon_assets() -> Dict[str, Dict[str, Any]]:
     return assets
 
 
+def _is_hero_entity_asset(asset: Dict[str, Any]) -> bool:
+    return asset.get("npc", "").lower() == "hero" or bool(asset.get("hero"))
+
+
+class _TextureIndex:
+    """Texture ids (positions in the texture list) pre-bucketed by lowercase biome/variant.
+
+    Every bucket keeps catalog order, so picking from a bucket with the same RNG
+    gives the same texture the old list filters did.
+    """
+
+    def __init__(self, textures: List[Dict[str, Any]]):
+        self.biome_lc: List[str] = []
+        self.variant_lc: List[str] = []
+        self.by_biome: Dict[str, List[int]] = defaultdict(list)
+        self.by_biome_variant: Dict[tuple[str, str], List[int]] = defaultdict(list)
+        self.variants_by_biome: Dict[str, Dict[str, List[int]]] = defaultdict(dict)
+        for tid, asset in enumerate(textures):
+            biome_lc = str(asset.get("biome") or "").strip().lower()
+            variant_lc = str(asset.get("variant") or "").strip().lower()
+            self.biome_lc.append(biome_lc)
+            self.variant_lc.append(variant_lc)
+            self.by_biome[biome_lc].append(tid)
+            self.by_biome_variant[(biome_lc, variant_lc)].append(tid)
+            self.variants_by_biome[biome_lc].setdefault(variant_lc, []).append(tid)
+        self.by_biome = dict(self.by_biome)
+        self.by_biome_variant = dict(self.by_biome_variant)
+        self.variants_by_biome = dict(self.variants_by_biome)
+        self.neutral: List[int] = self.by_biome.get("neutral", [])
+        self._neutral_matching: Dict[tuple[str, ...], List[int]] = {}
+
+    def biome(self, biome: str | None) -> List[int]:
+        return self.by_biome.get(str(biome or "").strip().lower(), [])
+
+    def biome_variant(self, biome: str | None, variant: str | None) -> List[int]:
+        return self.by_biome_variant.get(
+            (str(biome or "").strip().lower(), str(variant or "").strip().lower()), []
+        )
+
+    def neutral_matching(self, *substrings: str) -> List[int]:
+        """Neutral texture ids whose variant contains any of the substrings (memoized)."""
+        key = tuple(substrings)
+        found = self._neutral_matching.get(key)
+        if found is None:
+            found = [tid for tid in self.neutral if any(sub in self.variant_lc[tid] for sub in key)]
+            self._neutral_matching[key] = found
+        return found
+
+
+class _MapAssets:
+    """Snapshot of the mapgen PNG catalog plus pre-grouped lookup views.
+
+    Shared by every generation until the asset folders change, so callers must
+    treat the lists/dicts (and the asset dicts inside them) as read-only.
+    """
+
+    def __init__(
+        self,
+        textures: List[Dict[str, Any]],
+        landmarks: List[Dict[str, Any]],
+        entities: List[Dict[str, Any]],
+        addons: Dict[str, Dict[str, Any]],
+        version: str,
+    ):
+        self.textures = textures
+        self.landmarks = landmarks
+        self.entities = entities
+        self.addons = addons
+        self.version = version
+
+        self.texture_index = _TextureIndex(textures)
+        self.texture_biomes = sorted(
+            {
+                a["biome"]
+                for a in textures
+                if a["biome"].lower() != "neutral" and a["biome"].strip().lower() not in DISABLED_BIOMES
+            }
+        )
+        # Region biome pools, one per role family (see _pick_role_biome).
+        self._biome_pools: Dict[tuple, List[str]] = {}
+        self.core_biome_pool = self.biome_pool(CORE_BIOME_HINTS)
+        self.outer_biome_pool = self.biome_pool(OUTER_BIOME_HINTS)
+        self.empty_hex_texture = _find_empty_hex_texture(textures)
+
+        self.landmarks_by_name_key: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        self.landmarks_by_group: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        self.landmarks_by_color: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        for asset in landmarks:
+            self.landmarks_by_name_key[asset["name_key"]].append(asset)
+            self.landmarks_by_group[asset["group"]].append(asset)
+            if asset.get("color"):
+                self.landmarks_by_color[str(asset["color"]).strip().lower()].append(asset)
+        self.landmarks_by_name_key = dict(self.landmarks_by_name_key)
+        self.landmarks_by_group = dict(self.landmarks_by_group)
+        self.landmarks_by_color = dict(self.landmarks_by_color)
+        # Same "last one wins" semantics as {a["name_key"]: a for a in ...}.
+        self.landmark_by_key = {k: v[-1] for k, v in self.landmarks_by_name_key.items()}
+        self.portal_by_color = _portal_assets_by_color(landmarks)
+        self.shipwreck_landmarks = list(self.landmarks_by_name_key.get("shipwreck", []))
+        self.zone_landmarks = _zone_assets(landmarks)
+        self.zone_ports = [a for a in self.zone_landmarks if a["name_key"] == "port"]
+        self.zone_non_ports = [a for a in self.zone_landmarks if a["name_key"] != "port"]
+        self.pickable_landmarks = [
+            a for a in landmarks if a["name_key"] != "boat" and a["name_key"] not in DISABLED_LANDMARK_KEYS
+        ]
+        self.core_landmark_pool = [
+            a for a in self.pickable_landmarks if a["group"] == "zone" and a["name_key"] not in {"shipwreck", "port"}
+        ] or self.pickable_landmarks
+        self.outer_landmark_pool = [
+            a for a in self.pickable_landmarks
+            if a["group"] != "zone" and a["name_key"] not in {"shipwreck", "portal", "port"}
+        ] or self.pickable_landmarks
+
+        self.entities_by_name_key: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        for asset in entities:
+            self.entities_by_name_key[asset["name_key"]].append(asset)
+        self.entities_by_name_key = dict(self.entities_by_name_key)
+        self.entity_by_key = {k: v[-1] for k, v in self.entities_by_name_key.items()}
+        self.hero_entities = [a for a in entities if _is_hero_entity_asset(a)]
+        self.spawn_entity_pool = self.hero_entities or entities
+        self.core_entity_pool = [
+            a for a in entities
+            if any(h in a["label"].lower() or h in a.get("npc", "").lower() for h in CORE_ENTITY_HINTS)
+        ] or entities
+        self.outer_entity_pool = [
+            a for a in entities
+            if any(h in a["label"].lower() or h in a.get("npc", "").lower() for h in OUTER_ENTITY_HINTS)
+        ] or entities
+
+    def biome_pool(self, hints: tuple[str, ...]) -> List[str]:
+        """Texture biomes matching any of hints (all of them if none match), cached per hints."""
+        pool = self._biome_pools.get(hints)
+        if pool is None:
+            pool = self._biome_pools[hints] = _pick_matching_by_hints(self.texture_biomes, hints)
+        return pool
+
+    @property
+    def counts(self) -> Dict[str, int]:
+        return {
+            "textures": len(self.textures),
+            "landmarks": len(self.landmarks),
+            "entities": len(self.entities),
+            "addons": len(self.addons),
+        }
+
+
+class _MapAssetRegistry:
+    """Loads the mapgen asset folders once and reloads only when a folder's mtime changes.
+
+    Adding, removing or renaming a PNG bumps its directory mtime, which is all the
+    catalog depends on (assets are described entirely by their file names).
+    """
+
+    def __init__(self, root: Path):
+        self.root = root
+        self._lock = _real_threading.Lock()
+        self._snapshot: _MapAssets | None = None
+        self._mtimes: tuple | None = None
+
+    def _folder_mtimes(self) -> tuple:
+        out = []
+        for folder in MAPGEN_ASSET_FOLDERS:
+            try:
+                out.append(os.stat(self.root / folder).st_mtime_ns)
+            except OSError:
+                out.append(None)
+        return tuple(out)
+
+    def get(self) -> _MapAssets:
+        mtimes = self._folder_mtimes()
+        snapshot = self._snapshot
+        if snapshot is not None and mtimes == self._mtimes:
+            return snapshot
+        with self._lock:
+            if self._snapshot is not None and mtimes == self._mtimes:
+                return self._snapshot
+            textures = _load_texture_assets()
+            landmarks = _load_landmark_assets()
+            entities = _load_entity_assets()
+            addons = _load_addon_assets()
+            digest = hashlib.sha1()
+            for group in (textures, landmarks, entities, list(addons.values())):
+                for asset in group:
+                    digest.update(str(asset["file_name"]).encode("utf-8"))
+                    digest.update(b"\0")
+                digest.update(b"|")
+            self._snapshot = _MapAssets(textures, landmarks, entities, addons, digest.hexdigest()[:16])
+            self._mtimes = mtimes
+            return self._snapshot
+
+
+_ASSET_REGISTRY = _MapAssetRegistry(MAPGEN_STATIC_ROOT)
+
+
+def _map_assets() -> _MapAssets:
+    """Current mapgen asset snapshot (process-wide, reloaded when the folders change)."""
+    return _ASSET_REGISTRY.get()
+
+
 def _find_empty_hex_texture(textures: List[Dict[str, Any]]) -> Dict[str, Any] | None:
     for asset in textures:
         biome = str(asset.get("biome") or "").strip().lower()
@@ -261,14 +580,249 @@ def _pick_matching_by_hints(values: List[str], hints: tuple[str, ...]) -> List[s
     return matched or values
 
 
-def _pick_role_biome(role: str, available_biomes: List[str], rng: random.Random) -> str | None:
-    if not available_biomes:
-        return None
-    if role in {"core_area", "center_ring", "center_core"}:
-        pool = _pick_matching_by_hints(available_biomes, CORE_BIOME_HINTS)
-    else:
-        pool = _pick_matching_by_hints(available_biomes, OUTER_BIOME_HINTS)
-    return rng.choice(pool)
+def _role_biome_pool(role: str, assets: _MapAssets, profile: "_GenerationProfile | None" = None) -> List[str]:
+    if profile is None:
+        return assets.core_biome_pool if role in CORE_BIOME_ROLES else assets.outer_biome_pool
+    return assets.biome_pool(profile.core_biome_hints if role in CORE_BIOME_ROLES else profile.outer_biome_hints)
+
+
+def _pick_role_biome(
+    role: str, assets: _MapAssets, rng: random.Random, profile: "_GenerationProfile | None" = None
+) -> str | None:
+    pool = _role_biome_pool(role, assets, profile)
+    return rng.choice(pool) if pool else None
+
+
+class _BiomeBalance:
+    """Optional constraints on region biome assignment.
+
+    no_adjacent_duplicates keeps touching regions on different biomes;
+    max_per_biome caps how many regions share one biome, and quotas sets that
+    cap per biome (overriding max_per_biome). _assign_balanced_region_biomes
+    solves them greedily in one pass.
+    """
+
+    def __init__(
+        self,
+        no_adjacent_duplicates: bool = False,
+        max_per_biome: int | None = None,
+        quotas: Dict[str, int] | None = None,
+    ):
+        self.no_adjacent_duplicates = bool(no_adjacent_duplicates)
+        self.max_per_biome = max_per_biome
+        self.quotas = dict(quotas or {})
+
+    @classmethod
+    def from_dict(cls, raw: Dict[str, Any] | None) -> "_BiomeBalance | None":
+        """Parse {"no_adjacent_duplicates", "max_per_biome", "quotas"}; None when nothing is set."""
+        if not raw:
+            return None
+        if not isinstance(raw, dict):
+            raise ValueError("biome balance must be an object")
+        unknown = set(raw) - {"no_adjacent_duplicates", "max_per_biome", "quotas"}
+        if unknown:
+            raise ValueError(f"Unknown biome balance keys: {', '.join(sorted(unknown))}")
+        max_per_biome = raw.get("max_per_biome")
+        if max_per_biome is not None:
+            if isinstance(max_per_biome, bool) or not isinstance(max_per_biome, int) or max_per_biome < 1:
+                raise ValueError("max_per_biome must be a positive integer")
+        quotas = raw.get("quotas") or {}
+        if not isinstance(quotas, dict):
+            raise ValueError("quotas must map biome names to counts")
+        for biome, cap in quotas.items():
+            if isinstance(cap, bool) or not isinstance(cap, int) or cap < 0:
+                raise ValueError(f"quota for {biome!r} must be a non-negative integer")
+        balance = cls(bool(raw.get("no_adjacent_duplicates")), max_per_biome, quotas)
+        return balance if balance.key() != (False, None, ()) else None
+
+    def key(self) -> tuple:
+        return (self.no_adjacent_duplicates, self.max_per_biome, tuple(sorted(self.quotas.items())))
+
+    def cap(self, biome: str) -> int | None:
+        return self.quotas.get(biome, self.max_per_biome)
+
+
+# Generation profile fields: name -> (kind, default). "chance" is a number in
+# [0, 1], "hexes" a positive integer (hexes per placement), "count" a
+# non-negative integer and "hints" a list of biome name fragments.
+_PROFILE_FIELDS: Dict[str, tuple[str, Any]] = {
+    "outer_biome_hints": ("hints", OUTER_BIOME_HINTS),
+    "core_biome_hints": ("hints", CORE_BIOME_HINTS),
+    "terrain_variant_variance": ("count", TERRAIN_VARIANT_VARIANCE),
+    "mountain_base_chance": ("chance", MOUNTAIN_BASE_CHANCE),
+    "mountain_adjacent_chain_chance": ("chance", MOUNTAIN_ADJACENT_CHAIN_CHANCE),
+    "center_water_maelstrom_chance": ("chance", CENTER_WATER_MAELSTROM_CHANCE),
+    "center_ring_lava_chance": ("chance", CENTER_RING_LAVA_CHANCE),
+    "center_core_lava_chance": ("chance", CENTER_CORE_LAVA_CHANCE),
+    "center_core_void_chance": ("chance", CENTER_CORE_VOID_CHANCE),
+    "center_core_mountain_chance": ("chance", CENTER_CORE_MOUNTAIN_CHANCE),
+    "zone_port_chance": ("chance", ZONE_PORT_CHANCE),
+    "zones_per_region": ("count", ZONES_PER_REGION),
+    "non_zone_landmark_stack_chance": ("chance", NON_ZONE_LANDMARK_STACK_CHANCE),
+    "outer_unknownsite_density": ("hexes", OUTER_UNKNOWNSITE_DENSITY),
+    "outer_weakling_density": ("hexes", OUTER_WEAKLING_DENSITY),
+    "outer_chest_pair_density": ("hexes", OUTER_CHEST_PAIR_DENSITY),
+    "outer_questgiver_min_hexes": ("count", OUTER_QUESTGIVER_MIN_HEXES),
+    "outer_companion_min_hexes": ("count", OUTER_COMPANION_MIN_HEXES),
+    "outer_legendary_min_hexes": ("count", OUTER_LEGENDARY_MIN_HEXES),
+    "outer_chest_guarded_chance": ("chance", OUTER_CHEST_GUARDED_CHANCE),
+    "outer_landmark_ratio": ("chance", OUTER_LANDMARK_RATIO),
+    "core_landmark_ratio": ("chance", CORE_LANDMARK_RATIO),
+    "outer_entity_ratio": ("chance", OUTER_ENTITY_RATIO),
+    "core_entity_ratio": ("chance", CORE_ENTITY_RATIO),
+    "portal_pair_chance": ("chance", PORTAL_PAIR_CHANCE),
+    "shipwreck_chance": ("chance", SHIPWRECK_CHANCE),
+}
+_PROFILE_META_FIELDS = frozenset({"name", "description"})
+
+
+class _GenerationProfile:
+    """Generation parameters: placement densities, chances and region biome pools.
+
+    Every _PROFILE_FIELDS name is an attribute; unset ones keep the module
+    constant, so _GenerationProfile() generates exactly the default maps.
+    biome_balance (a _BiomeBalance or None) constrains the region biome draw.
+    Profiles are shared between runs and processes: treat them as read-only.
+    """
+
+    def __init__(
+        self,
+        values: Dict[str, Any] | None = None,
+        biome_balance: _BiomeBalance | None = None,
+        name: str = "",
+    ):
+        for field, (_, default) in _PROFILE_FIELDS.items():
+            setattr(self, field, default)
+        for field, value in (values or {}).items():
+            setattr(self, field, value)
+        self.biome_balance = biome_balance
+        self.name = name
+        self._key: str | None = None
+
+    @classmethod
+    def from_dict(cls, raw: Dict[str, Any] | None, name: str = "") -> "_GenerationProfile":
+        """Parse an example_params.json-style object (ValueError on unknown keys or bad values)."""
+        raw = raw or {}
+        if not isinstance(raw, dict):
+            raise ValueError("generation profile must be an object")
+        unknown = set(raw) - set(_PROFILE_FIELDS) - _PROFILE_META_FIELDS - {"biome_balance"}
+        if unknown:
+            raise ValueError(f"Unknown generation profile keys: {', '.join(sorted(unknown))}")
+        values: Dict[str, Any] = {}
+        for field, value in raw.items():
+            if field not in _PROFILE_FIELDS:
+                continue
+            kind = _PROFILE_FIELDS[field][0]
+            if kind == "hints":
+                if (
+                    not isinstance(value, list)
+                    or not value
+                    or not all(isinstance(h, str) and h.strip() for h in value)
+                ):
+                    raise ValueError(f"{field} must be a non-empty list of biome name fragments")
+                values[field] = tuple(h.strip().lower() for h in value)
+                continue
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                raise ValueError(f"{field} must be a number")
+            if kind == "chance":
+                if not 0 <= value <= 1:
+                    raise ValueError(f"{field} must be between 0 and 1")
+                values[field] = value
+            elif not isinstance(value, int) or value < (1 if kind == "hexes" else 0):
+                raise ValueError(f"{field} must be a {'positive' if kind == 'hexes' else 'non-negative'} integer")
+            else:
+                values[field] = value
+        balance = _BiomeBalance.from_dict(raw.get("biome_balance"))
+        return cls(values, balance, str(raw.get("name") or name))
+
+    def values(self) -> Dict[str, Any]:
+        return {field: getattr(self, field) for field in _PROFILE_FIELDS}
+
+    def key(self) -> str:
+        """Digest of every generation parameter; "" for the defaults. Part of cache keys."""
+        if self._key is None:
+            values = self.values()
+            balance = self.biome_balance.key() if self.biome_balance is not None else None
+            if balance is None and all(values[f] == default for f, (_, default) in _PROFILE_FIELDS.items()):
+                self._key = ""
+            else:
+                blob = json.dumps([sorted(values.items()), balance], default=list)
+                self._key = hashlib.sha1(blob.encode("utf-8")).hexdigest()[:16]
+        return self._key
+
+
+_DEFAULT_PROFILE = _GenerationProfile()
+_PROFILE_CACHE: Dict[str, tuple[tuple, _GenerationProfile]] = {}
+_PROFILE_CACHE_LOCK = _real_threading.Lock()
+
+
+def _load_generation_profile(path: Path | str) -> _GenerationProfile:
+    """Profile from a JSON file, parsed once per file version (mtime + size).
+
+    Raises FileNotFoundError for a missing file and ValueError for bad content.
+    """
+    path = Path(path)
+    st = path.stat()
+    stamp = (st.st_mtime_ns, st.st_size)
+    cache_key = str(path.resolve())
+    with _PROFILE_CACHE_LOCK:
+        cached = _PROFILE_CACHE.get(cache_key)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+    with path.open("r", encoding="utf-8") as f:
+        try:
+            raw = json.load(f)
+        except ValueError as e:
+            raise ValueError(f"{path.name} is not valid JSON: {e}")
+    profile = _GenerationProfile.from_dict(raw, name=path.stem)
+    with _PROFILE_CACHE_LOCK:
+        _PROFILE_CACHE[cache_key] = (stamp, profile)
+    return profile
+
+
+def _profile_name(raw: str | None) -> str:
+    """Normalized ?profile= value ("" for the defaults)."""
+    raw = str(raw or "").strip()
+    return _safe_name(raw) if raw else ""
+
+
+def _named_generation_profile(name: str | None) -> _GenerationProfile:
+    """Profile <name>.json from MAPGEN_PROFILE_DIR; the defaults for an empty name (ValueError if unknown)."""
+    name = _profile_name(name)
+    if not name:
+        return _DEFAULT_PROFILE
+    path = MAPGEN_PROFILE_DIR / f"{name}.json"
+    try:
+        return _load_generation_profile(path)
+    except FileNotFoundError:
+        raise ValueError(f"Unknown generation profile {name!r}")
+
+
+def _assign_balanced_region_biomes(state: "_MapGenState", balance: _BiomeBalance) -> None:
+    """Region biomes under `balance`, one greedy pass (no rejection sampling).
+
+    Regions go most-connected first. Each draws uniformly from its role pool
+    minus biomes that are at their cap or already on a neighbouring region;
+    when nothing is left the adjacency rule is dropped first, then the caps.
+    Every region draws from its own "biomes" stream, so re-rolling one region
+    redraws it (regions after it only change if their constraints do).
+    """
+    plan = state.plan
+    assets = state.assets
+    region_biomes = state.region_biomes
+    neighbors = plan.biome_region_neighbors() if balance.no_adjacent_duplicates else {}
+    used: Dict[str, int] = defaultdict(int)
+    order = sorted(plan.biome_region_roles, key=lambda region: -len(neighbors.get(region, ())))
+    for region in order:
+        pool = _role_biome_pool(plan.biome_region_roles[region], assets, state.profile)
+        if not pool:
+            continue
+        under_cap = [b for b in pool if balance.cap(b) is None or used[b] < balance.cap(b)]
+        taken = {region_biomes.get(other) for other in neighbors.get(region, ())}
+        candidates = [b for b in under_cap if b not in taken] or under_cap or pool
+        chosen = state.stream("biomes", region).choice(candidates)
+        region_biomes[region] = chosen
+        used[chosen] += 1
 
 
 def _pick_weighted(items: List[Dict[str, Any]], rng: random.Random) -> Dict[str, Any] | None:
@@ -376,47 +930,32 @@ def _jitter_variant_weights(weights: Dict[str, int], variance: int, rng: random.
     return scaled
 
 
-def _build_biome_variant_plan(
-    cells: List[Dict[str, Any]],
-    region_biomes: Dict[str, str],
-    textures: List[Dict[str, Any]],
-    rng: random.Random,
-) -> Dict[tuple[int, int], Dict[str, Any]]:
-    by_region: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
-    for cell in cells:
-        if not cell.get("active") or not cell.get("allow_biomes"):
-            continue
-        if str(cell.get("role") or "").strip().lower() == "center_core":
-            continue
-        region = str(cell.get("region") or "").strip()
-        biome = region_biomes.get(region)
-        if not region or not biome:
-            continue
-        by_region[region].append(cell)
+def _build_biome_variant_plan(state: _MapGenState) -> array:
+    plan = state.plan
+    region_biomes = state.region_biomes
+    texture_index = state.assets.texture_index
 
-    planned: Dict[tuple[int, int], Dict[str, Any]] = {}
-    for region, region_cells in by_region.items():
-        if not region_cells:
-            continue
+    planned = array("h", [-1]) * state.grid.size
+    for region, region_cells in plan.biome_region_cells.items():
         biome = region_biomes.get(region)
-        role = str(region_cells[0].get("role") or "outer_area")
+        if not biome:
+            continue
+        rng = state.stream("variants", region)
+        role = str(plan.biome_region_roles[region])
         weights = TERRAIN_VARIANT_WEIGHTS.get(role)
-        biome_assets = [a for a in textures if a["biome"].lower() == str(biome).lower()]
+        biome_assets = texture_index.biome(biome)
         if not biome_assets:
             continue
-
-        variant_assets: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
-        for asset in biome_assets:
-            variant_assets[str(asset.get("variant") or "").strip().lower()].append(asset)
+        variant_assets = texture_index.variants_by_biome.get(str(biome).strip().lower(), {})
 
         if not weights:
             shuffled_cells = list(region_cells)
             rng.shuffle(shuffled_cells)
-            for cell in shuffled_cells:
-                planned[(cell["row"], cell["col"])] = rng.choice(biome_assets)
+            for i in shuffled_cells:
+                planned[i] = rng.choice(biome_assets)
             continue
 
-        varied_weights = _jitter_variant_weights(weights, TERRAIN_VARIANT_VARIANCE, rng)
+        varied_weights = _jitter_variant_weights(weights, state.profile.terrain_variant_variance, rng)
         counts = _allocate_variant_counts(len(region_cells), varied_weights)
         shuffled_cells = list(region_cells)
         rng.shuffle(shuffled_cells)
@@ -430,53 +969,53 @@ def _build_biome_variant_plan(
             for _ in range(count):
                 if cell_idx >= len(shuffled_cells):
                     break
-                cell = shuffled_cells[cell_idx]
-                planned[(cell["row"], cell["col"])] = rng.choice(assets_for_variant)
+                planned[shuffled_cells[cell_idx]] = rng.choice(assets_for_variant)
                 cell_idx += 1
 
         # Any leftovers from missing variants fall back to any biome asset.
         while cell_idx < len(shuffled_cells):
-            cell = shuffled_cells[cell_idx]
-            planned[(cell["row"], cell["col"])] = rng.choice(biome_assets)
+            planned[shuffled_cells[cell_idx]] = rng.choice(biome_assets)
             cell_idx += 1
 
     return planned
 
 
-def _build_center_core_plan(
-    cells: List[Dict[str, Any]],
-    textures: List[Dict[str, Any]],
-    rng: random.Random,
-) -> Dict[tuple[int, int], Dict[str, Any]]:
-    center_core_cells = [c for c in cells if c.get("active") and str(c.get("role") or "").lower() == "center_core"]
+def _build_center_core_plan(state: _MapGenState) -> array:
+    texture_index = state.assets.texture_index
+    rng = state.rng
+    profile = state.profile
+    planned = array("h", [-1]) * state.grid.size
+
+    center_core_cells = state.plan.center_core_cells
     if not center_core_cells:
-        return {}
+        return planned
 
-    neutral_assets = [a for a in textures if a["biome"].lower() == "neutral"]
+    neutral_assets = texture_index.neutral
     if not neutral_assets:
-        return {}
-
-    variant_assets: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
-    for asset in neutral_assets:
-        variant = str(asset.get("variant") or "").strip().lower()
-        variant_assets[variant].append(asset)
+        return planned
+    variant_assets = texture_index.variants_by_biome.get("neutral", {})
 
     plains_assets = variant_assets.get("plains") or []
     void_assets = variant_assets.get("void") or []
     mountain_assets = variant_assets.get("mountain") or []
     lava_assets = variant_assets.get("lava") or []
 
-    planned: Dict[tuple[int, int], Dict[str, Any]] = {}
     shuffled_cells = list(center_core_cells)
     rng.shuffle(shuffled_cells)
 
     counts = _allocate_variant_counts(
         len(shuffled_cells),
         {
-            "plains": max(0, 100 - CENTER_CORE_VOID_CHANCE * 100 - CENTER_CORE_MOUNTAIN_CHANCE * 100 - CENTER_CORE_LAVA_CHANCE * 100),
-            "void": int(round(CENTER_CORE_VOID_CHANCE * 100)),
-            "mountain": int(round(CENTER_CORE_MOUNTAIN_CHANCE * 100)),
-            "lava": int(round(CENTER_CORE_LAVA_CHANCE * 100)),
+            "plains": max(
+                0,
+                100
+                - profile.center_core_void_chance * 100
+                - profile.center_core_mountain_chance * 100
+                - profile.center_core_lava_chance * 100,
+            ),
+            "void": int(round(profile.center_core_void_chance * 100)),
+            "mountain": int(round(profile.center_core_mountain_chance * 100)),
+            "lava": int(round(profile.center_core_lava_chance * 100)),
         },
     )
 
@@ -492,150 +1031,616 @@ def _build_center_core_plan(
         for _ in range(counts.get(variant, 0)):
             if cell_idx >= len(shuffled_cells):
                 break
-            cell = shuffled_cells[cell_idx]
-            planned[(cell["row"], cell["col"])] = rng.choice(assets)
+            planned[shuffled_cells[cell_idx]] = rng.choice(assets)
             cell_idx += 1
 
     fallback_assets = plains_assets or void_assets or mountain_assets or lava_assets or neutral_assets
     while cell_idx < len(shuffled_cells):
-        cell = shuffled_cells[cell_idx]
-        planned[(cell["row"], cell["col"])] = rng.choice(fallback_assets)
+        planned[shuffled_cells[cell_idx]] = rng.choice(fallback_assets)
         cell_idx += 1
 
     return planned
 
 
 def _neighbor_keys(row: int, col: int) -> List[tuple[int, int]]:
-    if row % 2 == 0:
-        offsets = [(-1, -1), (-1, 0), (0, -1), (0, 1), (1, -1), (1, 0)]
-    else:
-        offsets = [(-1, 0), (-1, 1), (0, -1), (0, 1), (1, 0), (1, 1)]
+    offsets = _EVEN_ROW_OFFSETS if row % 2 == 0 else _ODD_ROW_OFFSETS
     return [(row + dr, col + dc) for dr, dc in offsets]
 
 
-def _is_waterish(cell: Dict[str, Any] | None) -> bool:
-    if not cell:
-        return True
-    role = str(cell.get("role") or "").strip().lower()
-    return role in {"water", "empty", "void"}
+def _odd_r_to_cube(row: int, col: int) -> tuple[int, int, int]:
+    q = col - (row - (row & 1)) // 2
+    r = row
+    x = q
+    z = r
+    y = -x - z
+    return x, y, z
+
+
+def _hex_distance(a: tuple[int, int], b: tuple[int, int]) -> int:
+    ax, ay, az = _odd_r_to_cube(a[0], a[1])
+    bx, by, bz = _odd_r_to_cube(b[0], b[1])
+    return max(abs(ax - bx), abs(ay - by), abs(az - bz))
+
+
+class _HexGrid:
+    """Integer-array view of a normalized skeleton payload.
+
+    Slot i is payload["cells"][i]. Role codes, lowercase region ids, flag bits and
+    cube coordinates are flat arrays, and neighbors[i * 6 + k] is the k-th odd-r
+    neighbor of slot i in _neighbor_keys order (-1 when that hex is not on the
+    board). role_adjacency[i] has bit (1 << role code) set for every role among
+    the on-board neighbors of slot i.
+
+    Grids depend only on the skeleton and are shared across seeds through
+    _skeleton_plan_for, so nothing may write to them (or to the payload cell dicts
+    they read) after construction.
+    """
+
+    def __init__(self, payload: Dict[str, Any]):
+        cells = payload.get("cells", [])
+        size = len(cells)
+        self.cells: List[Dict[str, Any]] = cells
+        self.size = size
+        self.width = int(payload.get("width", 0))
+        self.height = int(payload.get("height", 0))
+        self.index: Dict[tuple[int, int], int] = {}
+        self.region_keys: List[str] = [""]
+        region_ids: Dict[str, int] = {"": 0}
+        rows: List[int] = []
+        cols: List[int] = []
+        roles: List[int] = []
+        flags: List[int] = []
+        regions: List[int] = []
+
+        for i, cell in enumerate(cells):
+            row = cell["row"]
+            col = cell["col"]
+            self.index[(row, col)] = i
+            rows.append(int(row))
+            cols.append(int(col))
+            roles.append(ROLE_CODES.get(str(cell.get("role") or "empty").strip().lower(), ROLE_EMPTY))
+            bits = 0
+            if cell.get("active"):
+                bits |= CELL_ACTIVE
+            if cell.get("spawn"):
+                bits |= CELL_SPAWN
+            if cell.get("allow_biomes"):
+                bits |= CELL_ALLOW_BIOMES
+            if cell.get("allow_landmarks"):
+                bits |= CELL_ALLOW_LANDMARKS
+            if cell.get("allow_entities"):
+                bits |= CELL_ALLOW_ENTITIES
+            flags.append(bits)
+            region_key = str(cell.get("region") or "").strip().lower()
+            region_id = region_ids.get(region_key)
+            if region_id is None:
+                region_id = len(self.region_keys)
+                region_ids[region_key] = region_id
+                self.region_keys.append(region_key)
+            regions.append(region_id)
+
+        lookup = self.index.get
+        neighbors: List[int] = []
+        for row, col in zip(rows, cols):
+            offsets = _EVEN_ROW_OFFSETS if row % 2 == 0 else _ODD_ROW_OFFSETS
+            for dr, dc in offsets:
+                neighbors.append(lookup((row + dr, col + dc), -1))
+
+        self.rows = array("i", rows)
+        self.cols = array("i", cols)
+        self.roles = array("B", roles)
+        self.flags = array("B", flags)
+        self.regions = array("H", regions)
+        self.neighbors = array("i", neighbors)
+        # On-board neighbors only, same order as the table.
+        self.adjacent: List[tuple[int, ...]] = [
+            tuple(j for j in neighbors[base:base + 6] if j >= 0) for base in range(0, 6 * size, 6)
+        ]
+        role_adjacency: List[int] = []
+        for adjacent in self.adjacent:
+            bits = 0
+            for j in adjacent:
+                bits |= 1 << roles[j]
+            role_adjacency.append(bits)
+        self.role_adjacency = array("H", role_adjacency)
+
+        cube_x: List[int] = []
+        cube_y: List[int] = []
+        cube_z: List[int] = []
+        for row, col in zip(rows, cols):
+            x, y, z = _odd_r_to_cube(row, col)
+            cube_x.append(x)
+            cube_y.append(y)
+            cube_z.append(z)
+        self.cube_x = array("i", cube_x)
+        self.cube_y = array("i", cube_y)
+        self.cube_z = array("i", cube_z)
+        self._role_distance: Dict[int, array] = {}
+
+    def neighbor_slots(self, i: int) -> array:
+        return self.neighbors[i * 6:i * 6 + 6]
+
+    def distance(self, i: int, j: int) -> int:
+        return max(
+            abs(self.cube_x[i] - self.cube_x[j]),
+            abs(self.cube_y[i] - self.cube_y[j]),
+            abs(self.cube_z[i] - self.cube_z[j]),
+        )
+
+    def is_adjacent_to_role(self, i: int, role_code: int) -> bool:
+        return bool(self.role_adjacency[i] >> role_code & 1)
+
+    def role_distance(self, role_code: int) -> array:
+        """Distance field to the nearest cell of a role (memoized; depends only on the board)."""
+        field = self._role_distance.get(role_code)
+        if field is None:
+            roles = self.roles
+            field = _distance_field(self, (i for i in range(self.size) if roles[i] == role_code))
+            self._role_distance[role_code] = field
+        return field
+
+
+def _distance_field(grid: _HexGrid, sources: Iterable[int]) -> array:
+    """Multi-source BFS: steps from every slot to its nearest source (-1 if there is none).
+
+    The walk crosses every on-board hex regardless of role or active flag. On the
+    full rectangular boards _normalize_payload produces, that step count equals
+    _hex_distance to the nearest source.
+    """
+    dist = array("i", [-1]) * grid.size
+    frontier: List[int] = []
+    for i in sources:
+        if dist[i] < 0:
+            dist[i] = 0
+            frontier.append(i)
+    adjacent = grid.adjacent
+    depth = 0
+    while frontier:
+        depth += 1
+        next_frontier: List[int] = []
+        for i in frontier:
+            for j in adjacent[i]:
+                if dist[j] < 0:
+                    dist[j] = depth
+                    next_frontier.append(j)
+        frontier = next_frontier
+    return dist
+
+
+def _slots_within(grid: _HexGrid, source: int, radius: int) -> List[int]:
+    """Slots at most `radius` steps from source (bounded BFS, source included)."""
+    seen = {source}
+    frontier = [source]
+    out = [source]
+    adjacent = grid.adjacent
+    for _ in range(max(0, radius)):
+        next_frontier: List[int] = []
+        for i in frontier:
+            for j in adjacent[i]:
+                if j not in seen:
+                    seen.add(j)
+                    next_frontier.append(j)
+        if not next_frontier:
+            break
+        out.extend(next_frontier)
+        frontier = next_frontier
+    return out
+
+
+def _skeleton_content_hash(payload: Dict[str, Any]) -> str:
+    """Digest of everything the generator reads from a skeleton (size + cell fields)."""
+    head = (int(payload.get("width", 0)), int(payload.get("height", 0)))
+    body = [tuple(map(cell.get, SKELETON_CELL_FIELDS)) for cell in payload.get("cells", [])]
+    try:
+        # Format 2 has no back-references, so equal content always gives equal bytes.
+        blob = marshal.dumps((head, body), 2)
+    except ValueError:
+        blob = repr((head, body)).encode("utf-8")
+    return hashlib.sha1(blob).hexdigest()
+
+
+class _SkeletonPlan:
+    """Everything the generator derives from a skeleton alone, independent of seed.
+
+    Holds the _HexGrid plus the slot groupings the passes walk: biome regions,
+    role buckets, spawn/special/zone cells, per-region outer-area candidates,
+    the spawn distance field and connector variants. Lists keep slot order, so
+    a pass that shuffles a copy consumes the RNG exactly as if it had built the
+    list itself. Plans are shared across seeds and must be treated as read-only.
+    content_hash is the _skeleton_content_hash of the skeleton ("" if unknown).
+    """
+
+    def __init__(self, grid: _HexGrid, content_hash: str = ""):
+        self.grid = grid
+        self.content_hash = content_hash
+        cells = grid.cells
+        flags = grid.flags
+        roles = grid.roles
+        size = grid.size
+        active = [i for i in range(size) if flags[i] & CELL_ACTIVE]
+        specials = [str(cell.get("special") or "").strip().lower() for cell in cells]
+        stripped_regions = [str(cell.get("region") or "").strip() for cell in cells]
+
+        # Biome regions in first-seen order, with the role of their first cell.
+        self.biome_region_roles: Dict[str, str] = {}
+        self.biome_region_cells: Dict[str, List[int]] = defaultdict(list)
+        for i in active:
+            if not flags[i] & CELL_ALLOW_BIOMES or roles[i] == ROLE_CENTER_CORE:
+                continue
+            region = stripped_regions[i]
+            if not region:
+                continue
+            self.biome_region_roles.setdefault(region, cells[i].get("role") or "outer_area")
+            self.biome_region_cells[region].append(i)
+
+        self._biome_region_neighbors: Dict[str, set] | None = None
+
+        self.center_core_cells = [i for i in active if roles[i] == ROLE_CENTER_CORE]
+        self.center_ring_cells = [i for i in active if roles[i] == ROLE_CENTER_RING]
+        self.water_cells = [i for i in active if roles[i] == ROLE_WATER]
+        self.boss = bytearray(1 if "boss" in special else 0 for special in specials)
+        self.has_special = bytearray(1 if special else 0 for special in specials)
+
+        # Mountain seeds, and the neighbors a mountain may chain onto.
+        self.mountain_cells = [
+            i for i in active
+            if flags[i] & CELL_ALLOW_BIOMES and roles[i] not in (ROLE_CONNECTOR, ROLE_WATER, ROLE_CENTER_CORE)
+        ]
+        self.mountain_chain_ok = bytearray(
+            1 if (
+                flags[j] & CELL_ACTIVE
+                and flags[j] & CELL_ALLOW_BIOMES
+                and roles[j] not in (ROLE_CONNECTOR, ROLE_WATER)
+                and not grid.is_adjacent_to_role(j, ROLE_CONNECTOR)
+            ) else 0
+            for j in range(size)
+        )
+
+        self.spawn_cells = [i for i in active if flags[i] & CELL_SPAWN]
+        self.spawn_distance = _distance_field(grid, self.spawn_cells) if self.spawn_cells else None
+        self.spawn_adjacent_outer = [
+            [j for j in grid.adjacent[i] if flags[j] & CELL_ACTIVE and roles[j] == ROLE_OUTER_AREA]
+            for i in self.spawn_cells
+        ]
+        self.special_entity_cells = [
+            i for i in active
+            if any(token in specials[i] for token in ("boss", "elite", "guardian", "weakling", "god"))
+        ]
+
+        # Outer-area regions: (region, landmark cells, entity cells, zone cells, companion cells).
+        outer_regions: Dict[str, List[int]] = defaultdict(list)
+        for i in active:
+            if roles[i] != ROLE_OUTER_AREA:
+                continue
+            region = stripped_regions[i]
+            if not region or region.lower() in {"none", "water"}:
+                continue
+            outer_regions[region].append(i)
+        spawn_distance = self.spawn_distance
+        self.outer_regions: List[tuple[str, List[int], List[int], List[int], List[int]]] = []
+        for region, region_cells in outer_regions.items():
+            landmark_cells = [i for i in region_cells if flags[i] & CELL_ALLOW_LANDMARKS]
+            entity_cells = [i for i in region_cells if flags[i] & CELL_ALLOW_ENTITIES]
+            if not landmark_cells and not entity_cells:
+                continue
+            zone_cells = [i for i in landmark_cells if "zone" in specials[i]]
+            companion_cells = [
+                i for i in entity_cells
+                if (_min_distance_to_spawn(spawn_distance, i) or 999) >= OUTER_COMPANION_SPAWN_DISTANCE
+            ]
+            self.outer_regions.append((region, landmark_cells, entity_cells, zone_cells, companion_cells))
+        self.legendary_ok = bytearray(
+            1 if (_min_distance_to_spawn(spawn_distance, i) or 999) >= OUTER_LEGENDARY_SPAWN_DISTANCE else 0
+            for i in range(size)
+        )
+
+        # Outer-area entity slots by grid region id, where stacked landmarks place their guards.
+        self.guard_cells_by_region: Dict[int, List[int]] = defaultdict(list)
+        for i in range(size):
+            if roles[i] == ROLE_OUTER_AREA and flags[i] & CELL_ALLOW_ENTITIES:
+                self.guard_cells_by_region[grid.regions[i]].append(i)
 
+        # Zone-marked landmark cells outside the outer area, by region.
+        self.zone_regions: Dict[str, List[int]] = defaultdict(list)
+        for i in active:
+            if not flags[i] & CELL_ALLOW_LANDMARKS or roles[i] == ROLE_OUTER_AREA:
+                continue
+            region = stripped_regions[i]
+            if region and region.lower() not in {"none", "water"} and "zone" in specials[i]:
+                self.zone_regions[region].append(i)
+
+        # Candidate slots for the global landmark/entity passes, before occupancy.
+        self.outer_landmark_cells = [i for i in active if flags[i] & CELL_ALLOW_LANDMARKS and roles[i] == ROLE_CONNECTOR]
+        self.core_landmark_cells = [i for i in active if flags[i] & CELL_ALLOW_LANDMARKS and roles[i] in CORE_ROLE_CODES]
+        self.outer_entity_cells = [i for i in active if flags[i] & CELL_ALLOW_ENTITIES and roles[i] == ROLE_CONNECTOR]
+        self.core_entity_cells = [
+            i for i in active if flags[i] & CELL_ALLOW_ENTITIES and roles[i] in (ROLE_CORE_AREA, ROLE_CENTER_RING)
+        ]
+
+        self._np_arrays: Dict[str, Any] | None = None
+        self.connector_variants: Dict[int, str] = {
+            i: _connector_variant(grid, i) for i in range(size) if roles[i] == ROLE_CONNECTOR
+        }
 
-def _land_region(cell: Dict[str, Any] | None) -> str:
-    if not cell or _is_waterish(cell):
+    def biome_region_neighbors(self) -> Dict[str, set]:
+        """Biome regions that touch each biome region (built on first use)."""
+        if self._biome_region_neighbors is None:
+            region_of: Dict[int, str] = {}
+            for region, region_cells in self.biome_region_cells.items():
+                for i in region_cells:
+                    region_of[i] = region
+            adjacent = self.grid.adjacent
+            neighbors: Dict[str, set] = {region: set() for region in self.biome_region_cells}
+            for i, region in region_of.items():
+                for j in adjacent[i]:
+                    other = region_of.get(j)
+                    if other is not None and other != region:
+                        neighbors[region].add(other)
+            self._biome_region_neighbors = neighbors
+        return self._biome_region_neighbors
+
+
+_PLAN_CACHE_SIZE = 16
+_PLAN_CACHE: "OrderedDict[tuple[str, str], _SkeletonPlan]" = OrderedDict()
+_PLAN_CACHE_LOCK = _real_threading.Lock()
+
+
+def _skeleton_plan_for(payload: Dict[str, Any], content_hash: str | None = None) -> _SkeletonPlan:
+    """Shared _SkeletonPlan for a skeleton, keyed by name + content hash (small LRU).
+
+    Editing a skeleton changes its hash, so a stale plan is never served; it just
+    ages out of the LRU.
+    """
+    key = (str(payload.get("name") or ""), content_hash or _skeleton_content_hash(payload))
+    with _PLAN_CACHE_LOCK:
+        plan = _PLAN_CACHE.get(key)
+        if plan is not None:
+            _PLAN_CACHE.move_to_end(key)
+            return plan
+    plan = _SkeletonPlan(_HexGrid(payload), key[1])
+    with _PLAN_CACHE_LOCK:
+        _PLAN_CACHE[key] = plan
+        while len(_PLAN_CACHE) > _PLAN_CACHE_SIZE:
+            _PLAN_CACHE.popitem(last=False)
+    return plan
+
+
+class _OverlayLayer:
+    """Placed overlays keyed by grid slot, kept in placement order.
+
+    occupied[i] is 1 while slot i holds an overlay, and crowded[i] counts the
+    overlays on slot i plus its neighbors. "Free and not next to another overlay"
+    is therefore crowded[i] == 0. add/remove keep both up to date, touching only
+    the slot and its six neighbors.
+    """
+
+    def __init__(self, grid: _HexGrid):
+        self.grid = grid
+        self.records: Dict[int, Dict[str, Any]] = {}
+        self.occupied = bytearray(grid.size)
+        self.crowded = bytearray(grid.size)
+
+    def __contains__(self, i: int) -> bool:
+        return bool(self.occupied[i])
+
+    def get(self, i: int) -> Dict[str, Any] | None:
+        return self.records.get(i)
+
+    def is_crowded(self, i: int) -> bool:
+        return bool(self.crowded[i])
+
+    def add(self, i: int, record: Dict[str, Any]) -> None:
+        self.records[i] = record
+        self.occupied[i] = 1
+        crowded = self.crowded
+        crowded[i] += 1
+        for j in self.grid.adjacent[i]:
+            crowded[j] += 1
+
+    def remove(self, i: int) -> None:
+        if self.records.pop(i, None) is None:
+            return
+        self.occupied[i] = 0
+        crowded = self.crowded
+        crowded[i] -= 1
+        for j in self.grid.adjacent[i]:
+            crowded[j] -= 1
+
+
+class _MapLayers:
+    """Upstream results of one generation run that _regenerate_map can reuse.
+
+    Each layer is kept with the key of the inputs it was rolled from (biome
+    balance, texture mode, the salts of its streams); a later run reuses it
+    only when its own key for that layer is the same.
+    """
+
+    def __init__(self):
+        self.biome_key: tuple | None = None
+        self.region_biomes: Dict[str, str] = {}
+        self.biome_variant_plan: array | None = None
+        self.center_core_plan: array | None = None
+        self.texture_key: tuple | None = None
+        self.tex: array | None = None
+        self.overlay_key: tuple | None = None
+
+
+class _MapGenState:
+    """Per-seed generation state over a shared _SkeletonPlan.
+
+    tex[i] is the final texture id of slot i (an index into assets.textures,
+    -1 when none has been chosen yet). Passes draw from state.rng, which
+    stream() points at the RNG stream of the current phase (and region), and
+    read their densities and chances from state.profile.
+    """
+
+    def __init__(
+        self,
+        plan: _SkeletonPlan,
+        assets: _MapAssets,
+        seed: int,
+        rng_factory=random.Random,
+        rerolls: Dict[str, int] | None = None,
+    ):
+        self.plan = plan
+        grid = plan.grid
+        self.grid = grid
+        self.assets = assets
+        self.seed = seed
+        self.rerolls: Dict[str, int] = dict(rerolls or {})
+        self.rng_factory = rng_factory
+        self.rng: random.Random | None = None
+        self.tex = array("h", [-1]) * grid.size
+        self.overlays = _OverlayLayer(grid)
+        self.region_biomes: Dict[str, str] = {}
+        self.layers = _MapLayers()
+        self.vectorized = False
+        self.biome_balance: _BiomeBalance | None = None
+        self.profile = _DEFAULT_PROFILE
+
+    def layer_salts(self, layer: str) -> tuple:
+        """The re-roll salts that apply to layer's streams, as a sortable key."""
+        return tuple(sorted(
+            (target, salt) for target, salt in self.rerolls.items()
+            if target == layer or target.startswith(layer + ":")
+        ))
+
+    def new_stream(self, phase: str, region: str | None = None) -> random.Random:
+        """A fresh RNG for phase (per region when given), derived from the seed alone.
+
+        Streams are independent of each other, so a change in one phase or
+        region leaves the draws of every other stream as they were.
+        """
+        layer = _STREAM_LAYERS.get(phase, "overlays")
+        salt = self.rerolls.get(layer, 0)
+        key = f"{self.seed}:{phase}"
+        if region is not None:
+            region = str(region).strip().lower()
+            salt += self.rerolls.get(f"{layer}:{region}", 0)
+            key += f":{region}"
+        if salt:
+            key += f"#{salt}"
+        return self.rng_factory(key)
+
+    def stream(self, phase: str, region: str | None = None) -> random.Random:
+        """new_stream(phase, region), also installed as state.rng for the helpers."""
+        self.rng = self.new_stream(phase, region)
+        return self.rng
+
+    def variant(self, i: int) -> str:
+        tid = self.tex[i]
+        if tid < 0:
+            return ""
+        return self.assets.texture_index.variant_lc[tid]
+
+    def resolved_biome(self, i: int) -> str | None:
+        return self.region_biomes.get(self.grid.cells[i].get("region") or "")
+
+
+class _RegionStreams:
+    """One phase's per-region RNG streams, created on first use and looked up by slot."""
+
+    def __init__(self, state: _MapGenState, phase: str):
+        self.state = state
+        self.phase = phase
+        self._streams: Dict[int, random.Random] = {}
+
+    def __getitem__(self, i: int) -> random.Random:
+        grid = self.state.grid
+        region_id = grid.regions[i]
+        rng = self._streams.get(region_id)
+        if rng is None:
+            rng = self._streams[region_id] = self.state.new_stream(self.phase, grid.region_keys[region_id])
+        return rng
+
+    def shuffled(self, cells: List[int]) -> List[int]:
+        """cells in uniformly random order; each slot's sort key comes from its region's stream.
+
+        Re-rolling one region moves only that region's slots within the order.
+        """
+        return sorted(cells, key=lambda i: self[i].random())
+
+
+def _is_waterish_slot(grid: _HexGrid, j: int) -> bool:
+    return j < 0 or grid.roles[j] in WATERISH_ROLE_CODES
+
+
+def _land_region(grid: _HexGrid, j: int) -> str:
+    if _is_waterish_slot(grid, j):
         return ""
-    region = str(cell.get("region") or "").strip().lower()
+    region = grid.region_keys[grid.regions[j]]
     if region and region not in {"none", "water"}:
         return region
-    role = str(cell.get("role") or "").strip().lower()
+    role = MAP_ROLES[grid.roles[j]]
     return role if role not in {"connector", ""} else "land"
 
 
-def _connector_variant(cell: Dict[str, Any], cell_lookup: Dict[tuple[int, int], Dict[str, Any]]) -> str:
-    neighbors = [cell_lookup.get(key) for key in _neighbor_keys(int(cell.get("row", 0)), int(cell.get("col", 0)))]
-    water_neighbors = sum(1 for n in neighbors if _is_waterish(n))
-    land_neighbors = [n for n in neighbors if n and not _is_waterish(n)]
+def _connector_variant(grid: _HexGrid, i: int) -> str:
+    slots = grid.neighbor_slots(i)
+    waterish = [_is_waterish_slot(grid, j) for j in slots]
+    water_neighbors = sum(waterish)
+    land_neighbors = [j for j, wet in zip(slots, waterish) if not wet]
     if len(land_neighbors) < 2:
         return "road"
 
     # If the connector touches two or more distinct land regions, it's acting as a bridge.
-    regions = {r for r in (_land_region(n) for n in land_neighbors) if r}
+    regions = {r for r in (_land_region(grid, j) for j in land_neighbors) if r}
     if water_neighbors >= 1 and len(regions) >= 2:
         return "bridge"
 
     # Fallback: opposite land sides across the hex also count as a bridge crossing.
     opposite_pairs = ((0, 5), (1, 4), (2, 3))
     for a_idx, b_idx in opposite_pairs:
-        a = neighbors[a_idx] if a_idx < len(neighbors) else None
-        b = neighbors[b_idx] if b_idx < len(neighbors) else None
-        if a and b and not _is_waterish(a) and not _is_waterish(b):
+        if not waterish[a_idx] and not waterish[b_idx]:
             if water_neighbors >= 1:
                 return "bridge"
 
     return "road"
 
 
-def _is_adjacent_to_role(cell: Dict[str, Any], cell_lookup: Dict[tuple[int, int], Dict[str, Any]], role_name: str) -> bool:
-    role_name = str(role_name or "").strip().lower()
-    for nkey in _neighbor_keys(int(cell.get("row", 0)), int(cell.get("col", 0))):
-        neighbor = cell_lookup.get(nkey)
-        if neighbor and str(neighbor.get("role") or "").strip().lower() == role_name:
-            return True
-    return False
-
-
-def _texture_variant_name(cell: Dict[str, Any] | None) -> str:
-    if not cell:
-        return ""
-    final_texture = cell.get("_final_texture")
-    if not final_texture:
-        return ""
-    return str(final_texture.get("variant") or "").strip().lower()
+def _is_blocked_spawn_texture(state: _MapGenState, i: int) -> bool:
+    return state.variant(i) in {"lava", "forest"}
 
 
-def _is_blocked_spawn_texture(cell: Dict[str, Any] | None) -> bool:
-    return _texture_variant_name(cell) in {"lava", "forest"}
-
-
-def _is_adjacent_to_waterlike(cell: Dict[str, Any], cell_lookup: Dict[tuple[int, int], Dict[str, Any]]) -> bool:
-    for nkey in _neighbor_keys(int(cell.get("row", 0)), int(cell.get("col", 0))):
-        neighbor = cell_lookup.get(nkey)
-        if not neighbor:
-            continue
-        if str(neighbor.get("role") or "").strip().lower() == "water":
+def _is_adjacent_to_waterlike(state: _MapGenState, i: int) -> bool:
+    roles = state.grid.roles
+    for j in state.grid.adjacent[i]:
+        if roles[j] == ROLE_WATER:
             return True
-        if _texture_variant_name(neighbor) in {"water", "maelstrom"}:
+        if state.variant(j) in {"water", "maelstrom"}:
             return True
     return False
 
 
-def _odd_r_to_cube(row: int, col: int) -> tuple[int, int, int]:
-    q = col - (row - (row & 1)) // 2
-    r = row
-    x = q
-    z = r
-    y = -x - z
-    return x, y, z
-
-
-def _hex_distance(a: tuple[int, int], b: tuple[int, int]) -> int:
-    ax, ay, az = _odd_r_to_cube(a[0], a[1])
-    bx, by, bz = _odd_r_to_cube(b[0], b[1])
-    return max(abs(ax - bx), abs(ay - by), abs(az - bz))
-
-
-def _pick_texture_for_cell(
-    cell: Dict[str, Any],
-    cell_lookup: Dict[tuple[int, int], Dict[str, Any]],
-    region_biomes: Dict[str, str],
-    textures: List[Dict[str, Any]],
-    biome_variant_plan: Dict[tuple[int, int], Dict[str, Any]],
-    rng: random.Random,
-) -> Dict[str, Any] | None:
+def _pick_texture_for_cell(state: _MapGenState, i: int, biome_variant_plan: array) -> int:
+    cell = state.grid.cells[i]
+    texture_index = state.assets.texture_index
+    rng = state.rng
     role = cell.get("role") or "empty"
     if not cell.get("active"):
-        return None
+        return -1
 
-    biome = region_biomes.get(cell.get("region") or "")
+    biome = state.region_biomes.get(cell.get("region") or "")
     if cell.get("allow_biomes") and biome:
-        planned = biome_variant_plan.get((int(cell.get("row", 0)), int(cell.get("col", 0))))
-        if planned:
+        planned = biome_variant_plan[i]
+        if planned >= 0:
             return planned
-        matches = [a for a in textures if a["biome"].lower() == biome.lower()]
+        matches = texture_index.biome(biome)
         if matches:
             return rng.choice(matches)
 
-    neutral = [a for a in textures if a["biome"].lower() == "neutral"]
+    neutral = texture_index.neutral
     if not neutral:
-        return None
+        return -1
 
     if role == "spawn":
-        campfire = [a for a in neutral if "campfire" in a["variant"].lower()]
+        campfire = texture_index.neutral_matching("campfire")
         if campfire:
             return campfire[0]
 
     preferred_variants: tuple[str, ...]
     if role == "connector":
-        preferred_variants = (_connector_variant(cell, cell_lookup),)
+        preferred_variants = (state.plan.connector_variants[i],)
     elif role == "water":
         preferred_variants = ("water",)
     elif role == "center_core":
@@ -645,21 +1650,17 @@ def _pick_texture_for_cell(
     else:
         preferred_variants = ("plains", "forest", "simple")
 
-    matches = [a for a in neutral if any(pref in a["variant"].lower() for pref in preferred_variants)]
+    matches = texture_index.neutral_matching(*preferred_variants)
     return rng.choice(matches or neutral)
 
 
-def _pick_landmark_asset(cell: Dict[str, Any], landmarks: List[Dict[str, Any]], rng: random.Random) -> Dict[str, Any] | None:
-    if not landmarks:
-        return None
-    landmarks = [a for a in landmarks if a["name_key"] != "boat" and a["name_key"] not in DISABLED_LANDMARK_KEYS]
-    if not landmarks:
+def _pick_landmark_asset(state: _MapGenState, i: int) -> Dict[str, Any] | None:
+    assets = state.assets
+    if not assets.pickable_landmarks:
         return None
-    if cell.get("role") in {"core_area", "center_ring", "center_core"}:
-        zones = [a for a in landmarks if a["group"] == "zone" and a["name_key"] not in {"shipwreck", "port"}]
-        return rng.choice(zones or landmarks)
-    non_zones = [a for a in landmarks if a["group"] != "zone" and a["name_key"] not in {"shipwreck", "portal", "port"}]
-    return rng.choice(non_zones or landmarks)
+    if state.grid.roles[i] in CORE_ROLE_CODES:
+        return state.rng.choice(assets.core_landmark_pool)
+    return state.rng.choice(assets.outer_landmark_pool)
 
 
 def _asset_by_name_key(assets: List[Dict[str, Any]], name_key: str, group: str | None = None) -> Dict[str, Any] | None:
@@ -681,8 +1682,8 @@ def _zone_assets(landmarks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     ]
 
 
-def _cell_allows_overlay(cell: Dict[str, Any], allow_forest: bool = False) -> bool:
-    variant = _texture_variant_name(cell)
+def _cell_allows_overlay(state: _MapGenState, i: int, allow_forest: bool = False) -> bool:
+    variant = state.variant(i)
     if variant == "lava":
         return False
     if variant == "forest" and not allow_forest:
@@ -690,34 +1691,22 @@ def _cell_allows_overlay(cell: Dict[str, Any], allow_forest: bool = False) -> bo
     return True
 
 
-def _has_adjacent_overlay(cell: Dict[str, Any], overlay_by_key: Dict[tuple[int, int], Dict[str, Any]]) -> bool:
-    for nkey in _neighbor_keys(int(cell.get("row", 0)), int(cell.get("col", 0))):
-        if nkey in overlay_by_key:
-            return True
-    return False
-
-
-def _can_place_content(cell: Dict[str, Any], overlay_by_key: Dict[tuple[int, int], Dict[str, Any]], allow_forest: bool = False) -> bool:
-    if not _cell_allows_overlay(cell, allow_forest=allow_forest):
-        return False
-    key = (int(cell.get("row", 0)), int(cell.get("col", 0)))
-    if key in overlay_by_key:
-        return False
-    if _has_adjacent_overlay(cell, overlay_by_key):
+def _can_place_content(state: _MapGenState, i: int, allow_forest: bool = False) -> bool:
+    if not _cell_allows_overlay(state, i, allow_forest=allow_forest):
         return False
-    return True
+    # Covers both "slot taken" and "next to an overlay".
+    return not state.overlays.is_crowded(i)
 
 
-def _can_place_on_hex_only(cell: Dict[str, Any], overlay_by_key: Dict[tuple[int, int], Dict[str, Any]], allow_forest: bool = False) -> bool:
-    if not _cell_allows_overlay(cell, allow_forest=allow_forest):
+def _can_place_on_hex_only(state: _MapGenState, i: int, allow_forest: bool = False) -> bool:
+    if not _cell_allows_overlay(state, i, allow_forest=allow_forest):
         return False
-    key = (int(cell.get("row", 0)), int(cell.get("col", 0)))
-    return key not in overlay_by_key
+    return i not in state.overlays
 
 
 def _place_overlay(
-    overlay_by_key: Dict[tuple[int, int], Dict[str, Any]],
-    cell: Dict[str, Any],
+    state: _MapGenState,
+    i: int,
     kind: str,
     asset: Dict[str, Any] | None,
     *,
@@ -729,34 +1718,29 @@ def _place_overlay(
     if not asset:
         return False
     if ignore_adjacent_rule:
-        if not _can_place_on_hex_only(cell, overlay_by_key, allow_forest=allow_forest):
+        if not _can_place_on_hex_only(state, i, allow_forest=allow_forest):
             return False
-    elif not _can_place_content(cell, overlay_by_key, allow_forest=allow_forest):
+    elif not _can_place_content(state, i, allow_forest=allow_forest):
         return False
-    key = (cell["row"], cell["col"])
-    overlay_by_key[key] = {"kind": kind, "asset": asset}
+    record: Dict[str, Any] = {"kind": kind, "asset": asset}
     if guarded:
-        overlay_by_key[key]["guarded"] = True
+        record["guarded"] = True
     if no_stack:
-        overlay_by_key[key]["no_stack"] = True
+        record["no_stack"] = True
+    state.overlays.add(i, record)
     return True
 
 
-def _remove_overlays_on_blocked_tiles(
-    cells: List[Dict[str, Any]],
-    overlay_by_key: Dict[tuple[int, int], Dict[str, Any]],
-) -> None:
-    for cell in cells:
-        if not _is_blocked_spawn_texture(cell):
-            continue
-        overlay_by_key.pop((cell["row"], cell["col"]), None)
+def _remove_overlays_on_blocked_tiles(state: _MapGenState) -> None:
+    for i in range(state.grid.size):
+        if _is_blocked_spawn_texture(state, i):
+            state.overlays.remove(i)
 
 
-def _maybe_stack_non_zone_landmarks(
-    overlay_by_key: Dict[tuple[int, int], Dict[str, Any]],
-    rng: random.Random,
-) -> None:
-    for overlay in overlay_by_key.values():
+def _maybe_stack_non_zone_landmarks(state: _MapGenState) -> None:
+    streams = _RegionStreams(state, "stacking")
+    stack_chance = state.profile.non_zone_landmark_stack_chance
+    for i, overlay in state.overlays.records.items():
         if overlay.get("kind") != "landmark":
             continue
         if overlay.get("no_stack"):
@@ -764,12 +1748,12 @@ def _maybe_stack_non_zone_landmarks(
         asset = overlay.get("asset") or {}
         if str(asset.get("group") or "").strip().lower() == "zone":
             continue
-        if rng.random() < NON_ZONE_LANDMARK_STACK_CHANCE:
+        if streams[i].random() < stack_chance:
             overlay["count"] = int(overlay.get("count", 1)) + 1
 
 
-def _can_place_landmark(cell: Dict[str, Any], overlay_by_key: Dict[tuple[int, int], Dict[str, Any]]) -> bool:
-    return _can_place_content(cell, overlay_by_key)
+def _can_place_landmark(state: _MapGenState, i: int) -> bool:
+    return _can_place_content(state, i)
 
 
 def _portal_assets_by_color(landmarks: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
@@ -782,27 +1766,19 @@ def _portal_assets_by_color(landmarks: List[Dict[str, Any]]) -> Dict[str, Dict[s
     return out
 
 
-def _pick_zone_asset(
-    cell: Dict[str, Any],
-    cell_lookup: Dict[tuple[int, int], Dict[str, Any]],
-    landmarks: List[Dict[str, Any]],
-    rng: random.Random,
-) -> Dict[str, Any] | None:
-    zone_assets = [
-        a for a in landmarks
-        if a["group"] == "zone" and a["name_key"] not in DISABLED_LANDMARK_KEYS and a["name_key"] != "shipwreck"
-    ]
-    if not zone_assets:
+def _pick_zone_asset(state: _MapGenState, i: int) -> Dict[str, Any] | None:
+    assets = state.assets
+    if not assets.zone_landmarks:
         return None
 
-    adjacent_to_water = _is_adjacent_to_role(cell, cell_lookup, "water")
-    ports = [a for a in zone_assets if a["name_key"] == "port"]
-    non_ports = [a for a in zone_assets if a["name_key"] != "port"]
+    adjacent_to_water = state.grid.is_adjacent_to_role(i, ROLE_WATER)
+    ports = assets.zone_ports
+    non_ports = assets.zone_non_ports
 
-    if adjacent_to_water and ports and rng.random() < ZONE_PORT_CHANCE:
-        return rng.choice(ports)
+    if adjacent_to_water and ports and state.rng.random() < state.profile.zone_port_chance:
+        return state.rng.choice(ports)
 
-    return rng.choice(non_ports or zone_assets)
+    return state.rng.choice(non_ports or assets.zone_landmarks)
 
 
 def _overlay_supports_guarded(overlay: Dict[str, Any]) -> bool:
@@ -818,105 +1794,190 @@ def _overlay_supports_guarded(overlay: Dict[str, Any]) -> bool:
     return False
 
 
-def _build_texture_overrides(
-    cells: List[Dict[str, Any]],
-    cell_lookup: Dict[tuple[int, int], Dict[str, Any]],
-    textures: List[Dict[str, Any]],
-    rng: random.Random,
-) -> Dict[tuple[int, int], Dict[str, Any]]:
-    overrides: Dict[tuple[int, int], Dict[str, Any]] = {}
-    neutral = [a for a in textures if a["biome"].lower() == "neutral"]
-    mountains = [a for a in neutral if "mountain" in str(a.get("variant") or "").lower()]
-    maelstroms = [a for a in neutral if "maelstrom" in str(a.get("variant") or "").lower()]
-    lava = [a for a in neutral if "lava" in str(a.get("variant") or "").lower()]
-
-    water_cells = [c for c in cells if c.get("active") and str(c.get("role") or "").lower() == "water"]
-    if maelstroms and water_cells:
-        target_count = max(0, int(round(len(water_cells) * CENTER_WATER_MAELSTROM_CHANCE)))
-        shuffled_water = list(water_cells)
-        rng.shuffle(shuffled_water)
-        maelstrom_positions: List[tuple[int, int]] = []
-        for cell in shuffled_water:
-            if len(maelstrom_positions) >= target_count:
-                break
-            key = (cell["row"], cell["col"])
-            if all(_hex_distance(key, other) >= MAELSTROM_MIN_DISTANCE for other in maelstrom_positions):
-                overrides[key] = rng.choice(maelstroms)
-                maelstrom_positions.append(key)
-
-    biome_cells = [
-        c for c in cells
-        if c.get("active") and c.get("allow_biomes") and str(c.get("role") or "").lower() not in {"connector", "water", "center_core"}
-    ]
+def _place_maelstroms(state: _MapGenState, overrides: array, maelstroms: List[int]) -> None:
+    grid = state.grid
+    rng = state.rng
+    water_cells = state.plan.water_cells
+    if not maelstroms or not water_cells:
+        return
+    target_count = max(0, int(round(len(water_cells) * state.profile.center_water_maelstrom_chance)))
+    shuffled_water = list(water_cells)
+    rng.shuffle(shuffled_water)
+    placed_maelstroms = 0
+    # Marks every hex closer than MAELSTROM_MIN_DISTANCE to a placed maelstrom.
+    too_close = bytearray(grid.size)
+    for i in shuffled_water:
+        if placed_maelstroms >= target_count:
+            break
+        if too_close[i]:
+            continue
+        overrides[i] = rng.choice(maelstroms)
+        placed_maelstroms += 1
+        for j in _slots_within(grid, i, MAELSTROM_MIN_DISTANCE - 1):
+            too_close[j] = 1
+
+
+def _build_texture_overrides(state: _MapGenState) -> array:
+    plan = state.plan
+    grid = state.grid
+    texture_index = state.assets.texture_index
+    rng = state.rng
+    profile = state.profile
+    overrides = array("h", [-1]) * grid.size
+    mountains = texture_index.neutral_matching("mountain")
+    lava = texture_index.neutral_matching("lava")
+
+    _place_maelstroms(state, overrides, texture_index.neutral_matching("maelstrom"))
+
+    mountain_chain_ok = plan.mountain_chain_ok
+    biome_cells = list(plan.mountain_cells)
     rng.shuffle(biome_cells)
-    for cell in biome_cells:
-        key = (cell["row"], cell["col"])
-        if key in overrides:
+    for i in biome_cells:
+        if overrides[i] >= 0:
             continue
-        if _is_adjacent_to_role(cell, cell_lookup, "connector"):
+        if grid.is_adjacent_to_role(i, ROLE_CONNECTOR):
             continue
-        if rng.random() < MOUNTAIN_BASE_CHANCE and mountains:
-            overrides[key] = rng.choice(mountains)
-            candidates = []
-            for nkey in _neighbor_keys(cell["row"], cell["col"]):
-                neighbor = cell_lookup.get(nkey)
-                if not neighbor:
-                    continue
-                nrole = str(neighbor.get("role") or "").lower()
-                if not neighbor.get("active") or not neighbor.get("allow_biomes") or nrole in {"connector", "water"}:
-                    continue
-                if _is_adjacent_to_role(neighbor, cell_lookup, "connector"):
-                    continue
-                if nkey in overrides:
-                    continue
-                candidates.append(neighbor)
-            if candidates and rng.random() < MOUNTAIN_ADJACENT_CHAIN_CHANCE:
+        if rng.random() < profile.mountain_base_chance and mountains:
+            overrides[i] = rng.choice(mountains)
+            candidates = [j for j in grid.adjacent[i] if mountain_chain_ok[j] and overrides[j] < 0]
+            if candidates and rng.random() < profile.mountain_adjacent_chain_chance:
                 chained = rng.choice(candidates)
-                overrides[(chained["row"], chained["col"])] = rng.choice(mountains)
+                overrides[chained] = rng.choice(mountains)
 
     if lava:
-        center_ring_cells = [c for c in cells if c.get("active") and str(c.get("role") or "").lower() == "center_ring"]
-        center_core_cells = [c for c in cells if c.get("active") and str(c.get("role") or "").lower() == "center_core"]
-        for cell in center_ring_cells:
-            if rng.random() < CENTER_RING_LAVA_CHANCE:
-                overrides[(cell["row"], cell["col"])] = rng.choice(lava)
-        for cell in center_core_cells:
-            special_lc = str(cell.get("special") or "").strip().lower()
-            if "boss" in special_lc:
+        for i in plan.center_ring_cells:
+            if rng.random() < profile.center_ring_lava_chance:
+                overrides[i] = rng.choice(lava)
+        for i in plan.center_core_cells:
+            if plan.boss[i]:
                 continue
-            if rng.random() < CENTER_CORE_LAVA_CHANCE:
-                overrides[(cell["row"], cell["col"])] = rng.choice(lava)
+            if rng.random() < profile.center_core_lava_chance:
+                overrides[i] = rng.choice(lava)
 
     return overrides
 
 
-def _enforce_lava_water_separation(
-    cells: List[Dict[str, Any]],
-    cell_lookup: Dict[tuple[int, int], Dict[str, Any]],
-    textures: List[Dict[str, Any]],
-) -> None:
-    neutral = [a for a in textures if a["biome"].lower() == "neutral"]
-    plains_assets = [a for a in neutral if "plains" in str(a.get("variant") or "").lower()]
-    fallback_plain = plains_assets[0] if plains_assets else None
-    if not fallback_plain:
-        fallback_plain = next((a for a in neutral if "platform" in str(a.get("variant") or "").lower()), None)
-    if not fallback_plain:
+def _fallback_plain_texture(texture_index: _TextureIndex) -> int | None:
+    plains_assets = texture_index.neutral_matching("plains")
+    if plains_assets:
+        return plains_assets[0]
+    return next(iter(texture_index.neutral_matching("platform")), None)
+
+
+def _enforce_lava_water_separation(state: _MapGenState) -> None:
+    fallback_plain = _fallback_plain_texture(state.assets.texture_index)
+    if fallback_plain is None:
         return
 
-    for cell in cells:
-        final_texture = cell.get("_final_texture")
-        if not final_texture:
-            continue
-        variant = str(final_texture.get("variant") or "").strip().lower()
-        if variant != "lava":
+    boss = state.plan.boss
+    for i in range(state.grid.size):
+        if state.variant(i) != "lava":
             continue
-        special_lc = str(cell.get("special") or "").strip().lower()
-        if "boss" in special_lc or _is_adjacent_to_waterlike(cell, cell_lookup):
-            cell["_final_texture"] = fallback_plain
+        if boss[i] or _is_adjacent_to_waterlike(state, i):
+            state.tex[i] = fallback_plain
+
+
+def _np_plan_arrays(plan: _SkeletonPlan) -> Dict[str, Any]:
+    """NumPy copies of the plan data the vectorized passes use (built once per plan).
+
+    Per-slot masks get one extra trailing False so that gathering through a -1
+    (off-board) neighbor reads False.
+    """
+    arrays = plan._np_arrays
+    if arrays is None:
+        grid = plan.grid
+        size = grid.size
+        boss = np.frombuffer(bytes(plan.boss), dtype=np.uint8).astype(bool)
+        mountain_cells = np.array(plan.mountain_cells, dtype=np.intp)
+        role_adjacency = np.frombuffer(grid.role_adjacency, dtype=np.uint16)
+        arrays = {
+            "neighbors": np.frombuffer(grid.neighbors, dtype=np.int32).reshape(size, 6).astype(np.intp),
+            "is_water_role": np.frombuffer(grid.roles, dtype=np.uint8) == ROLE_WATER,
+            "boss": boss,
+            "mountain_cells": mountain_cells[((role_adjacency[mountain_cells] >> ROLE_CONNECTOR) & 1) == 0],
+            "chain_ok": np.append(np.frombuffer(bytes(plan.mountain_chain_ok), dtype=np.uint8).astype(bool), False),
+            "center_ring_cells": np.array(plan.center_ring_cells, dtype=np.intp),
+            "center_core_cells": np.array([i for i in plan.center_core_cells if not plan.boss[i]], dtype=np.intp),
+        }
+        plan._np_arrays = arrays
+    return arrays
+
+
+def _np_variant_lookup(texture_index: _TextureIndex, variants: frozenset) -> Any:
+    """Bool per texture id (plus a trailing False for id -1): variant is one of `variants`."""
+    return np.array([v in variants for v in texture_index.variant_lc] + [False], dtype=bool)
+
+
+def _build_texture_overrides_np(state: _MapGenState) -> array:
+    """Vectorized _build_texture_overrides.
+
+    Maelstroms keep the sequential walk (each placement blocks a radius). Mountain
+    seeds, mountain chains and center lava are drawn as whole arrays from a NumPy
+    generator seeded off the map RNG. Unlike the scalar pass, every mountain seed
+    is rolled against the board as it was before any mountain was placed, and the
+    chain rolls follow, so the same seed yields a different (equally weighted) map
+    than the scalar mode.
+    """
+    plan = state.plan
+    texture_index = state.assets.texture_index
+    profile = state.profile
+    overrides = array("h", [-1]) * state.grid.size
+    mountains = np.array(texture_index.neutral_matching("mountain"), dtype=np.int16)
+    lava = np.array(texture_index.neutral_matching("lava"), dtype=np.int16)
+
+    _place_maelstroms(state, overrides, texture_index.neutral_matching("maelstrom"))
+
+    gen = np.random.default_rng(state.rng.getrandbits(64))
+    arrays = _np_plan_arrays(plan)
+    ov = np.frombuffer(overrides, dtype=np.int16)
+
+    if len(mountains):
+        seeds = arrays["mountain_cells"]
+        seeds = seeds[ov[seeds] < 0]
+        base = seeds[gen.random(len(seeds)) < profile.mountain_base_chance]
+        ov[base] = mountains[gen.integers(len(mountains), size=len(base))]
+        chaining = base[gen.random(len(base)) < profile.mountain_adjacent_chain_chance]
+        if len(chaining):
+            candidates = arrays["neighbors"][chaining]
+            free = np.append(ov < 0, False)
+            valid = arrays["chain_ok"][candidates] & free[candidates]
+            # Uniform pick among each row's valid neighbors: largest random key wins.
+            keys = np.where(valid, gen.random(candidates.shape), -1.0)
+            picked = keys.argmax(axis=1)
+            has_candidate = valid.any(axis=1)
+            chained = candidates[has_candidate, picked[has_candidate]]
+            ov[chained] = mountains[gen.integers(len(mountains), size=len(chained))]
+
+    if len(lava):
+        for cells, chance in (
+            (arrays["center_ring_cells"], profile.center_ring_lava_chance),
+            (arrays["center_core_cells"], profile.center_core_lava_chance),
+        ):
+            hit = cells[gen.random(len(cells)) < chance]
+            ov[hit] = lava[gen.integers(len(lava), size=len(hit))]
+
+    del ov
+    return overrides
 
 
-def _pick_entity_asset(cell: Dict[str, Any], entities: List[Dict[str, Any]], rng: random.Random, special: str | None = None) -> Dict[str, Any] | None:
-    if not entities:
+def _enforce_lava_water_separation_np(state: _MapGenState) -> None:
+    """Vectorized _enforce_lava_water_separation (same result; it draws no randomness)."""
+    texture_index = state.assets.texture_index
+    fallback_plain = _fallback_plain_texture(texture_index)
+    if fallback_plain is None:
+        return
+    arrays = _np_plan_arrays(state.plan)
+    tex = np.frombuffer(state.tex, dtype=np.int16)
+    lava = _np_variant_lookup(texture_index, frozenset({"lava"}))[tex]
+    if lava.any():
+        waterlike = arrays["is_water_role"] | _np_variant_lookup(texture_index, frozenset({"water", "maelstrom"}))[tex]
+        near_water = np.append(waterlike, False)[arrays["neighbors"]].any(axis=1)
+        tex[lava & (arrays["boss"] | near_water)] = fallback_plain
+    del tex
+
+
+def _pick_entity_asset(cell: Dict[str, Any], assets: _MapAssets, rng: random.Random, special: str | None = None) -> Dict[str, Any] | None:
+    if not assets.entities:
         return None
 
     special_lc = (special or "").lower()
@@ -929,21 +1990,17 @@ def _pick_entity_asset(cell: Dict[str, Any], entities: List[Dict[str, Any]], rng
     }
     for token, name_key in special_entity_map.items():
         if token in special_lc:
-            exact = _asset_by_name_key(entities, name_key)
+            exact = _asset_by_name_key(assets.entities, name_key)
             if exact:
                 return exact
     if cell.get("spawn"):
-        pool = [a for a in entities if a.get("npc", "").lower() == "hero" or a.get("hero")]
-        return rng.choice(pool or entities)
+        return rng.choice(assets.spawn_entity_pool)
     if cell.get("role") in {"core_area", "center_ring", "center_core"}:
-        pool = [a for a in entities if any(h in a["label"].lower() or h in a.get("npc", "").lower() for h in CORE_ENTITY_HINTS)]
-        return rng.choice(pool or entities)
-    pool = [a for a in entities if any(h in a["label"].lower() or h in a.get("npc", "").lower() for h in OUTER_ENTITY_HINTS)]
-    return rng.choice(pool or entities)
+        return rng.choice(assets.core_entity_pool)
+    return rng.choice(assets.outer_entity_pool)
 
 
-def _unique_spawn_hero_assets(entities: List[Dict[str, Any]], rng: random.Random) -> List[Dict[str, Any]]:
-    hero_assets = [a for a in entities if a.get("npc", "").lower() == "hero" or a.get("hero")]
+def _unique_spawn_hero_assets(hero_assets: List[Dict[str, Any]], rng: random.Random) -> List[Dict[str, Any]]:
     unique_by_color: Dict[str, Dict[str, Any]] = {}
     for asset in hero_assets:
         color_key = (
@@ -959,67 +2016,70 @@ def _unique_spawn_hero_assets(entities: List[Dict[str, Any]], rng: random.Random
     return pool
 
 
-def _is_region_edge_cell(cell: Dict[str, Any], cell_lookup: Dict[tuple[int, int], Dict[str, Any]]) -> bool:
-    region = str(cell.get("region") or "").strip().lower()
-    if not region:
+def _is_region_edge_cell(grid: _HexGrid, i: int) -> bool:
+    region_id = grid.regions[i]
+    if not grid.region_keys[region_id]:
         return False
     same_region_neighbors = 0
-    for nkey in _neighbor_keys(int(cell.get("row", 0)), int(cell.get("col", 0))):
-        neighbor = cell_lookup.get(nkey)
-        if not neighbor:
-            continue
-        if str(neighbor.get("role") or "").strip().lower() != "outer_area":
+    for j in grid.adjacent[i]:
+        if grid.roles[j] != ROLE_OUTER_AREA:
             continue
-        if str(neighbor.get("region") or "").strip().lower() == region:
+        if grid.regions[j] == region_id:
             same_region_neighbors += 1
     return same_region_neighbors < 6
 
 
-def _min_distance_to_role(
-    cell: Dict[str, Any],
-    cells: List[Dict[str, Any]],
-    role_name: str,
-) -> int | None:
-    role_name = str(role_name or "").strip().lower()
-    distances = [
-        _hex_distance((int(cell["row"]), int(cell["col"])), (int(other["row"]), int(other["col"])))
-        for other in cells
-        if str(other.get("role") or "").strip().lower() == role_name
-    ]
-    return min(distances) if distances else None
+def _min_distance_to_role(grid: _HexGrid, i: int, role_name: str) -> int | None:
+    role_code = ROLE_CODES.get(str(role_name or "").strip().lower())
+    if role_code is None:
+        return None
+    distance = grid.role_distance(role_code)[i]
+    return distance if distance >= 0 else None
 
 
-def _min_distance_to_spawn(cell: Dict[str, Any], spawn_cells: List[Dict[str, Any]]) -> int | None:
-    if not spawn_cells:
+def _min_distance_to_spawn(spawn_distance: array | None, i: int) -> int | None:
+    if spawn_distance is None:
         return None
-    return min(
-        _hex_distance((int(cell["row"]), int(cell["col"])), (int(other["row"]), int(other["col"])))
-        for other in spawn_cells
-    )
+    distance = spawn_distance[i]
+    return distance if distance >= 0 else None
 
 
-def _shuffled_cells(rng: random.Random, cells: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+def _shuffled_cells(rng: random.Random, cells: List[int]) -> List[int]:
     items = list(cells)
     rng.shuffle(items)
     return items
 
 
-def _place_first_matching(
-    overlay_by_key: Dict[tuple[int, int], Dict[str, Any]],
-    cells: List[Dict[str, Any]],
+def _place_from_pool(
+    state: _MapGenState,
+    pool: List[int],
     asset: Dict[str, Any] | None,
     kind: str,
-    rng: random.Random,
     *,
     allow_forest: bool = False,
     guarded: bool = False,
     ignore_adjacent_rule: bool = False,
     no_stack: bool = False,
-) -> Dict[str, Any] | None:
-    for cell in _shuffled_cells(rng, cells):
+) -> int | None:
+    """Place asset on a uniformly random slot of pool that passes the placement rules.
+
+    Every slot drawn is removed from the pool (swap-remove), whether it was placed
+    or rejected. A pool must therefore only be reused for the same rule flags, and
+    only while its slots can become less placeable but never more (overlays get
+    added, textures turn to forest). Across a pool's lifetime each slot is looked
+    at most once, so repeated placements cost O(1) amortized.
+    """
+    if not asset:
+        return None
+    rng = state.rng
+    while pool:
+        k = rng.randrange(len(pool))
+        i = pool[k]
+        pool[k] = pool[-1]
+        pool.pop()
         if _place_overlay(
-            overlay_by_key,
-            cell,
+            state,
+            i,
             kind,
             asset,
             allow_forest=allow_forest,
@@ -1027,79 +2087,57 @@ def _place_first_matching(
             ignore_adjacent_rule=ignore_adjacent_rule,
             no_stack=no_stack,
         ):
-            return cell
+            return i
     return None
 
 
-def _convert_adjacent_hexes_to_forest(
-    source_cell: Dict[str, Any],
-    cells: List[Dict[str, Any]],
-    cell_lookup: Dict[tuple[int, int], Dict[str, Any]],
-    textures: List[Dict[str, Any]],
-    rng: random.Random,
-    count: int,
-) -> None:
-    region = str(source_cell.get("region") or "").strip()
-    biome = str(source_cell.get("_resolved_biome") or "").strip()
+def _convert_adjacent_hexes_to_forest(state: _MapGenState, source: int, count: int) -> None:
+    grid = state.grid
+    cells = grid.cells
+    region = str(cells[source].get("region") or "").strip()
+    biome = str(state.resolved_biome(source) or "").strip()
     if not region or not biome:
         return
 
-    biome_forest_assets = [
-        a for a in textures
-        if str(a.get("biome") or "").strip().lower() == biome.lower()
-        and str(a.get("variant") or "").strip().lower() == "forest"
-    ]
+    biome_forest_assets = state.assets.texture_index.biome_variant(biome, "forest")
     if not biome_forest_assets:
         return
 
     candidates = []
-    for nkey in _neighbor_keys(int(source_cell.get("row", 0)), int(source_cell.get("col", 0))):
-        neighbor = cell_lookup.get(nkey)
-        if not neighbor:
+    for j in grid.adjacent[source]:
+        if not grid.flags[j] & CELL_ACTIVE:
             continue
-        if not neighbor.get("active"):
+        if str(cells[j].get("region") or "").strip() != region:
             continue
-        if str(neighbor.get("region") or "").strip() != region:
+        if grid.roles[j] != ROLE_OUTER_AREA:
             continue
-        if str(neighbor.get("role") or "").strip().lower() != "outer_area":
+        if state.variant(j) == "lava":
             continue
-        if _texture_variant_name(neighbor) == "lava":
-            continue
-        candidates.append(neighbor)
+        candidates.append(j)
 
-    for neighbor in _shuffled_cells(rng, candidates)[: max(0, int(count))]:
-        neighbor["_final_texture"] = rng.choice(biome_forest_assets)
+    for j in _shuffled_cells(state.rng, candidates)[: max(0, int(count))]:
+        state.tex[j] = state.rng.choice(biome_forest_assets)
 
 
-def _convert_cell_to_biome_variant(
-    cell: Dict[str, Any],
-    textures: List[Dict[str, Any]],
-    rng: random.Random,
-    variant_name: str,
-) -> bool:
-    biome = str(cell.get("_resolved_biome") or "").strip()
+def _convert_cell_to_biome_variant(state: _MapGenState, i: int, variant_name: str) -> bool:
+    biome = str(state.resolved_biome(i) or "").strip()
     wanted = str(variant_name or "").strip().lower()
     if not biome or not wanted:
         return False
-    matching_assets = [
-        a for a in textures
-        if str(a.get("biome") or "").strip().lower() == biome.lower()
-        and str(a.get("variant") or "").strip().lower() == wanted
-    ]
+    matching_assets = state.assets.texture_index.biome_variant(biome, wanted)
     if not matching_assets:
         return False
-    cell["_final_texture"] = rng.choice(matching_assets)
+    state.tex[i] = state.rng.choice(matching_assets)
     return True
 
 
-def _spawn_guard_matches_for_stacked_landmarks(
-    cells: List[Dict[str, Any]],
-    overlay_by_key: Dict[tuple[int, int], Dict[str, Any]],
-    entities: List[Dict[str, Any]],
-    rng: random.Random,
-) -> None:
-    entity_by_key = {a["name_key"]: a for a in entities}
-    for key, overlay in list(overlay_by_key.items()):
+def _spawn_guard_matches_for_stacked_landmarks(state: _MapGenState) -> None:
+    """One extra Weakling / Elite per extra Gold / chest on a stacked landmark, in its region's outer area."""
+    guard_cells_by_region = state.plan.guard_cells_by_region
+    pools: Dict[int, List[int]] = {}
+    entity_by_key = state.assets.entity_by_key
+    streams = _RegionStreams(state, "guards")
+    for i, overlay in list(state.overlays.records.items()):
         if overlay.get("kind") != "landmark":
             continue
         count = int(overlay.get("count", 1))
@@ -1114,49 +2152,34 @@ def _spawn_guard_matches_for_stacked_landmarks(
         else:
             continue
 
-        source_cell = next((c for c in cells if (int(c["row"]), int(c["col"])) == key), None)
-        if not source_cell:
-            continue
-        region = str(source_cell.get("region") or "").strip().lower()
-        region_cells = [
-            c for c in cells
-            if str(c.get("region") or "").strip().lower() == region
-            and str(c.get("role") or "").strip().lower() == "outer_area"
-            and c.get("allow_entities")
-        ]
+        # One pool per region, shared by its landmarks: placing a guard only makes
+        # slots less placeable, so slots a landmark rejected stay rejected for the next.
+        region_id = state.grid.regions[i]
+        pool = pools.get(region_id)
+        if pool is None:
+            pool = pools[region_id] = list(guard_cells_by_region.get(region_id, ()))
         extra_needed = count - 1
+        state.rng = streams[i]
         for _ in range(extra_needed):
-            _place_first_matching(overlay_by_key, region_cells, guard_asset, "entity", rng)
-
-
-def _generate_outer_area_content(
-    cells: List[Dict[str, Any]],
-    cell_lookup: Dict[tuple[int, int], Dict[str, Any]],
-    overlay_by_key: Dict[tuple[int, int], Dict[str, Any]],
-    landmarks: List[Dict[str, Any]],
-    entities: List[Dict[str, Any]],
-    textures: List[Dict[str, Any]],
-    rng: random.Random,
-) -> None:
-    landmark_by_key = {a["name_key"]: a for a in landmarks}
-    entity_by_key = {a["name_key"]: a for a in entities}
-    zone_assets = _zone_assets(landmarks)
-    spawn_cells = [c for c in cells if c.get("active") and c.get("spawn")]
+            _place_from_pool(state, pool, guard_asset, "entity")
+
+
+def _generate_outer_area_content(state: _MapGenState) -> None:
+    """Spawn trios, then each outer region's content, each from its own region stream."""
+    plan = state.plan
+    profile = state.profile
+    landmark_by_key = state.assets.landmark_by_key
+    entity_by_key = state.assets.entity_by_key
+    zone_assets = state.assets.zone_landmarks
 
     forced_chest = landmark_by_key.get("chest")
     forced_gold = landmark_by_key.get("gold")
     forced_weakling = entity_by_key.get("weakling")
 
     # For each spawn, force a Chest, Gold, and Weakling nearby on distinct adjacent hexes.
-    for spawn_cell in spawn_cells:
-        adjacent_outer = []
-        for nkey in _neighbor_keys(int(spawn_cell["row"]), int(spawn_cell["col"])):
-            neighbor = cell_lookup.get(nkey)
-            if not neighbor:
-                continue
-            if not neighbor.get("active") or str(neighbor.get("role") or "").strip().lower() != "outer_area":
-                continue
-            adjacent_outer.append(neighbor)
+    trio_streams = _RegionStreams(state, "spawn_trio")
+    for spawn, adjacent_outer in zip(plan.spawn_cells, plan.spawn_adjacent_outer):
+        rng = state.rng = trio_streams[spawn]
         trio_assets = [
             ("landmark", forced_chest),
             ("landmark", forced_gold),
@@ -1169,10 +2192,10 @@ def _generate_outer_area_content(
             while trio_idx < len(trio_cells):
                 candidate = trio_cells[trio_idx]
                 trio_idx += 1
-                if _texture_variant_name(candidate) == "forest":
-                    _convert_cell_to_biome_variant(candidate, textures, rng, "simple")
+                if state.variant(candidate) == "forest":
+                    _convert_cell_to_biome_variant(state, candidate, "simple")
                 if _place_overlay(
-                    overlay_by_key,
+                    state,
                     candidate,
                     kind,
                     asset,
@@ -1185,60 +2208,48 @@ def _generate_outer_area_content(
             if not placed:
                 break
 
-    outer_regions: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
-    for cell in cells:
-        if not cell.get("active") or str(cell.get("role") or "").strip().lower() != "outer_area":
-            continue
-        region = str(cell.get("region") or "").strip()
-        if not region or region.lower() in {"none", "water"}:
-            continue
-        outer_regions[region].append(cell)
-
-    for region, region_cells in outer_regions.items():
-        region_landmark_cells = [c for c in region_cells if c.get("allow_landmarks")]
-        region_entity_cells = [c for c in region_cells if c.get("allow_entities")]
-        if not region_landmark_cells and not region_entity_cells:
-            continue
-
-        unknown_target = max(1, len(region_landmark_cells) // OUTER_UNKNOWNSITE_DENSITY)
-        weakling_target = max(1, len(region_entity_cells) // OUTER_WEAKLING_DENSITY) if region_entity_cells else 0
-        chest_pair_target = max(0, len(region_landmark_cells) // OUTER_CHEST_PAIR_DENSITY)
-        if len(region_landmark_cells) >= OUTER_LEGENDARY_MIN_HEXES:
+    legendary_ok = plan.legendary_ok
+    for region, region_landmark_cells, region_entity_cells, region_zone_cells, region_companion_cells in plan.outer_regions:
+        rng = state.stream("outer_content", region)
+        # Live candidate pools: every placement below uses the default rules
+        # (adjacency rule on, no forest), and within this loop slots only ever
+        # become less placeable, so rejected slots can be dropped for good.
+        landmark_pool = list(region_landmark_cells)
+        entity_pool = list(region_entity_cells)
+
+        unknown_target = max(1, len(region_landmark_cells) // profile.outer_unknownsite_density)
+        weakling_target = max(1, len(region_entity_cells) // profile.outer_weakling_density) if region_entity_cells else 0
+        chest_pair_target = max(0, len(region_landmark_cells) // profile.outer_chest_pair_density)
+        if len(region_landmark_cells) >= profile.outer_legendary_min_hexes:
             chest_pair_target = max(1, chest_pair_target)
         unknown_target = max(unknown_target, weakling_target + chest_pair_target + 1)
 
         # Unknown Sites should be the most abundant.
         unknown_asset = landmark_by_key.get("unknownsite")
         for _ in range(unknown_target):
-            _place_first_matching(overlay_by_key, region_landmark_cells, unknown_asset, "landmark", rng)
+            _place_from_pool(state, landmark_pool, unknown_asset, "landmark")
 
         # One Questgiver if the region is large enough.
-        if len(region_entity_cells) >= OUTER_QUESTGIVER_MIN_HEXES:
-            _place_first_matching(overlay_by_key, region_entity_cells, entity_by_key.get("questgiver"), "entity", rng)
+        if len(region_entity_cells) >= profile.outer_questgiver_min_hexes:
+            _place_from_pool(state, entity_pool, entity_by_key.get("questgiver"), "entity")
 
         # Any zone can appear on zone-marked cells in the region if a slot remains.
-        zone_cells = [
-            c for c in region_landmark_cells
-            if "zone" in str(c.get("special") or "").strip().lower()
-        ]
+        zone_cells = list(region_zone_cells)
         if zone_assets and zone_cells:
             zone_asset = rng.choice(zone_assets)
-            _place_first_matching(overlay_by_key, zone_cells, zone_asset, "landmark", rng)
+            _place_from_pool(state, zone_cells, zone_asset, "landmark")
 
         # One companion max, on a random valid outer hex at least 2 away from spawn.
-        if len(region_entity_cells) >= OUTER_COMPANION_MIN_HEXES:
-            companion_cells = [
-                c for c in region_entity_cells
-                if (_min_distance_to_spawn(c, spawn_cells) or 999) >= OUTER_COMPANION_SPAWN_DISTANCE
-            ]
-            _place_first_matching(overlay_by_key, companion_cells, entity_by_key.get("companion"), "entity", rng)
+        if len(region_entity_cells) >= profile.outer_companion_min_hexes:
+            companion_cells = list(region_companion_cells)
+            _place_from_pool(state, companion_cells, entity_by_key.get("companion"), "entity")
 
         # Gold and Weaklings should match.
         gold_asset = landmark_by_key.get("gold")
         weakling_asset = entity_by_key.get("weakling")
         for _ in range(weakling_target):
-            _place_first_matching(overlay_by_key, region_landmark_cells, gold_asset, "landmark", rng)
-            _place_first_matching(overlay_by_key, region_entity_cells, weakling_asset, "entity", rng)
+            _place_from_pool(state, landmark_pool, gold_asset, "landmark")
+            _place_from_pool(state, entity_pool, weakling_asset, "entity")
 
         # Chest/TreasureChest/LegendaryChest should match Elite count conceptually.
         chest_assets = [a for a in (landmark_by_key.get("chest"), landmark_by_key.get("treasurechest")) if a]
@@ -1246,17 +2257,14 @@ def _generate_outer_area_content(
         elite_asset = entity_by_key.get("elite")
         legendary_used = False
         for idx in range(chest_pair_target):
-            chest_cell_pool = list(region_landmark_cells)
+            chest_cell_pool = landmark_pool
             chosen_asset: Dict[str, Any] | None = None
             if (
                 not legendary_used
                 and legendary_asset
-                and len(region_landmark_cells) >= OUTER_LEGENDARY_MIN_HEXES
+                and len(region_landmark_cells) >= profile.outer_legendary_min_hexes
             ):
-                legendary_candidates = [
-                    c for c in region_landmark_cells
-                    if (_min_distance_to_spawn(c, spawn_cells) or 999) >= OUTER_LEGENDARY_SPAWN_DISTANCE
-                ]
+                legendary_candidates = [i for i in landmark_pool if legendary_ok[i]]
                 if legendary_candidates:
                     chosen_asset = legendary_asset
                     chest_cell_pool = legendary_candidates
@@ -1266,242 +2274,656 @@ def _generate_outer_area_content(
                     break
                 chosen_asset = rng.choice(chest_assets)
 
-            guarded = rng.random() < 0.5
-            placed_cell = _place_first_matching(
-                overlay_by_key,
+            guarded = rng.random() < profile.outer_chest_guarded_chance
+            placed_cell = _place_from_pool(
+                state,
                 chest_cell_pool,
                 chosen_asset,
                 "landmark",
-                rng,
                 guarded=guarded,
             )
-            if not placed_cell:
+            if placed_cell is None:
                 continue
             if chosen_asset and str(chosen_asset.get("name_key") or "").strip().lower() == "legendarychest":
-                _convert_adjacent_hexes_to_forest(placed_cell, cells, cell_lookup, textures, rng, 3)
+                _convert_adjacent_hexes_to_forest(state, placed_cell, 3)
             if not guarded:
-                _place_first_matching(overlay_by_key, region_entity_cells, elite_asset, "entity", rng)
-
-
-def _build_preview_map(payload: Dict[str, Any], seed: int) -> Dict[str, Any]:
-    rng = random.Random(seed)
-    textures = _load_texture_assets()
-    landmarks = _load_landmark_assets()
-    entities = _load_entity_assets()
-    addons = _load_addon_assets()
-    empty_hex_texture = _find_empty_hex_texture(textures)
-
-    texture_biomes = sorted(
-        {
-            a["biome"]
-            for a in textures
-            if a["biome"].lower() != "neutral" and a["biome"].strip().lower() not in DISABLED_BIOMES
+                _place_from_pool(state, entity_pool, elite_asset, "entity")
+
+
+class _CountingRandom(random.Random):
+    """random.Random that counts its draws into trace.draws; overriding both primitives keeps the sequence unchanged."""
+
+    def __init__(self, seed: Any, trace: "_MapTrace"):
+        self.trace = trace
+        super().__init__(seed)
+
+    def random(self) -> float:
+        self.trace.draws += 1
+        return super().random()
+
+    def getrandbits(self, k: int) -> int:
+        self.trace.draws += 1
+        return super().getrandbits(k)
+
+
+class _MapTrace:
+    """Per-phase profile of generation runs: wall time, cells touched, RNG draws, overlays.
+
+    Pass one to _generate_map or the preview builders. Each lap(phase) closes the
+    phase that started at the previous lap. "cells" counts slots whose texture or
+    overlay changed during the phase; numbers add up across runs, and as_dict()
+    reports per-run means. With detail=False only wall time is kept (no snapshots,
+    plain RNG), which is what timing runs should use.
+    """
+
+    def __init__(self, detail: bool = True):
+        self.detail = detail
+        self.runs = 0
+        self.draws = 0
+        self.phases: Dict[str, Dict[str, float]] = {}
+        self._state: _MapGenState | None = None
+        self._tex: array | None = None
+        self._records: Dict[int, tuple] = {}
+        self._draws = 0
+        self._last = time.perf_counter()
+
+    def start(self) -> None:
+        self.runs += 1
+        self._state = None
+        self._last = time.perf_counter()
+
+    def rng(self, seed: Any) -> random.Random:
+        return _CountingRandom(seed, self) if self.detail else random.Random(seed)
+
+    def attach(self, state: _MapGenState) -> None:
+        if self.detail:
+            self._state = state
+            self._snapshot()
+
+    def _snapshot(self) -> None:
+        state = self._state
+        self._tex = array("h", state.tex)
+        self._records = {i: (record, dict(record)) for i, record in state.overlays.records.items()}
+        self._draws = self.draws
+
+    def lap(self, phase: str) -> None:
+        elapsed = time.perf_counter() - self._last
+        entry = self.phases.get(phase)
+        if entry is None:
+            entry = self.phases[phase] = {
+                "ms": 0.0, "cells": 0, "rng_draws": 0, "overlays_placed": 0, "overlays_removed": 0,
+            }
+        entry["ms"] += elapsed * 1000
+        state = self._state
+        if state is not None:
+            touched = {i for i, (new, old) in enumerate(zip(state.tex, self._tex)) if new != old}
+            records = state.overlays.records
+            for i, record in records.items():
+                old = self._records.get(i)
+                if old is None or old[0] is not record:
+                    entry["overlays_placed"] += 1
+                    touched.add(i)
+                elif old[1] != record:
+                    touched.add(i)
+            for i in self._records:
+                if i not in records:
+                    entry["overlays_removed"] += 1
+                    touched.add(i)
+            entry["cells"] += len(touched)
+            entry["rng_draws"] += self.draws - self._draws
+            self._snapshot()
+        self._last = time.perf_counter()
+
+    def as_dict(self) -> Dict[str, Any]:
+        runs = max(1, self.runs)
+        phases = []
+        for phase, entry in self.phases.items():
+            row: Dict[str, Any] = {"phase": phase, "ms": round(entry["ms"] / runs, 3)}
+            if self.detail:
+                for key in ("cells", "rng_draws", "overlays_placed", "overlays_removed"):
+                    row[key] = entry[key] if runs == 1 else round(entry[key] / runs, 2)
+            phases.append(row)
+        return {
+            "runs": self.runs,
+            "total_ms": round(sum(entry["ms"] for entry in self.phases.values()) / runs, 3),
+            "phases": phases,
         }
-    )
-    cells = [dict(c) for c in payload.get("cells", [])]
-    cell_lookup = {(c["row"], c["col"]): c for c in cells}
-    region_biomes: Dict[str, str] = {}
-    by_region_roles: Dict[str, str] = {}
-    for cell in cells:
-        if not cell.get("active") or not cell.get("allow_biomes"):
-            continue
-        if str(cell.get("role") or "").strip().lower() == "center_core":
-            continue
-        region = str(cell.get("region") or "").strip()
-        if not region:
-            continue
-        by_region_roles.setdefault(region, cell.get("role") or "outer_area")
-    for region, role in by_region_roles.items():
-        chosen = _pick_role_biome(role, texture_biomes, rng)
-        if chosen:
-            region_biomes[region] = chosen
-    biome_variant_plan = _build_biome_variant_plan(cells, region_biomes, textures, rng)
-    center_core_plan = _build_center_core_plan(cells, textures, rng)
-    texture_overrides = _build_texture_overrides(cells, cell_lookup, textures, rng)
-    for cell in cells:
-        cell["_resolved_biome"] = region_biomes.get(cell.get("region") or "")
-        cell["_texture_override"] = texture_overrides.get((cell["row"], cell["col"]))
-        cell["_final_texture"] = (
-            cell["_texture_override"]
-            or center_core_plan.get((cell["row"], cell["col"]))
-            or biome_variant_plan.get((cell["row"], cell["col"]))
-        )
-    _enforce_lava_water_separation(cells, cell_lookup, textures)
 
-    overlay_by_key: Dict[tuple[int, int], Dict[str, Any]] = {}
-    portal_assets = _portal_assets_by_color(landmarks)
-    shipwreck_assets = [a for a in landmarks if a["name_key"] == "shipwreck"]
 
-    spawn_cells = [c for c in cells if c.get("active") and c.get("spawn")]
-    available_spawn_heroes = _unique_spawn_hero_assets(entities, rng)
-    for cell in spawn_cells:
+class _NullTrace:
+    """Stand-in when no trace is requested: plain RNG, no-op laps."""
+
+    def start(self) -> None:
+        pass
+
+    def rng(self, seed: Any) -> random.Random:
+        return random.Random(seed)
+
+    def attach(self, state: _MapGenState) -> None:
+        pass
+
+    def lap(self, phase: str) -> None:
+        pass
+
+
+_NO_TRACE = _NullTrace()
+
+# Lap names in the order _generate_map and the compact preview record them.
+MAPGEN_PHASES = (
+    "setup", "biome_plan", "overrides", "spawn_heroes", "special_entities", "outer_content", "zones",
+    "candidates", "portals", "shipwrecks", "landmarks", "entities", "cleanup", "fill_textures", "emission",
+)
+
+
+class _JobProgressTrace(_NullTrace):
+    """Reports each finished phase as job progress (jobs_ext.JobContext).
+
+    ctx.progress raises once the job is cancelled, which stops generation at the
+    next phase boundary.
+    """
+
+    def __init__(self, ctx):
+        self.ctx = ctx
+        self.done = 0
+
+    def lap(self, phase: str) -> None:
+        self.done += 1
+        self.ctx.progress(self.done, len(MAPGEN_PHASES), phase)
+
+
+def _generate_map(
+    payload: Dict[str, Any] | None,
+    seed: int,
+    assets: _MapAssets | None = None,
+    plan: _SkeletonPlan | None = None,
+    vectorized: bool | None = None,
+    trace: _MapTrace | None = None,
+    biome_balance: _BiomeBalance | None = None,
+    rerolls: Dict[str, int] | None = None,
+    base: _MapGenState | None = None,
+    profile: _GenerationProfile | None = None,
+) -> _MapGenState:
+    """Run every generation pass for one seed; the returned state has final textures and overlays.
+
+    vectorized picks the NumPy texture-override passes (default: MAPGEN_NUMPY).
+    trace, when given, records each pass (see _MapTrace). profile sets the
+    placement densities and chances (default: the module constants);
+    biome_balance adds constraints to the region biome draw (default: the
+    profile's). rerolls re-salts RNG streams (see
+    _parse_rerolls); an "overlays:<region>" re-roll changes that region alone
+    (see _merge_regional_overlays). base is an earlier run of the same plan, assets and seed
+    whose biome / texture layers are reused where their keys still match
+    (use _regenerate_map).
+    """
+    tracer = trace or _NO_TRACE
+    if vectorized is None:
+        vectorized = MAPGEN_NUMPY and np is not None
+    elif vectorized and np is None:
+        raise RuntimeError("vectorized map generation needs numpy")
+    tracer.start()
+    assets = assets or _map_assets()
+    plan = plan or _skeleton_plan_for(payload)
+    grid = plan.grid
+    profile = profile or _DEFAULT_PROFILE
+    if biome_balance is None:
+        biome_balance = profile.biome_balance
+    state = _MapGenState(plan, assets, seed, tracer.rng, rerolls)
+    state.vectorized = vectorized
+    state.biome_balance = biome_balance
+    state.profile = profile
+    layers = state.layers
+    reuse = base.layers if base is not None else None
+    tracer.attach(state)
+    tracer.lap("setup")
+
+    region_biomes = state.region_biomes
+    layers.biome_key = (
+        biome_balance.key() if biome_balance else None,
+        profile.key(),
+        state.layer_salts("biomes"),
+    )
+    if reuse is not None and reuse.biome_key == layers.biome_key:
+        region_biomes.update(reuse.region_biomes)
+        biome_variant_plan = reuse.biome_variant_plan
+        center_core_plan = reuse.center_core_plan
+    else:
+        if biome_balance is not None:
+            _assign_balanced_region_biomes(state, biome_balance)
+        else:
+            for region, role in plan.biome_region_roles.items():
+                chosen = _pick_role_biome(role, assets, state.stream("biomes", region), profile)
+                if chosen:
+                    region_biomes[region] = chosen
+        biome_variant_plan = _build_biome_variant_plan(state)
+        state.stream("center_core")
+        center_core_plan = _build_center_core_plan(state)
+    layers.region_biomes = dict(region_biomes)
+    layers.biome_variant_plan = biome_variant_plan
+    layers.center_core_plan = center_core_plan
+    tracer.lap("biome_plan")
+
+    layers.texture_key = layers.biome_key + (vectorized, state.layer_salts("textures"))
+    if reuse is not None and reuse.texture_key == layers.texture_key:
+        state.tex = array("h", reuse.tex)
+    else:
+        state.stream("overrides")
+        texture_overrides = _build_texture_overrides_np(state) if vectorized else _build_texture_overrides(state)
+        tex = state.tex
+        for i in range(grid.size):
+            tid = texture_overrides[i]
+            if tid < 0:
+                tid = center_core_plan[i]
+            if tid < 0:
+                tid = biome_variant_plan[i]
+            tex[i] = tid
+        if vectorized:
+            _enforce_lava_water_separation_np(state)
+        else:
+            _enforce_lava_water_separation(state)
+    layers.tex = array("h", state.tex)
+    layers.overlay_key = layers.texture_key + (state.layer_salts("overlays"),)
+    tracer.lap("overrides")
+
+    regional = {target: salt for target, salt in state.rerolls.items() if target.startswith("overlays:")}
+    if regional:
+        # Each re-rolled region takes its overlays from a run salted for it alone and
+        # every other slot from a run without regional salts, so a regional re-roll
+        # changes only its region and the map stays a function of seed + re-rolls.
+        all_rerolls = state.rerolls
+        state.rerolls = {target: salt for target, salt in all_rerolls.items() if target not in regional}
+    _place_overlay_layer(state, tracer)
+    if regional:
+        state.rerolls = all_rerolls
+        _merge_regional_overlays(state, regional)
+    tracer.lap("cleanup")
+    state.stream("fill_textures")
+    _fill_missing_textures(state, biome_variant_plan)
+    tracer.lap("fill_textures")
+    return state
+
+
+def _place_overlay_layer(state: _MapGenState, tracer: _MapTrace | _NullTrace = _NO_TRACE) -> None:
+    """Every overlay pass, from spawn heroes to stacked-landmark guards, on textures already laid.
+
+    Some passes also repaint textures around what they place (forests, simple variants).
+    """
+    plan = state.plan
+    grid = state.grid
+    cells = grid.cells
+    overlays = state.overlays
+    assets = state.assets
+    profile = state.profile
+    portal_assets = assets.portal_by_color
+    shipwreck_assets = assets.shipwreck_landmarks
+
+    rng = state.stream("spawn_heroes")
+    available_spawn_heroes = _unique_spawn_hero_assets(assets.hero_entities, rng)
+    for i in plan.spawn_cells:
         if not available_spawn_heroes:
             continue
         asset = available_spawn_heroes.pop(0)
-        _place_overlay(overlay_by_key, cell, "entity", asset)
-
-    special_entity_cells = [
-        c for c in cells
-        if c.get("active")
-        and (
-            (c.get("special") or "").lower().find("boss") >= 0
-            or (c.get("special") or "").lower().find("elite") >= 0
-            or (c.get("special") or "").lower().find("guardian") >= 0
-            or (c.get("special") or "").lower().find("weakling") >= 0
-            or (c.get("special") or "").lower().find("god") >= 0
-        )
-    ]
-    for cell in special_entity_cells:
-        asset = _pick_entity_asset(cell, entities, rng, special=str(cell.get("special") or ""))
-        _place_overlay(overlay_by_key, cell, "entity", asset, ignore_adjacent_rule=True)
+        _place_overlay(state, i, "entity", asset)
+    tracer.lap("spawn_heroes")
 
-    _generate_outer_area_content(cells, cell_lookup, overlay_by_key, landmarks, entities, textures, rng)
+    special_streams = _RegionStreams(state, "special_entities")
+    for i in plan.special_entity_cells:
+        asset = _pick_entity_asset(cells[i], assets, special_streams[i], special=str(cells[i].get("special") or ""))
+        _place_overlay(state, i, "entity", asset, ignore_adjacent_rule=True)
+    tracer.lap("special_entities")
 
-    zone_regions: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
-    for cell in cells:
-        if not cell.get("active") or not cell.get("allow_landmarks"):
-            continue
-        if str(cell.get("role") or "").strip().lower() == "outer_area":
-            continue
-        region = str(cell.get("region") or "").strip()
-        special = str(cell.get("special") or "").strip().lower()
-        if region and region.lower() not in {"none", "water"} and "zone" in special:
-            zone_regions[region].append(cell)
+    _generate_outer_area_content(state)
+    tracer.lap("outer_content")
 
-    for region, region_cells in zone_regions.items():
+    for region, region_cells in plan.zone_regions.items():
+        rng = state.stream("zones", region)
         shuffled_zone_cells = list(region_cells)
         rng.shuffle(shuffled_zone_cells)
         placed = 0
-        for cell in shuffled_zone_cells:
-            if placed >= ZONES_PER_REGION:
+        for i in shuffled_zone_cells:
+            if placed >= profile.zones_per_region:
                 break
-            ignore_adjacent_rule = bool(str(cell.get("special") or "").strip())
-            if not ignore_adjacent_rule and not _can_place_landmark(cell, overlay_by_key):
+            ignore_adjacent_rule = bool(plan.has_special[i])
+            if not ignore_adjacent_rule and not _can_place_landmark(state, i):
                 continue
-            zone_asset = _pick_zone_asset(cell, cell_lookup, landmarks, rng)
-            if _place_overlay(overlay_by_key, cell, "landmark", zone_asset, ignore_adjacent_rule=ignore_adjacent_rule):
+            zone_asset = _pick_zone_asset(state, i)
+            if _place_overlay(state, i, "landmark", zone_asset, ignore_adjacent_rule=ignore_adjacent_rule):
                 placed += 1
+    tracer.lap("zones")
 
-    outer_landmark_candidates = [c for c in cells if c.get("active") and c.get("allow_landmarks") and c.get("role") == "connector" and (c["row"], c["col"]) not in overlay_by_key]
-    core_landmark_candidates = [c for c in cells if c.get("active") and c.get("allow_landmarks") and c.get("role") in {"core_area", "center_ring", "center_core"} and (c["row"], c["col"]) not in overlay_by_key]
+    outer_landmark_candidates = [i for i in plan.outer_landmark_cells if i not in overlays]
+    core_landmark_candidates = [i for i in plan.core_landmark_cells if i not in overlays]
     outer_entity_candidates = [
-        c for c in cells
-        if c.get("active")
-        and c.get("allow_entities")
-        and c.get("role") == "connector"
-        and (c["row"], c["col"]) not in overlay_by_key
-        and not (
-            c.get("_final_texture")
-            and str(c["_final_texture"].get("variant") or "").strip().lower() in {"lava", "forest"}
-        )
+        i for i in plan.outer_entity_cells if i not in overlays and not _is_blocked_spawn_texture(state, i)
     ]
     core_entity_candidates = [
-        c for c in cells
-        if c.get("active")
-        and c.get("allow_entities")
-        and c.get("role") in {"core_area", "center_ring"}
-        and (c["row"], c["col"]) not in overlay_by_key
-        and not (
-            c.get("_final_texture")
-            and str(c["_final_texture"].get("variant") or "").strip().lower() in {"lava", "forest"}
-        )
+        i for i in plan.core_entity_cells if i not in overlays and not _is_blocked_spawn_texture(state, i)
     ]
-    water_landmark_candidates = [c for c in cells if c.get("active") and c.get("role") == "water" and (c["row"], c["col"]) not in overlay_by_key]
+    water_landmark_candidates = [i for i in plan.water_cells if i not in overlays]
 
-    outer_landmark_count = min(len(outer_landmark_candidates), max(0, int(round(len(outer_landmark_candidates) * 0.08))))
-    core_landmark_count = min(len(core_landmark_candidates), max(1 if core_landmark_candidates else 0, int(round(len(core_landmark_candidates) * 0.14))))
-    outer_entity_count = min(len(outer_entity_candidates), max(0, int(round(len(outer_entity_candidates) * 0.10))))
-    core_entity_count = min(len(core_entity_candidates), max(0, int(round(len(core_entity_candidates) * 0.16))))
+    outer_landmark_count = min(len(outer_landmark_candidates), max(0, int(round(len(outer_landmark_candidates) * profile.outer_landmark_ratio))))
+    core_landmark_count = min(len(core_landmark_candidates), max(1 if core_landmark_candidates else 0, int(round(len(core_landmark_candidates) * profile.core_landmark_ratio))))
+    outer_entity_count = min(len(outer_entity_candidates), max(0, int(round(len(outer_entity_candidates) * profile.outer_entity_ratio))))
+    core_entity_count = min(len(core_entity_candidates), max(0, int(round(len(core_entity_candidates) * profile.core_entity_ratio))))
+    tracer.lap("candidates")
 
     # Portals are only generated as a same-color pair.
-    if len(core_landmark_candidates) >= 2 and portal_assets and rng.random() < 0.45:
+    rng = state.stream("portals")
+    if len(core_landmark_candidates) >= 2 and portal_assets and rng.random() < profile.portal_pair_chance:
         portal_color = rng.choice(sorted(portal_assets.keys()))
         portal_asset = portal_assets[portal_color]
-        candidates_by_region: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
-        for cell in core_landmark_candidates:
-            region = str(cell.get("region") or "").strip().lower()
+        candidates_by_region: Dict[str, List[int]] = defaultdict(list)
+        for i in core_landmark_candidates:
+            region = grid.region_keys[grid.regions[i]]
             if not region or region in {"none", "water"}:
                 continue
-            candidates_by_region[region].append(cell)
+            candidates_by_region[region].append(i)
 
         eligible_regions = [region for region, items in candidates_by_region.items() if len(items) >= 2]
-        portal_cells: List[Dict[str, Any]] = []
+        portal_cells: List[int] = []
         if eligible_regions:
             portal_region = rng.choice(eligible_regions)
             shuffled_core = list(candidates_by_region[portal_region])
             rng.shuffle(shuffled_core)
-            for cell in shuffled_core:
-                if not _can_place_landmark(cell, overlay_by_key):
+            for i in shuffled_core:
+                if not _can_place_landmark(state, i):
                     continue
-                if any((cell["row"], cell["col"]) in _neighbor_keys(pc["row"], pc["col"]) for pc in portal_cells):
+                if any(i in grid.adjacent[pc] for pc in portal_cells):
                     continue
-                portal_cells.append(cell)
+                portal_cells.append(i)
                 if len(portal_cells) == 2:
                     break
-        for cell in portal_cells:
-            _place_overlay(overlay_by_key, cell, "landmark", portal_asset)
-        core_landmark_candidates = [c for c in core_landmark_candidates if (c["row"], c["col"]) not in overlay_by_key]
-        outer_landmark_candidates = [c for c in outer_landmark_candidates if (c["row"], c["col"]) not in overlay_by_key]
-
-    # Shipwrecks are allowed only on water.
-    # Base chance is 27% per eligible water hex.
+        for i in portal_cells:
+            _place_overlay(state, i, "landmark", portal_asset)
+        core_landmark_candidates = [i for i in core_landmark_candidates if i not in overlays]
+        outer_landmark_candidates = [i for i in outer_landmark_candidates if i not in overlays]
+    tracer.lap("portals")
+
+    # Shipwrecks are allowed only on water, profile.shipwreck_chance per eligible water hex.
+    rng = state.stream("shipwrecks")
     if shipwreck_assets and water_landmark_candidates:
         water_cells = list(water_landmark_candidates)
         rng.shuffle(water_cells)
-        for cell in water_cells:
-            if not _can_place_landmark(cell, overlay_by_key):
-                continue
-            if rng.random() < 0.27:
-                shipwreck_asset = rng.choice(shipwreck_assets)
-                _place_overlay(overlay_by_key, cell, "landmark", shipwreck_asset)
-
-    shuffled_outer_landmarks = list(outer_landmark_candidates)
-    rng.shuffle(shuffled_outer_landmarks)
+        for i in water_cells:
+            # Both draws happen for every hex, so one hex turning (in)eligible
+            # does not shift the rolls of the hexes after it.
+            roll = rng.random()
+            shipwreck_asset = rng.choice(shipwreck_assets)
+            if roll < profile.shipwreck_chance and _can_place_landmark(state, i):
+                _place_overlay(state, i, "landmark", shipwreck_asset)
+    tracer.lap("shipwrecks")
+
+    # Board-wide quotas, but every slot's place in the order and its asset
+    # come from its own region's stream.
+    landmark_streams = _RegionStreams(state, "landmarks")
     placed_outer_landmarks = 0
-    for cell in shuffled_outer_landmarks:
+    for i in landmark_streams.shuffled(outer_landmark_candidates):
         if placed_outer_landmarks >= outer_landmark_count:
             break
-        if not _can_place_landmark(cell, overlay_by_key):
+        if not _can_place_landmark(state, i):
             continue
-        asset = _pick_landmark_asset(cell, landmarks, rng)
-        if _place_overlay(overlay_by_key, cell, "landmark", asset):
+        state.rng = landmark_streams[i]
+        asset = _pick_landmark_asset(state, i)
+        if _place_overlay(state, i, "landmark", asset):
             placed_outer_landmarks += 1
 
-    shuffled_core_landmarks = list(core_landmark_candidates)
-    rng.shuffle(shuffled_core_landmarks)
     placed_core_landmarks = 0
-    for cell in shuffled_core_landmarks:
+    for i in landmark_streams.shuffled(core_landmark_candidates):
         if placed_core_landmarks >= core_landmark_count:
             break
-        if not _can_place_landmark(cell, overlay_by_key):
+        if not _can_place_landmark(state, i):
             continue
-        asset = _pick_landmark_asset(cell, landmarks, rng)
-        if _place_overlay(overlay_by_key, cell, "landmark", asset):
+        state.rng = landmark_streams[i]
+        asset = _pick_landmark_asset(state, i)
+        if _place_overlay(state, i, "landmark", asset):
             placed_core_landmarks += 1
+    tracer.lap("landmarks")
 
-    outer_entity_candidates = [c for c in outer_entity_candidates if (c["row"], c["col"]) not in overlay_by_key]
-    core_entity_candidates = [c for c in core_entity_candidates if (c["row"], c["col"]) not in overlay_by_key]
+    outer_entity_candidates = [i for i in outer_entity_candidates if i not in overlays]
+    core_entity_candidates = [i for i in core_entity_candidates if i not in overlays]
     outer_entity_count = min(len(outer_entity_candidates), outer_entity_count)
     core_entity_count = min(len(core_entity_candidates), core_entity_count)
 
-    for cell in rng.sample(outer_entity_candidates, outer_entity_count) if outer_entity_count else []:
-        asset = _pick_entity_asset(cell, entities, rng)
-        _place_overlay(overlay_by_key, cell, "entity", asset)
-    for cell in rng.sample(core_entity_candidates, core_entity_count) if core_entity_count else []:
-        asset = _pick_entity_asset(cell, entities, rng)
-        _place_overlay(overlay_by_key, cell, "entity", asset)
+    entity_streams = _RegionStreams(state, "entities")
+    for i in entity_streams.shuffled(outer_entity_candidates)[:outer_entity_count]:
+        asset = _pick_entity_asset(cells[i], assets, entity_streams[i])
+        _place_overlay(state, i, "entity", asset)
+    for i in entity_streams.shuffled(core_entity_candidates)[:core_entity_count]:
+        asset = _pick_entity_asset(cells[i], assets, entity_streams[i])
+        _place_overlay(state, i, "entity", asset)
+    tracer.lap("entities")
+
+    _remove_overlays_on_blocked_tiles(state)
+    _maybe_stack_non_zone_landmarks(state)
+    _spawn_guard_matches_for_stacked_landmarks(state)
+
+
+def _merge_regional_overlays(state: _MapGenState, regional: Dict[str, int]) -> None:
+    """Replace the overlays (and overlay-pass textures) of each region in regional by a run salted for it alone.
+
+    state holds a run without regional salts. Regions go in sorted order; a
+    region's overlay that would sit next to one kept outside the region is
+    dropped, unless its slot ignores the adjacency rule (specials).
+    """
+    grid = state.grid
+    plan = state.plan
+    overlays = state.overlays
+    background = {target: salt for target, salt in state.rerolls.items() if target not in regional}
+    region_slots: Dict[str, List[int]] = {}
+    for target in sorted(regional):
+        region = target.partition(":")[2]
+        keys = {k for k, key in enumerate(grid.region_keys) if key.strip().lower() == region}
+        region_slots[target] = [i for i in range(grid.size) if grid.regions[i] in keys]
+        for i in region_slots[target]:
+            overlays.remove(i)
+    for target, slots in region_slots.items():
+        run = _MapGenState(plan, state.assets, state.seed, rerolls={**background, target: regional[target]})
+        run.tex = array("h", state.layers.tex)
+        run.region_biomes = state.region_biomes
+        run.vectorized = state.vectorized
+        run.biome_balance = state.biome_balance
+        run.profile = state.profile
+        _place_overlay_layer(run)
+        inside = set(slots)
+        for i in slots:
+            state.tex[i] = run.tex[i]
+            record = run.overlays.records.get(i)
+            if record is None:
+                continue
+            if not plan.has_special[i] and any(
+                overlays.occupied[j] for j in grid.adjacent[i] if j not in inside
+            ):
+                continue
+            overlays.add(i, record)
+
+
+def _parse_rerolls(raw: Iterable[str], plan: _SkeletonPlan | None = None) -> Dict[str, int]:
+    """Re-roll targets from "layer", "layer:region", either with an optional "@salt" (ValueError on bad input).
+
+    Layers are REROLL_LAYERS; "biomes" and "overlays" can be narrowed to one
+    region of plan. A target without a salt gets 1; "overlays:outer_3@2" is a
+    different roll than "@1". Items may also be comma separated; a target may
+    appear once.
+    """
+    regions = set(plan.grid.region_keys) if plan is not None else None
+    rerolls: Dict[str, int] = {}
+    for item in raw:
+        for part in str(item or "").split(","):
+            text = part.strip().lower()
+            if not text:
+                continue
+            target, _, salt_raw = text.partition("@")
+            try:
+                salt = int(salt_raw) if salt_raw else 1
+            except ValueError:
+                raise ValueError(f"bad re-roll salt in {part.strip()!r}")
+            layer, sep, region = target.partition(":")
+            if layer not in REROLL_LAYERS:
+                raise ValueError(f"unknown re-roll layer {layer!r} (expected one of {', '.join(REROLL_LAYERS)})")
+            if sep and not region:
+                raise ValueError(f"missing region in {part.strip()!r}")
+            if target in rerolls:
+                raise ValueError(f"duplicate re-roll target {target!r}")
+            if region:
+                if layer not in REROLL_REGION_LAYERS:
+                    raise ValueError(f"{layer} cannot be re-rolled per region")
+                if regions is not None and region not in regions:
+                    raise ValueError(f"unknown region {region!r}")
+            rerolls[target] = salt
+    return {target: salt for target, salt in sorted(rerolls.items()) if salt}
+
+
+def _reroll_args(rerolls: Dict[str, int]) -> List[str]:
+    """rerolls as ?reroll= values (what _parse_rerolls reads back)."""
+    return [f"{target}@{salt}" for target, salt in sorted(rerolls.items())]
+
+
+def _regenerate_map(base: _MapGenState, rerolls: Dict[str, int], trace: _MapTrace | None = None) -> _MapGenState:
+    """base re-run with rerolls, rebuilding only the layers they touch.
+
+    rerolls replaces base.rerolls (salts are absolute: keep base.rerolls and add
+    a target to re-roll one more thing). Biome and texture layers whose streams
+    are unchanged come from base; overlays and the final texture fill are always
+    placed again on top of them. base is returned as is when nothing changes.
+    """
+    if dict(rerolls) == base.rerolls:
+        return base
+    return _generate_map(
+        None,
+        base.seed,
+        base.assets,
+        base.plan,
+        vectorized=base.vectorized,
+        trace=trace,
+        biome_balance=base.biome_balance,
+        rerolls=rerolls,
+        base=base,
+        profile=base.profile,
+    )
+
 
-    _remove_overlays_on_blocked_tiles(cells, overlay_by_key)
-    _maybe_stack_non_zone_landmarks(overlay_by_key, rng)
-    _spawn_guard_matches_for_stacked_landmarks(cells, overlay_by_key, entities, rng)
+_MAP_STATES: "OrderedDict[tuple, _MapGenState]" = OrderedDict()
+_MAP_STATES_LOCK = _real_threading.Lock()
+
+
+def _generate_map_reusing(
+    payload: Dict[str, Any],
+    seed: int,
+    assets: _MapAssets,
+    rerolls: Dict[str, int] | None = None,
+    profile: _GenerationProfile | None = None,
+    plan: _SkeletonPlan | None = None,
+) -> _MapGenState:
+    """_generate_map, regenerating from the last map of this skeleton + seed when one is kept.
+
+    The newest state per skeleton, seed, asset version, texture mode and profile stays in
+    _MAP_STATES (MAP_STATE_CACHE_SIZE of them), so stepping through re-rolls of
+    one seed only rebuilds what each re-roll touches. Kept states are shared:
+    read them, never mutate them.
+    """
+    key = _preview_cache_key(payload, seed, assets, profile=profile, plan=plan)[:-1]
+    with _MAP_STATES_LOCK:
+        base = _MAP_STATES.get(key)
+    if base is not None:
+        state = _regenerate_map(base, rerolls or {})
+    else:
+        state = _generate_map(payload, seed, assets, plan, rerolls=rerolls, profile=profile)
+    with _MAP_STATES_LOCK:
+        _MAP_STATES[key] = state
+        _MAP_STATES.move_to_end(key)
+        while len(_MAP_STATES) > MAP_STATE_CACHE_SIZE:
+            _MAP_STATES.popitem(last=False)
+    return state
+
+
+def _fill_missing_textures(state: _MapGenState, biome_variant_plan: array) -> None:
+    """Last-resort texture picks for cells no pass covered, in board (row-major) order."""
+    grid = state.grid
+    tex = state.tex
+    has_empty_hex = bool(state.assets.empty_hex_texture)
+    for row in range(grid.height):
+        for col in range(grid.width):
+            i = grid.index.get((row, col))
+            if i is None or tex[i] >= 0:
+                continue
+            if has_empty_hex and str(grid.cells[i].get("role") or "empty").strip().lower() == "empty":
+                continue
+            tex[i] = _pick_texture_for_cell(state, i, biome_variant_plan)
+
+
+def _emitted_texture(state: _MapGenState, i: int | None) -> Dict[str, Any] | None:
+    """Texture shown for slot i (None for hexes missing from the payload, drawn as empty)."""
+    if i is None:
+        return state.assets.empty_hex_texture
+    tid = state.tex[i]
+    texture = state.assets.textures[tid] if tid >= 0 else None
+    if str(state.grid.cells[i].get("role") or "empty").strip().lower() == "empty":
+        texture = texture or state.assets.empty_hex_texture
+    return texture
+
+
+def _preview_summary(state: _MapGenState) -> Dict[str, int]:
+    """Per-biome texture counts and per-label overlay counts, sorted by key."""
+    grid = state.grid
+    overlays = state.overlays
+    summary: Dict[str, int] = defaultdict(int)
+    for row in range(grid.height):
+        for col in range(grid.width):
+            i = grid.index.get((row, col))
+            texture = _emitted_texture(state, i)
+            if texture:
+                summary[f"texture:{texture['biome']}"] += 1
+            overlay = overlays.get(i) if i is not None else None
+            if overlay:
+                summary[f"{overlay['kind']}:{overlay['asset']['label']}"] += int(overlay.get("count", 1))
+    return dict(sorted(summary.items()))
 
+
+# Characters url_for leaves unescaped in a path.
+_URL_PATH_SAFE = "/!$&'()*+,;=:@"
+
+
+def _flask_asset_url(path: str) -> str:
+    """Default asset URL resolver: the app's static route (needs an app / request context)."""
+    return url_for("static", filename=path)
+
+
+def _static_asset_url(base: str = "/static"):
+    """Asset URL resolver that needs no Flask app: base + "/" + path under static/.
+
+    The default base matches Flask's static route, so offline output links the
+    same files a served preview does.
+    """
+    base = str(base or "").rstrip("/")
+    return lambda path: f"{base}/{quote(path, safe=_URL_PATH_SAFE)}"
+
+
+def _build_preview_map(
+    payload: Dict[str, Any],
+    seed: int,
+    assets: _MapAssets | None = None,
+    trace: _MapTrace | None = None,
+    asset_url=None,
+    profile: _GenerationProfile | None = None,
+) -> Dict[str, Any]:
+    """Full preview: every cell carries its asset dicts and static URLs.
+
+    asset_url maps a path under static/ to a URL (default: url_for("static"));
+    pass _static_asset_url() to build previews outside Flask.
+    """
+    assets = assets or _map_assets()
+    asset_url = asset_url or _flask_asset_url
+    state = _generate_map(payload, seed, assets, trace=trace, profile=profile)
+    grid = state.grid
+    cells = grid.cells
+    overlays = state.overlays
+    region_biomes = state.region_biomes
+    addons = assets.addons
     rows: List[List[Dict[str, Any]]] = []
-    summary = defaultdict(int)
-    for row in range(int(payload.get("height", 0))):
+    for row in range(grid.height):
         row_cells: List[Dict[str, Any]] = []
-        for col in range(int(payload.get("width", 0))):
-            cell = cell_lookup.get((row, col))
-            if cell is None:
+        for col in range(grid.width):
+            i = grid.index.get((row, col))
+            if i is None:
                 cell = {
                     "row": row,
                     "col": col,
@@ -1511,31 +2933,24 @@ def _build_preview_map(payload: Dict[str, Any], seed: int) -> Dict[str, Any]:
                     "spawn": False,
                     "special": None,
                 }
+                overlay = None
+            else:
+                cell = cells[i]
+                overlay = overlays.get(i)
             role_name = str(cell.get("role") or "empty").strip().lower()
-            emitted_active = bool(cell.get("active"))
-            texture = cell.get("_final_texture") or texture_overrides.get((row, col))
-            if role_name == "empty":
-                emitted_active = True
-                texture = texture or empty_hex_texture
-            if texture is None:
-                texture = _pick_texture_for_cell(cell, cell_lookup, region_biomes, textures, biome_variant_plan, rng)
-            overlay = overlay_by_key.get((row, col))
+            emitted_active = bool(cell.get("active")) or role_name == "empty"
+            texture = _emitted_texture(state, i)
             addon = None
             addon_url = None
             if overlay and "guarded" in addons and _overlay_supports_guarded(overlay):
                 addon = addons["guarded"]
-                addon_url = url_for("static", filename=f"mapgen/addons/{addon['file_name']}")
-
-            if texture:
-                summary[f"texture:{texture['biome']}"] += 1
-            if overlay:
-                summary[f"{overlay['kind']}:{overlay['asset']['label']}"] += int(overlay.get("count", 1))
+                addon_url = asset_url(f"mapgen/addons/{addon['file_name']}")
 
-            texture_url = url_for("static", filename=f"mapgen/textures/{texture['file_name']}") if texture else None
+            texture_url = asset_url(f"mapgen/textures/{texture['file_name']}") if texture else None
             overlay_url = None
             if overlay:
                 folder = "entities" if overlay["kind"] == "entity" else "landmarks"
-                overlay_url = url_for("static", filename=f"mapgen/{folder}/{overlay['asset']['file_name']}")
+                overlay_url = asset_url(f"mapgen/{folder}/{overlay['asset']['file_name']}")
 
             row_cells.append(
                 {
@@ -1559,20 +2974,666 @@ def _build_preview_map(payload: Dict[str, Any], seed: int) -> Dict[str, Any]:
             )
         rows.append(row_cells)
 
-    return {
+    summary = _preview_summary(state)
+    if trace is not None:
+        trace.lap("emission")
+    preview = {
         "seed": seed,
         "rows": rows,
         "region_biomes": region_biomes,
-        "summary": dict(sorted(summary.items())),
-        "asset_counts": {
-            "textures": len(textures),
-            "landmarks": len(landmarks),
-            "entities": len(entities),
-            "addons": len(addons),
-        },
+        "summary": summary,
+        "asset_counts": assets.counts,
+    }
+    if trace is not None:
+        preview["trace"] = trace.as_dict()
+    return preview
+
+
+PREVIEW_ASSET_FOLDERS = {"texture": "textures", "landmark": "landmarks", "entity": "entities", "addon": "addons"}
+
+
+class _CompactEmitter:
+    """Turns a generated state into compact preview rows, one board row at a time.
+
+    The asset table, region list and role colors grow as rows are emitted, so a
+    consumer that renders row by row can index them as soon as it has the row.
+    asset_url resolves table URLs (see _build_preview_map).
+    """
+
+    def __init__(self, state: _MapGenState, assets: _MapAssets, asset_url=None):
+        self.state = state
+        self.assets = assets
+        self.asset_url = asset_url or _flask_asset_url
+        self.table: List[Dict[str, Any]] = []
+        self.regions: List[List[Any]] = []
+        self.role_colors: Dict[str, str] = {}
+        self._table_ids: Dict[tuple[str, int], int] = {}
+        self._region_ids: Dict[str, int] = {}
+        self._guarded_addon = assets.addons.get("guarded")
+
+    def asset_id(self, kind: str, asset: Dict[str, Any] | None) -> int:
+        if not asset:
+            return -1
+        key = (kind, id(asset))
+        aid = self._table_ids.get(key)
+        if aid is None:
+            aid = len(self.table)
+            entry = dict(asset)
+            entry["kind"] = kind
+            entry["url"] = self.asset_url(f"mapgen/{PREVIEW_ASSET_FOLDERS[kind]}/{asset['file_name']}")
+            self.table.append(entry)
+            self._table_ids[key] = aid
+        return aid
+
+    def row(self, row: int) -> List[Dict[str, Any]]:
+        state = self.state
+        grid = state.grid
+        cells = grid.cells
+        overlays = state.overlays
+        region_biomes = state.region_biomes
+        regions = self.regions
+        region_ids = self._region_ids
+        role_colors = self.role_colors
+        guarded_addon = self._guarded_addon
+        asset_id = self.asset_id
+        row_cells: List[Dict[str, Any]] = []
+        for col in range(grid.width):
+            i = grid.index.get((row, col))
+            cell = cells[i] if i is not None else {"role": "empty"}
+            overlay = overlays.get(i) if i is not None else None
+            role = cell.get("role") or "empty"
+            region = cell.get("region") or ""
+            rid = region_ids.get(region)
+            if rid is None:
+                rid = len(regions)
+                region_ids[region] = rid
+                regions.append([region, region_biomes.get(region)])
+            if role not in role_colors:
+                role_colors[role] = ROLE_COLORS.get(role, ROLE_COLORS["empty"])
+            out = {
+                "active": bool(cell.get("active")) or str(role).strip().lower() == "empty",
+                "role": role,
+                "region": rid,
+                "spawn": bool(cell.get("spawn")),
+                "special": cell.get("special"),
+                "texture": asset_id("texture", _emitted_texture(state, i)),
+                "overlay": -1,
+                "count": 0,
+                "guarded": False,
+                "addon": -1,
+            }
+            if overlay:
+                out["overlay"] = asset_id(overlay["kind"], overlay["asset"])
+                out["count"] = int(overlay.get("count", 1))
+                out["guarded"] = bool(overlay.get("guarded"))
+                if guarded_addon and _overlay_supports_guarded(overlay):
+                    out["addon"] = asset_id("addon", guarded_addon)
+            row_cells.append(out)
+        return row_cells
+
+    def rows(self) -> Iterable[List[Dict[str, Any]]]:
+        for row in range(self.state.grid.height):
+            yield self.row(row)
+
+    def preview(self, seed: int, rows: List[List[Dict[str, Any]]], summary: Dict[str, int]) -> Dict[str, Any]:
+        grid = self.state.grid
+        preview = {
+            "format": "compact",
+            "seed": seed,
+            "width": grid.width,
+            "height": grid.height,
+            "assets": self.table,
+            "regions": self.regions,
+            "role_colors": self.role_colors,
+            "rows": rows,
+            "region_biomes": self.state.region_biomes,
+            "summary": summary,
+            "asset_counts": self.assets.counts,
+        }
+        if self.state.rerolls:
+            preview["rerolls"] = dict(self.state.rerolls)
+        if self.state.profile.key():
+            preview["profile"] = {"name": self.state.profile.name, "key": self.state.profile.key()}
+        return preview
+
+
+def _build_compact_preview(
+    payload: Dict[str, Any],
+    seed: int,
+    assets: _MapAssets | None = None,
+    trace: _MapTrace | None = None,
+    biome_balance: _BiomeBalance | None = None,
+    rerolls: Dict[str, int] | None = None,
+    asset_url=None,
+    profile: _GenerationProfile | None = None,
+    plan: _SkeletonPlan | None = None,
+) -> Dict[str, Any]:
+    """Preview with an asset table instead of per-cell asset dicts and URLs.
+
+    preview["assets"] lists every asset the board uses once: a copy of the asset
+    dict plus "kind" and its resolved static "url". Cells are small dicts whose
+    "texture", "overlay" and "addon" are indexes into that table (-1 for none)
+    and whose "region" indexes preview["regions"], a list of [region, biome]
+    pairs. role_colors covers every role on the board. Rows are in board order,
+    so a cell's row/col are its positions in preview["rows"]. URLs come from
+    asset_url (see _build_preview_map).
+    """
+    assets = assets or _map_assets()
+    state = _generate_map(
+        payload, seed, assets, plan, trace=trace, biome_balance=biome_balance, rerolls=rerolls, profile=profile
+    )
+    return _compact_preview(state, trace, asset_url)
+
+
+def _compact_preview(state: _MapGenState, trace: _MapTrace | None = None, asset_url=None) -> Dict[str, Any]:
+    """The _build_compact_preview dict of an already generated state."""
+    assets = state.assets
+    emitter = _CompactEmitter(state, assets, asset_url)
+    rows = list(emitter.rows())
+    summary = _preview_summary(state)
+    if trace is not None:
+        trace.lap("emission")
+    preview = emitter.preview(state.seed, rows, summary)
+    if isinstance(trace, _MapTrace):
+        preview["trace"] = trace.as_dict()
+    return preview
+
+
+class _StreamingCompactPreview:
+    """A compact preview that generates on first use and emits rows while they are iterated.
+
+    Templates read it like the _build_compact_preview dict (preview.seed,
+    preview.rows, ...); seed, size and asset counts are available before the map
+    is generated, so the page header can go out first. rows can be iterated
+    once. When the last row has been emitted the finished preview is stored in
+    _PREVIEW_CACHE under cache_key (if given).
+    """
+
+    format = "compact"
+    trace = None
+
+    def __init__(
+        self,
+        payload: Dict[str, Any],
+        seed: int,
+        assets: _MapAssets,
+        cache_key: tuple | None = None,
+        rerolls: Dict[str, int] | None = None,
+        profile: _GenerationProfile | None = None,
+        plan: _SkeletonPlan | None = None,
+    ):
+        self.seed = seed
+        self.rerolls = dict(rerolls or {})
+        self.profile = profile or _DEFAULT_PROFILE
+        self.width = int(payload.get("width", 0))
+        self.height = int(payload.get("height", 0))
+        self.asset_counts = assets.counts
+        self._payload = payload
+        self._assets = assets
+        self._plan = plan
+        self._cache_key = cache_key
+        self._emitter: _CompactEmitter | None = None
+        self._summary: Dict[str, int] | None = None
+
+    def _emit(self) -> _CompactEmitter:
+        if self._emitter is None:
+            state = _generate_map_reusing(
+                self._payload, self.seed, self._assets, self.rerolls, self.profile, self._plan
+            )
+            self._emitter = _CompactEmitter(state, self._assets)
+            self._summary = _preview_summary(state)
+        return self._emitter
+
+    @property
+    def region_biomes(self) -> Dict[str, str]:
+        return self._emit().state.region_biomes
+
+    @property
+    def summary(self) -> Dict[str, int]:
+        self._emit()
+        return self._summary
+
+    @property
+    def assets(self) -> List[Dict[str, Any]]:
+        return self._emit().table
+
+    @property
+    def regions(self) -> List[List[Any]]:
+        return self._emit().regions
+
+    @property
+    def role_colors(self) -> Dict[str, str]:
+        return self._emit().role_colors
+
+    @property
+    def rows(self) -> Iterable[List[Dict[str, Any]]]:
+        emitter = self._emit()
+        rows: List[List[Dict[str, Any]]] = []
+        for row in emitter.rows():
+            rows.append(row)
+            yield row
+        if self._cache_key is not None:
+            _PREVIEW_CACHE.put(self._cache_key, emitter.preview(self.seed, rows, self._summary))
+
+
+class _PreviewCache:
+    """Bounded LRU of compact previews, optionally written through to a directory.
+
+    A skeleton + seed + asset set always generates the same map, so entries are
+    keyed by skeleton name, content hash, seed, asset registry version, the
+    texture-override mode, the generation profile and any re-rolls. Editing the skeleton or the asset folders changes the
+    key, and stale entries just age out. Cached previews are shared between
+    requests and must be treated as read-only.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self.disk_dir: Path | None = None
+        self.hits = 0
+        self.misses = 0
+        self._lock = _real_threading.Lock()
+        self._items: "OrderedDict[tuple, Dict[str, Any]]" = OrderedDict()
+
+    def _disk_path(self, key: tuple) -> Path | None:
+        if self.disk_dir is None:
+            return None
+        digest = hashlib.sha1(repr(key).encode("utf-8")).hexdigest()
+        return self.disk_dir / f"{_safe_name(key[0])}_{key[2]}_{digest[:20]}.json"
+
+    def contains(self, key: tuple) -> bool:
+        """Whether get(key) would hit, without touching the LRU order or the hit counters."""
+        with self._lock:
+            if key in self._items:
+                return True
+        path = self._disk_path(key)
+        return path is not None and path.exists()
+
+    def get(self, key: tuple) -> Dict[str, Any] | None:
+        with self._lock:
+            preview = self._items.get(key)
+            if preview is not None:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return preview
+        path = self._disk_path(key)
+        if path is not None and path.exists():
+            try:
+                with path.open("r", encoding="utf-8") as f:
+                    preview = json.load(f)
+            except Exception:
+                preview = None
+            if preview is not None:
+                self._remember(key, preview)
+                with self._lock:
+                    self.hits += 1
+                return preview
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def _remember(self, key: tuple, preview: Dict[str, Any]) -> None:
+        with self._lock:
+            self._items[key] = preview
+            self._items.move_to_end(key)
+            while len(self._items) > self.size:
+                self._items.popitem(last=False)
+
+    def put(self, key: tuple, preview: Dict[str, Any]) -> None:
+        if self.size <= 0:
+            return
+        self._remember(key, preview)
+        path = self._disk_path(key)
+        if path is None:
+            return
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(".json.tmp")
+            with tmp.open("w", encoding="utf-8") as f:
+                json.dump(preview, f, separators=(",", ":"))
+            tmp.replace(path)
+            files = sorted(path.parent.glob("*.json"), key=lambda p: p.stat().st_mtime)
+            for old in files[: max(0, len(files) - PREVIEW_CACHE_DISK_MAX)]:
+                old.unlink(missing_ok=True)
+        except Exception as e:
+            print(f"[mapgen] preview cache write failed: {e}")
+
+
+_PREVIEW_CACHE = _PreviewCache(PREVIEW_CACHE_SIZE)
+
+
+def _preview_cache_key(
+    payload: Dict[str, Any],
+    seed: int,
+    assets: _MapAssets,
+    rerolls: Dict[str, int] | None = None,
+    profile: _GenerationProfile | None = None,
+    plan: _SkeletonPlan | None = None,
+) -> tuple:
+    """Cache key of one generated map; re-rolls come last, so key[:-1] identifies the base map.
+
+    A plan from _skeleton_plan_for(payload) supplies the content hash, which is
+    then not computed again.
+    """
+    return (
+        str(payload.get("name") or ""),
+        plan.content_hash if plan is not None and plan.content_hash else _skeleton_content_hash(payload),
+        int(seed),
+        assets.version,
+        "numpy" if MAPGEN_NUMPY and np is not None else "scalar",
+        (profile or _DEFAULT_PROFILE).key(),
+        tuple(sorted((rerolls or {}).items())),
+    )
+
+
+def _cached_compact_preview(
+    payload: Dict[str, Any],
+    seed: int,
+    stream: bool = False,
+    rerolls: Dict[str, int] | None = None,
+    profile: _GenerationProfile | None = None,
+    plan: _SkeletonPlan | None = None,
+):
+    """_build_compact_preview through _PREVIEW_CACHE; the result is shared, do not mutate it.
+
+    With stream=True a cache miss returns a _StreamingCompactPreview (which fills
+    the cache once its rows have been emitted) instead of generating up front.
+    Misses generate through _generate_map_reusing, so a re-roll of a recent
+    seed only rebuilds the layers it touches.
+    """
+    assets = _map_assets()
+    key = _preview_cache_key(payload, seed, assets, rerolls, profile, plan)
+    preview = _PREVIEW_CACHE.get(key) if _PREVIEW_CACHE.size > 0 else None
+    if preview is None:
+        if stream:
+            return _StreamingCompactPreview(
+                payload, seed, assets, key if _PREVIEW_CACHE.size > 0 else None, rerolls, profile, plan
+            )
+        preview = _compact_preview(_generate_map_reusing(payload, seed, assets, rerolls, profile, plan))
+        _PREVIEW_CACHE.put(key, preview)
+    return preview
+
+
+def _stream_template(template_name: str, chunk_bytes: int = PREVIEW_STREAM_CHUNK_BYTES, **context):
+    """Render a template as a stream of ~chunk_bytes pieces (inside the request context).
+
+    A `{{ stream_flush }}` in the template sends whatever is buffered right away,
+    e.g. before a part that has to wait for generation; it renders as nothing.
+    """
+    app = current_app._get_current_object()
+    context["stream_flush"] = _STREAM_FLUSH
+    app.update_template_context(context)
+    template = app.jinja_env.get_template(template_name)
+
+    def generate():
+        buffered: List[str] = []
+        size = 0
+        for piece in template.generate(context):
+            if piece == _STREAM_FLUSH:
+                if buffered:
+                    yield "".join(buffered)
+                    buffered, size = [], 0
+                continue
+            buffered.append(piece)
+            size += len(piece)
+            if size >= chunk_bytes:
+                yield "".join(buffered)
+                buffered, size = [], 0
+        if buffered:
+            yield "".join(buffered)
+
+    return app.response_class(stream_with_context(generate()), mimetype="text/html")
+
+
+def _distance_stats(values: List[int]) -> Dict[str, Any] | None:
+    if not values:
+        return None
+    return {
+        "count": len(values),
+        "min": min(values),
+        "mean": round(sum(values) / len(values), 2),
+        "max": max(values),
     }
 
 
+def _seed_summary(state: _MapGenState, seed: int) -> Dict[str, Any]:
+    """Compact, JSON-ready description of one generated seed (no cells, no URLs)."""
+    spawn_distance = state.plan.spawn_distance
+    portals = 0
+    shipwrecks = 0
+    chest_distances: List[int] = []
+    companion_distances: List[int] = []
+    for i, overlay in state.overlays.records.items():
+        name_key = str((overlay.get("asset") or {}).get("name_key") or "").strip().lower()
+        distance = _min_distance_to_spawn(spawn_distance, i)
+        if overlay.get("kind") == "landmark":
+            if name_key == "portal":
+                portals += 1
+            elif name_key == "shipwreck":
+                shipwrecks += 1
+            elif name_key in CHEST_LANDMARK_KEYS and distance is not None:
+                chest_distances.append(distance)
+        elif name_key == "companion" and distance is not None:
+            companion_distances.append(distance)
+
+    biome_regions: Dict[str, int] = defaultdict(int)
+    for biome in state.region_biomes.values():
+        biome_regions[biome] += 1
+    return {
+        "seed": seed,
+        "region_biomes": dict(state.region_biomes),
+        "biome_regions": dict(sorted(biome_regions.items())),
+        "counts": _preview_summary(state),
+        "portals": portals,
+        "shipwrecks": shipwrecks,
+        "chest_spawn_distance": _distance_stats(chest_distances),
+        "companion_spawn_distance": _distance_stats(companion_distances),
+    }
+
+
+def _summary_metric(summary: Dict[str, Any], path: str) -> float | None:
+    """Look up a dotted metric such as "counts.landmark:Gold" or "chest_spawn_distance.min"."""
+    head, _, rest = str(path or "").strip().partition(".")
+    value: Any = summary.get(head)
+    if rest:
+        if not isinstance(value, dict):
+            return None
+        # Absent counters mean "none of those", not "unknown".
+        value = value.get(rest, 0 if head in {"counts", "biome_regions"} else None)
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return None
+    return float(value)
+
+
+def _parse_explore_filter(raw: str) -> tuple[str, str, float]:
+    match = _EXPLORE_FILTER_RE.match(str(raw or ""))
+    if not match:
+        raise ValueError(f"Bad filter {raw!r}; expected e.g. 'portals>=2' or 'chest_spawn_distance.min>=3'")
+    return match.group(1), match.group(2), float(match.group(3))
+
+
+def _summary_matches(summary: Dict[str, Any], filters: List[tuple[str, str, float]]) -> bool:
+    for path, op, wanted in filters:
+        value = _summary_metric(summary, path)
+        if value is None:
+            return False
+        if op == ">=" and not value >= wanted:
+            return False
+        if op == "<=" and not value <= wanted:
+            return False
+        if op == ">" and not value > wanted:
+            return False
+        if op == "<" and not value < wanted:
+            return False
+        if op == "==" and not value == wanted:
+            return False
+        if op == "!=" and not value != wanted:
+            return False
+    return True
+
+
+def _sort_summaries(summaries: List[Dict[str, Any]], sort_keys: List[str]) -> None:
+    """Stable multi-key sort in place; "-metric" sorts descending, missing values go last."""
+    for raw in reversed(sort_keys):
+        key = str(raw or "").strip()
+        if not key:
+            continue
+        descending = key.startswith("-")
+        path = key.lstrip("+-")
+        present = [s for s in summaries if _summary_metric(s, path) is not None]
+        missing = [s for s in summaries if _summary_metric(s, path) is None]
+        present.sort(key=lambda s: _summary_metric(s, path), reverse=descending)
+        summaries[:] = present + missing
+
+
+_EXPLORE_JOB: Dict[str, Any] = {}
+
+
+def _explore_worker_init(payload: Dict[str, Any], content_hash: str) -> None:
+    _EXPLORE_JOB["payload"] = payload
+    _EXPLORE_JOB["content_hash"] = content_hash
+
+
+def _explore_chunk(
+    payload: Dict[str, Any], content_hash: str, seeds: List[int], profile: _GenerationProfile | None = None
+) -> List[Dict[str, Any]]:
+    # Plan and assets are cached per process, so each worker builds them once.
+    plan = _skeleton_plan_for(payload, content_hash)
+    assets = _map_assets()
+    return [_seed_summary(_generate_map(payload, seed, assets, plan, profile=profile), seed) for seed in seeds]
+
+
+def _explore_worker_chunk(seeds: List[int], profile: _GenerationProfile | None = None) -> List[Dict[str, Any]]:
+    return _explore_chunk(_EXPLORE_JOB["payload"], _EXPLORE_JOB["content_hash"], seeds, profile)
+
+
+def _explore_seeds(
+    payload: Dict[str, Any],
+    seeds: List[int],
+    *,
+    workers: int = 0,
+    filters: List[str] | None = None,
+    sort: List[str] | None = None,
+    limit: int | None = None,
+    progress=None,
+    profile: _GenerationProfile | None = None,
+) -> Dict[str, Any]:
+    """Generate many seeds of one skeleton and return filtered, sorted compact summaries.
+
+    workers <= 1 runs in this process; otherwise seeds are split into chunks over
+    a process pool whose workers each receive the skeleton once. profile goes
+    with every chunk rather than into the workers, so one pool can sweep several.
+    progress, if given, is called as progress(seeds_done, seeds_total) after
+    every chunk.
+    """
+    profile = profile or _DEFAULT_PROFILE
+    seeds = [int(seed) for seed in seeds][:EXPLORE_MAX_SEEDS]
+    parsed_filters = [_parse_explore_filter(raw) for raw in (filters or []) if str(raw or "").strip()]
+    content_hash = _skeleton_content_hash(payload)
+    started = time.perf_counter()
+    chunks = [seeds[k:k + EXPLORE_CHUNK_SIZE] for k in range(0, len(seeds), EXPLORE_CHUNK_SIZE)]
+    summaries: List[Dict[str, Any]] = []
+    if workers > 1 and len(chunks) > 1:
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(chunks)),
+            initializer=_explore_worker_init,
+            initargs=(payload, content_hash),
+        ) as pool:
+            for chunk_summaries in pool.map(_explore_worker_chunk, chunks, [profile] * len(chunks)):
+                summaries.extend(chunk_summaries)
+                if progress is not None:
+                    progress(len(summaries), len(seeds))
+    else:
+        for chunk in chunks:
+            summaries.extend(_explore_chunk(payload, content_hash, chunk, profile))
+            if progress is not None:
+                progress(len(summaries), len(seeds))
+    elapsed_ms = (time.perf_counter() - started) * 1000
+
+    matched = [s for s in summaries if _summary_matches(s, parsed_filters)]
+    _sort_summaries(matched, list(sort or []))
+    matched_count = len(matched)
+    if limit is not None and limit >= 0:
+        matched = matched[:limit]
+    result = {
+        "skeleton": payload.get("name") or "",
+        "content_hash": content_hash,
+        "asset_version": _map_assets().version,
+        "generated": len(summaries),
+        "matched": matched_count,
+        "elapsed_ms": round(elapsed_ms, 1),
+        "results": matched,
+    }
+    if profile.key():
+        result["profile"] = {"name": profile.name, "key": profile.key()}
+    return result
+
+
+_BAKE_JOB: Dict[str, Any] = {}
+
+
+def _bake_worker_init(payload: Dict[str, Any], content_hash: str, asset_base: str) -> None:
+    _BAKE_JOB["payload"] = payload
+    _BAKE_JOB["content_hash"] = content_hash
+    _BAKE_JOB["asset_base"] = asset_base
+
+
+def _bake_chunk(
+    payload: Dict[str, Any],
+    content_hash: str,
+    asset_base: str,
+    seeds: List[int],
+    profile: _GenerationProfile | None = None,
+) -> List[Dict[str, Any]]:
+    plan = _skeleton_plan_for(payload, content_hash)
+    assets = _map_assets()
+    asset_url = _static_asset_url(asset_base)
+    baked = []
+    for seed in seeds:
+        state = _generate_map(payload, seed, assets, plan, profile=profile)
+        preview = _compact_preview(state, asset_url=asset_url)
+        preview["skeleton"] = payload.get("name") or ""
+        preview["content_hash"] = content_hash
+        preview["asset_version"] = assets.version
+        baked.append(preview)
+    return baked
+
+
+def _bake_worker_chunk(seeds: List[int], profile: _GenerationProfile | None = None) -> List[Dict[str, Any]]:
+    return _bake_chunk(_BAKE_JOB["payload"], _BAKE_JOB["content_hash"], _BAKE_JOB["asset_base"], seeds, profile)
+
+
+def _bake_maps(
+    payload: Dict[str, Any],
+    seeds: List[int],
+    *,
+    workers: int = 0,
+    asset_base: str = "/static",
+    profile: _GenerationProfile | None = None,
+) -> Iterable[Dict[str, Any]]:
+    """Compact previews of many seeds of one skeleton, yielded in seed order; no Flask app needed.
+
+    Each is the _build_compact_preview dict (asset URLs under asset_base) plus
+    "skeleton", "content_hash" and "asset_version". Like _explore_seeds,
+    workers > 1 spreads chunks of seeds over a process pool whose workers
+    receive the skeleton once; results are yielded as chunks finish, in order.
+    profile is sent with every chunk (see _explore_seeds).
+    """
+    seeds = [int(seed) for seed in seeds]
+    content_hash = _skeleton_content_hash(payload)
+    chunks = [seeds[k:k + EXPLORE_CHUNK_SIZE] for k in range(0, len(seeds), EXPLORE_CHUNK_SIZE)]
+    if workers > 1 and len(chunks) > 1:
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(chunks)),
+            initializer=_bake_worker_init,
+            initargs=(payload, content_hash, asset_base),
+        ) as pool:
+            for baked in pool.map(_bake_worker_chunk, chunks, [profile] * len(chunks)):
+                yield from baked
+    else:
+        for chunk in chunks:
+            yield from _bake_chunk(payload, content_hash, asset_base, chunk, profile)
+
+
 def _login_required_local(f):
     from functools import wraps
 
@@ -1749,47 +3810,60 @@ def _detail_map_file_name(skeleton_name: str, seed: int) -> str:
 def _build_detail_editor_payload(
     skeleton_payload: Dict[str, Any],
     preview: Dict[str, Any],
+    rerolls: Dict[str, int] | None = None,
+    profile_name: str = "",
 ) -> Dict[str, Any]:
-    rows = preview.get("rows") or []
+    """Initial detail-editor map from a compact preview (see _build_compact_preview).
+
+    rerolls and profile_name are what the preview was generated with; the map records them.
+    """
+    table = preview.get("assets") or []
+    regions = preview.get("regions") or []
+    region_biomes = preview.get("region_biomes") or {}
     cells: List[Dict[str, Any]] = []
-    for row in rows:
-        for cell in row:
-            texture = cell.get("texture") or {}
-            overlay = cell.get("overlay") or {}
-            asset = overlay.get("asset") or {}
+    for row_idx, row in enumerate(preview.get("rows") or []):
+        for col_idx, cell in enumerate(row):
+            texture = table[cell["texture"]] if cell.get("texture", -1) >= 0 else {}
+            asset = table[cell["overlay"]] if cell.get("overlay", -1) >= 0 else {}
+            overlay_kind = asset.get("kind")
+            guarded = bool(cell.get("guarded"))
+            overlay_count = int(cell.get("count") or 0)
             hero_file_name = None
             hero_name_key = None
             hero_label = None
             hero_count = 0
             hero_pathfinder = False
-            if (overlay.get("kind") == "entity") and _is_hero_entity_asset_data(asset):
+            if overlay_kind == "entity" and _is_hero_entity_asset_data(asset):
                 hero_file_name = asset.get("file_name")
                 hero_name_key = asset.get("name_key")
                 hero_label = asset.get("label")
                 hero_count = 1
-                overlay = {}
+                overlay_kind = None
+                guarded = False
                 asset = {}
+            role = cell.get("role") or "empty"
+            region = regions[cell["region"]][0] if 0 <= int(cell.get("region", -1)) < len(regions) else ""
             cells.append(
                 {
-                    "row": int(cell.get("row", 0)),
-                    "col": int(cell.get("col", 0)),
+                    "row": row_idx,
+                    "col": col_idx,
                     "active": bool(cell.get("active")),
-                    "role": cell.get("role") or "empty",
-                    "role_color": cell.get("role_color") or ROLE_COLORS.get(cell.get("role") or "empty", ROLE_COLORS["empty"]),
-                    "region": cell.get("region") or "",
+                    "role": role,
+                    "role_color": ROLE_COLORS.get(role, ROLE_COLORS["empty"]),
+                    "region": region,
                     "spawn": bool(cell.get("spawn")),
                     "special": cell.get("special"),
-                    "biome": cell.get("biome") or "",
+                    "biome": region_biomes.get(region) or "",
                     "texture_file_name": texture.get("file_name"),
-                    "overlay_kind": overlay.get("kind"),
+                    "overlay_kind": overlay_kind,
                     "overlay_file_name": asset.get("file_name"),
                     "overlay_name_key": asset.get("name_key"),
                     "overlay_label": asset.get("label"),
                     "overlay_group": asset.get("group"),
                     "overlay_owner_color": None,
                     "overlay_pathfinder": False,
-                    "overlay_count": int(cell.get("overlay_count") or 0),
-                    "guarded": bool((overlay or {}).get("guarded")),
+                    "overlay_count": overlay_count,
+                    "guarded": guarded,
                     "hero_file_name": hero_file_name,
                     "hero_name_key": hero_name_key,
                     "hero_label": hero_label,
@@ -1803,13 +3877,26 @@ def _build_detail_editor_payload(
         "description": skeleton_payload.get("description") or "",
         "save_label": "",
         "seed": int(preview.get("seed") or 0),
+        "rerolls": dict(rerolls or {}),
+        "profile": _profile_name(profile_name),
         "width": int(skeleton_payload.get("width") or 0),
         "height": int(skeleton_payload.get("height") or 0),
-        "region_biomes": dict(preview.get("region_biomes") or {}),
+        "region_biomes": dict(region_biomes),
         "cells": cells,
     }
 
 
+def _detail_map_rerolls(payload: Dict[str, Any]) -> Dict[str, int]:
+    """Re-roll salts a saved detail map was generated with ({} for older maps or bad data)."""
+    raw = payload.get("rerolls")
+    if not isinstance(raw, dict):
+        return {}
+    try:
+        return _parse_rerolls(f"{target}@{salt}" for target, salt in raw.items())
+    except ValueError:
+        return {}
+
+
 def _normalize_detail_map_payload(payload: Dict[str, Any], fallback_name: str, fallback_seed: int) -> Dict[str, Any]:
     width = max(1, min(int(payload.get("width", 1)), 120))
     height = max(1, min(int(payload.get("height", 1)), 120))
@@ -1817,6 +3904,8 @@ def _normalize_detail_map_payload(payload: Dict[str, Any], fallback_name: str, f
     name = _safe_name(payload.get("name") or fallback_name)
     description = str(payload.get("description") or "")[:500]
     save_label = str(payload.get("save_label") or "").strip()[:120]
+    rerolls = _detail_map_rerolls(payload)
+    profile_name = _profile_name(payload.get("profile"))
     region_biomes = {str(k): str(v) for k, v in (payload.get("region_biomes") or {}).items()}
 
     by_key: Dict[tuple[int, int], Dict[str, Any]] = {}
@@ -1868,6 +3957,8 @@ def _normalize_detail_map_payload(payload: Dict[str, Any], fallback_name: str, f
         "description": description,
         "save_label": save_label,
         "seed": seed,
+        "rerolls": rerolls,
+        "profile": profile_name,
         "width": width,
         "height": height,
         "region_biomes": region_biomes,
@@ -2029,6 +4120,14 @@ def init_map_skeletons(app, socketio=None):
     detail_room_states: Dict[str, Dict[str, Any]] = {}
     detail_room_presence: Dict[str, Dict[str, Dict[str, Any]]] = {}
     detail_sid_rooms: Dict[str, Dict[str, Any]] = {}
+    # Seed exploration runs in-process by default; a process pool is opt-in because
+    # forking from inside an eventlet worker is not something to do by accident.
+    try:
+        explore_workers = max(0, int(os.getenv("MAPGEN_EXPLORE_WORKERS") or 0))
+    except ValueError:
+        explore_workers = 0
+    if PREVIEW_CACHE_DISK and _PREVIEW_CACHE.size > 0:
+        _PREVIEW_CACHE.disk_dir = _map_storage_root(app) / "map_preview_cache"
     redis_url = os.getenv("MAPGEN_REDIS_URL") or os.getenv("REDIS_URL") or ""
     redis_client = None
     if redis_url and redis_lib is not None:
@@ -2039,7 +4138,7 @@ def init_map_skeletons(app, socketio=None):
             redis_client = None
 
     def _db_conn():
-        conn = sqlite3.connect(db_path, timeout=30)
+        conn = metrics_ext.connect(db_path, timeout=30)
         conn.row_factory = sqlite3.Row
         conn.execute("PRAGMA busy_timeout = 30000")
         return conn
@@ -2088,6 +4187,42 @@ def init_map_skeletons(app, socketio=None):
         resp.headers["Expires"] = "0"
         return resp
 
+    def _text_error(message: str, status: int):
+        resp = _html_no_store(message)
+        resp.status_code = status
+        resp.mimetype = "text/plain"
+        return resp
+
+    # (kind, ...) -> id of the latest job generating it; only recent keys matter, so keep a few.
+    pending_jobs: "OrderedDict[tuple, str]" = OrderedDict()
+
+    def _submit_once(queue, job_key: tuple, fn, *args) -> str:
+        """Submit fn as a job of kind job_key[0], or return the unfinished job already running it."""
+        job_id = pending_jobs.get(job_key)
+        job = queue.get(job_id) if job_id else None
+        if job is None or job["status"] in jobs_ext.FINISHED_STATES:
+            job_id = pending_jobs[job_key] = queue.submit(job_key[0], fn, *args)
+            pending_jobs.move_to_end(job_key)
+            while len(pending_jobs) > PENDING_JOBS_TRACKED:
+                pending_jobs.popitem(last=False)
+        return job_id
+
+    def _job_pending_page(job_id: str, heading: str, payload: Dict[str, Any], seed: int, retry_url: str):
+        """Page that follows a background generation job and opens its result URL when done."""
+        return _html_no_store(
+            render_template(
+                "map_job_pending.html",
+                heading=heading,
+                map_name=payload["name"],
+                seed=seed,
+                job_id=job_id,
+                status_url=url_for("api_job_status", job_id=job_id),
+                cancel_url=url_for("api_job_cancel", job_id=job_id),
+                retry_url=retry_url,
+                back_url=url_for("map_skeletons_editor", name=payload["name"]),
+            )
+        )
+
     def _detail_room_name(skeleton_name: str, seed: int) -> str:
         return f"detail:{_safe_name(skeleton_name)}:{int(seed)}"
 
@@ -2395,6 +4530,8 @@ def init_map_skeletons(app, socketio=None):
                 payload = {}
             items_by_seed[int(row["seed"])] = {
                 "seed": int(row["seed"]),
+                "reroll_args": _reroll_args(_detail_map_rerolls(payload)),
+                "profile": _profile_name(payload.get("profile")),
                 "save_label": str(payload.get("save_label") or "")[:120],
                 "file_name": _detail_map_file_name(skeleton_name, int(row["seed"])),
                 "updated_at": datetime.fromisoformat(row["updated_at"]) if row["updated_at"] else datetime.utcnow(),
@@ -2421,6 +4558,8 @@ def init_map_skeletons(app, socketio=None):
                     payload = {}
                 items_by_seed[seed_value] = {
                     "seed": seed_value,
+                    "reroll_args": _reroll_args(_detail_map_rerolls(payload)),
+                    "profile": _profile_name(payload.get("profile")),
                     "save_label": str(payload.get("save_label") or "")[:120],
                     "file_name": p.name,
                     "updated_at": datetime.fromtimestamp(p.stat().st_mtime),
@@ -2519,7 +4658,7 @@ def init_map_skeletons(app, socketio=None):
     def _get_or_create_room_state(skeleton_name: str, seed: int, base_payload: Dict[str, Any] | None = None) -> Dict[str, Any]:
         existing = _load_detail_state_from_store(skeleton_name, seed)
         if existing:
-            _repair_detail_map_spawn_heroes(existing, _load_entity_assets())
+            _repair_detail_map_spawn_heroes(existing, _map_assets().entities)
             return existing
         if base_payload is not None:
             normalized = _normalize_detail_map_payload(base_payload, skeleton_name, seed)
@@ -2538,7 +4677,7 @@ def init_map_skeletons(app, socketio=None):
                     skeleton_name,
                     seed,
                 )
-        _repair_detail_map_spawn_heroes(normalized, _load_entity_assets())
+        _repair_detail_map_spawn_heroes(normalized, _map_assets().entities)
         _save_detail_state_to_store(normalized, skeleton_name, seed)
         return normalized
 
@@ -2605,15 +4744,79 @@ def init_map_skeletons(app, socketio=None):
         except ValueError:
             seed = random.randint(1000, 999999)
 
-        preview = _build_preview_map(payload, seed)
-        return render_template(
-            "map_skeleton_preview.html",
+        plan = _skeleton_plan_for(payload)
+        # Bad ?reroll= / ?profile= values are rejected rather than dropped, so a typo
+        # never silently renders the default map.
+        profile_name = _profile_name(request.args.get("profile"))
+        try:
+            rerolls = _parse_rerolls(request.args.getlist("reroll"), plan)
+            profile = _named_generation_profile(profile_name)
+        except ValueError as e:
+            return _text_error(f"Bad preview parameters: {e}", 400)
+
+        trace = MAPGEN_TRACE or request.args.get("trace") == "1"
+        stream_arg = request.args.get("stream", "").strip()
+        stream = not trace and (
+            stream_arg == "1"
+            or (stream_arg != "0" and int(payload["width"]) * int(payload["height"]) >= PREVIEW_STREAM_MIN_CELLS)
+        )
+        queue = getattr(app, "job_queue", None)
+        # Uncached boards are generated by a background job while a pending page follows it,
+        # except streamed ones, which already show their rows as they are generated. The
+        # job's result URL carries ?job=, which renders inline from then on (no loop if the
+        # preview was evicted meanwhile).
+        inline = trace or stream or request.args.get("job")
+        if queue is not None and not inline and _PREVIEW_CACHE.size > 0:
+            key = _preview_cache_key(payload, seed, _map_assets(), rerolls, profile, plan)
+            if not _PREVIEW_CACHE.contains(key):
+                job_id = _submit_once(queue, ("preview",) + key, _preview_job, payload, seed, rerolls, profile_name)
+                retry_url = url_for(
+                    "map_skeletons_preview",
+                    name=payload["name"],
+                    seed=seed,
+                    reroll=_reroll_args(rerolls),
+                    profile=profile_name or None,
+                )
+                return _job_pending_page(job_id, "Generating Map Preview", payload, seed, retry_url)
+
+        if trace:
+            preview = _build_compact_preview(
+                payload, seed, trace=_MapTrace(), rerolls=rerolls, profile=profile, plan=plan
+            )
+        else:
+            preview = _cached_compact_preview(
+                payload, seed, stream=stream, rerolls=rerolls, profile=profile, plan=plan
+            )
+
+        def reroll_url(target: str) -> str:
+            # Salts are absolute, so one more click on a target means its next salt.
+            bumped = dict(rerolls)
+            bumped[target] = bumped.get(target, 0) + 1
+            return url_for(
+                "map_skeletons_preview",
+                name=payload["name"],
+                seed=seed,
+                reroll=_reroll_args(bumped),
+                profile=profile_name or None,
+            )
+
+        overlay_regions = sorted(r for r in plan.grid.region_keys if r and r not in {"none", "water"})
+        context = dict(
             map_name=payload["name"],
             map_width=payload["width"],
             map_height=payload["height"],
             map_description=payload.get("description") or "",
             preview=preview,
+            rerolls=rerolls,
+            reroll_args=_reroll_args(rerolls),
+            profile_name=profile_name,
+            reroll_links=[(layer, reroll_url(layer)) for layer in REROLL_LAYERS],
+            region_reroll_links=[(region, reroll_url(f"overlays:{region}")) for region in overlay_regions],
         )
+        if stream:
+            # Large boards: header first, then rows as they are emitted (or rendered, on a cache hit).
+            return _stream_template("map_skeleton_preview.html", **context)
+        return render_template("map_skeleton_preview.html", **context)
 
     @app.route("/map-skeletons/<name>/detail")
     @_admin_required
@@ -2629,16 +4832,53 @@ def init_map_skeletons(app, socketio=None):
         except ValueError:
             seed = random.randint(1000, 999999)
 
+        plan = _skeleton_plan_for(skeleton_payload)
+        profile_name = _profile_name(request.args.get("profile"))
+        try:
+            rerolls = _parse_rerolls(request.args.getlist("reroll"), plan)
+            profile = _named_generation_profile(profile_name)
+        except ValueError as e:
+            return _text_error(f"Bad detail map parameters: {e}", 400)
+
         try:
             detail_payload = _load_detail_map(skeleton_payload["name"], seed)
         except FileNotFoundError:
-            preview = _build_preview_map(skeleton_payload, seed)
-            detail_payload = _build_detail_editor_payload(skeleton_payload, preview)
+            queue = getattr(app, "job_queue", None)
+            if queue is not None and not request.args.get("job"):
+                job_key = ("detail", skeleton_payload["name"], seed, tuple(sorted(rerolls.items())), profile_name)
+                job_id = _submit_once(queue, job_key, _detail_job, skeleton_payload, seed, rerolls, profile_name)
+                retry_url = url_for(
+                    "map_skeletons_detail_editor",
+                    name=skeleton_payload["name"],
+                    seed=seed,
+                    reroll=_reroll_args(rerolls),
+                    profile=profile_name or None,
+                )
+                return _job_pending_page(job_id, "Preparing Detail Map", skeleton_payload, seed, retry_url)
+            preview = _cached_compact_preview(skeleton_payload, seed, rerolls=rerolls, profile=profile, plan=plan)
+            detail_payload = _build_detail_editor_payload(skeleton_payload, preview, rerolls, profile_name)
             _save_detail_map(detail_payload, skeleton_payload["name"], seed)
 
-        textures = _load_texture_assets()
-        landmarks = _load_landmark_assets()
-        entities = _load_entity_assets()
+        # One detail map is saved per skeleton + seed. Never open it in place of a
+        # map of the same seed with other re-rolls or another profile.
+        if (detail_payload["rerolls"], detail_payload["profile"]) != (rerolls, profile_name):
+            saved_url = url_for(
+                "map_skeletons_detail_editor",
+                name=skeleton_payload["name"],
+                seed=seed,
+                reroll=_reroll_args(detail_payload["rerolls"]),
+                profile=detail_payload["profile"] or None,
+            )
+            return _text_error(
+                f"Seed {seed} already has a saved detail map with other re-rolls or another profile. "
+                f"Open it at {saved_url}, or delete it from Saved Detail Maps to edit this one.",
+                409,
+            )
+
+        assets = _map_assets()
+        textures = assets.textures
+        landmarks = assets.landmarks
+        entities = assets.entities
         _repair_detail_map_spawn_heroes(detail_payload, entities)
         saved_detail_maps = _list_detail_maps(skeleton_payload["name"])
 
@@ -2649,6 +4889,7 @@ def init_map_skeletons(app, socketio=None):
             map_height=detail_payload["height"],
             map_description=skeleton_payload.get("description") or "",
             detail_map=detail_payload,
+            reroll_args=_reroll_args(detail_payload["rerolls"]),
             textures=textures,
             landmarks=landmarks,
             entities=entities,
@@ -2682,6 +4923,133 @@ def init_map_skeletons(app, socketio=None):
         except FileNotFoundError:
             return _json_no_store({"error": "Map not found"}, 404)
 
+    def _explore_request_args() -> Dict[str, Any]:
+        """_explore_seeds keyword arguments from the query string (ValueError on bad input)."""
+        try:
+            start = int(request.values.get("start") or 1)
+            count = max(1, min(EXPLORE_MAX_SEEDS, int(request.values.get("count") or 100)))
+            limit = int(request.values.get("limit") or 50)
+        except ValueError:
+            raise ValueError("start, count and limit must be integers")
+        profile = _named_generation_profile(request.values.get("profile"))
+        filters = request.values.getlist("filter")
+        for raw in filters:
+            if str(raw or "").strip():
+                _parse_explore_filter(raw)
+        return {
+            "seeds": list(range(start, start + count)),
+            "workers": explore_workers,
+            "filters": filters,
+            "sort": [k for raw in request.values.getlist("sort") for k in raw.split(",") if k.strip()],
+            "limit": limit,
+            "profile": profile,
+        }
+
+    @app.route("/api/map-skeletons/<name>/explore", methods=["GET"])
+    @_admin_required
+    def api_map_skeleton_explore(name: str):
+        try:
+            payload = _load(name)
+        except FileNotFoundError:
+            return _json_no_store({"error": "Map not found"}, 404)
+        try:
+            result = _explore_seeds(payload, **_explore_request_args())
+        except ValueError as e:
+            return _json_no_store({"error": str(e)}, 400)
+        return _json_no_store(result)
+
+    def _preview_job(
+        ctx, payload: Dict[str, Any], seed: int, rerolls: Dict[str, int], profile_name: str = ""
+    ) -> Dict[str, Any]:
+        assets = _map_assets()
+        plan = _skeleton_plan_for(payload)
+        profile = _named_generation_profile(profile_name)
+        key = _preview_cache_key(payload, seed, assets, rerolls, profile, plan)
+        if _PREVIEW_CACHE.get(key) is None:
+            preview = _build_compact_preview(
+                payload, seed, assets, trace=_JobProgressTrace(ctx), rerolls=rerolls, profile=profile, plan=plan
+            )
+            _PREVIEW_CACHE.put(key, preview)
+        url = url_for(
+            "map_skeletons_preview",
+            name=payload["name"],
+            seed=seed,
+            reroll=_reroll_args(rerolls),
+            profile=profile_name or None,
+            job=ctx.job_id,
+        )
+        return {"seed": seed, "url": url}
+
+    def _detail_job(
+        ctx, payload: Dict[str, Any], seed: int, rerolls: Dict[str, int] | None = None, profile_name: str = ""
+    ) -> Dict[str, Any]:
+        rerolls = rerolls or {}
+        try:
+            _load_detail_map(payload["name"], seed)
+        except FileNotFoundError:
+            assets = _map_assets()
+            plan = _skeleton_plan_for(payload)
+            profile = _named_generation_profile(profile_name)
+            key = _preview_cache_key(payload, seed, assets, rerolls, profile, plan)
+            preview = _PREVIEW_CACHE.get(key)
+            if preview is None:
+                preview = _build_compact_preview(
+                    payload, seed, assets, trace=_JobProgressTrace(ctx), rerolls=rerolls, profile=profile, plan=plan
+                )
+                _PREVIEW_CACHE.put(key, preview)
+            detail_payload = _build_detail_editor_payload(payload, preview, rerolls, profile_name)
+            _save_detail_map(detail_payload, payload["name"], seed)
+        url = url_for(
+            "map_skeletons_detail_editor",
+            name=payload["name"],
+            seed=seed,
+            reroll=_reroll_args(rerolls),
+            profile=profile_name or None,
+            job=ctx.job_id,
+        )
+        return {"seed": seed, "url": url}
+
+    def _explore_job(ctx, payload: Dict[str, Any], explore_args: Dict[str, Any]) -> Dict[str, Any]:
+        return _explore_seeds(payload, progress=lambda done, total: ctx.progress(done, total, "seeds"), **explore_args)
+
+    @app.route("/api/map-skeletons/<name>/jobs", methods=["POST"])
+    @_admin_required
+    def api_map_skeleton_job(name: str):
+        """Start a preview / detail / explore run in the background; poll /api/jobs/<id> or subscribe."""
+        queue = getattr(app, "job_queue", None)
+        if queue is None:
+            return _json_no_store({"error": "Background jobs are not enabled"}, 503)
+        try:
+            payload = _load(name)
+        except FileNotFoundError:
+            return _json_no_store({"error": "Map not found"}, 404)
+        kind = (request.values.get("kind") or "").strip().lower()
+        if kind in {"preview", "detail"}:
+            seed_raw = (request.values.get("seed") or "").strip()
+            try:
+                seed = int(seed_raw) if seed_raw else random.randint(1000, 999999)
+            except ValueError:
+                return _json_no_store({"error": "seed must be an integer"}, 400)
+            profile_name = _profile_name(request.values.get("profile"))
+            try:
+                rerolls = _parse_rerolls(request.values.getlist("reroll"), _skeleton_plan_for(payload))
+                _named_generation_profile(profile_name)
+            except ValueError as e:
+                return _json_no_store({"error": str(e)}, 400)
+            if kind == "preview":
+                job_id = queue.submit(kind, _preview_job, payload, seed, rerolls, profile_name)
+            else:
+                job_id = queue.submit(kind, _detail_job, payload, seed, rerolls, profile_name)
+        elif kind == "explore":
+            try:
+                explore_args = _explore_request_args()
+            except ValueError as e:
+                return _json_no_store({"error": str(e)}, 400)
+            job_id = queue.submit(kind, _explore_job, payload, explore_args)
+        else:
+            return _json_no_store({"error": "kind must be preview, detail or explore"}, 400)
+        return _json_no_store({"job_id": job_id, "status_url": url_for("api_job_status", job_id=job_id)}, 202)
+
     @app.route("/api/map-skeletons/<name>/save", methods=["POST"])
     @_admin_required
     def api_map_skeleton_save(name: str):
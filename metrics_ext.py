@@ -0,0 +1,360 @@
+# metrics_ext.py — request/socket/DB/workbook latency metrics in Prometheus text format
+# Usage in app.py (right after the SocketIO object is created, before any
+# @socketio.on handlers are registered):
+#   import metrics_ext
+#   metrics_ext.init_metrics(app, socketio)
+#
+# Env:
+#   METRICS_ENABLED=0          turn the hooks off entirely
+#   METRICS_SLOW_REQUEST_MS=N  print a [slow] line for requests/events slower than N ms
+
+from __future__ import annotations
+
+import inspect
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from typing import Dict, Iterator, List, Tuple
+
+from flask import Response, g, has_app_context, request
+
+# Latency buckets in seconds (Prometheus "le" upper bounds; +Inf is implicit).
+LATENCY_BUCKETS: Tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Response size buckets in bytes.
+SIZE_BUCKETS: Tuple[float, ...] = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+METRIC_PREFIX = "warped"
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+class _Histogram:
+    """Fixed-bucket cumulative histogram (one per label set)."""
+
+    __slots__ = ("buckets", "counts", "total", "count")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.total += value
+        self.count += 1
+        for idx, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[idx] += 1
+                break
+
+
+class _Registry:
+    """Process-local metric store. Guarded by one lock; updates are tiny."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms: Dict[str, Dict[LabelKey, _Histogram]] = {}
+        self._hist_buckets: Dict[str, Tuple[float, ...]] = {}
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._help: Dict[str, str] = {}
+
+    def describe(self, name: str, help_text: str, buckets: Tuple[float, ...] | None = None) -> None:
+        self._help[name] = help_text
+        if buckets is not None:
+            self._hist_buckets[name] = buckets
+
+    def observe(self, name: str, labels: Dict[str, str], value: float) -> None:
+        key = tuple(sorted((k, str(v)) for k, v in labels.items()))
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            hist = series.get(key)
+            if hist is None:
+                hist = series[key] = _Histogram(self._hist_buckets.get(name, LATENCY_BUCKETS))
+            hist.observe(value)
+
+    def inc(self, name: str, labels: Dict[str, str], value: float = 1.0) -> None:
+        key = tuple(sorted((k, str(v)) for k, v in labels.items()))
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + value
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+    def render(self) -> str:
+        lines: List[str] = []
+        with self._lock:
+            for name in sorted(self._counters):
+                full = f"{METRIC_PREFIX}_{name}"
+                if name in self._help:
+                    lines.append(f"# HELP {full} {self._help[name]}")
+                lines.append(f"# TYPE {full} counter")
+                for key, value in sorted(self._counters[name].items()):
+                    lines.append(f"{full}{_fmt_labels(key)} {_fmt_value(value)}")
+            for name in sorted(self._histograms):
+                full = f"{METRIC_PREFIX}_{name}"
+                if name in self._help:
+                    lines.append(f"# HELP {full} {self._help[name]}")
+                lines.append(f"# TYPE {full} histogram")
+                for key, hist in sorted(self._histograms[name].items()):
+                    cumulative = 0
+                    for bound, n in zip(hist.buckets, hist.counts):
+                        cumulative += n
+                        lines.append(f"{full}_bucket{_fmt_labels(key, le=_fmt_value(bound))} {cumulative}")
+                    lines.append(f"{full}_bucket{_fmt_labels(key, le='+Inf')} {hist.count}")
+                    lines.append(f"{full}_sum{_fmt_labels(key)} {_fmt_value(hist.total)}")
+                    lines.append(f"{full}_count{_fmt_labels(key)} {hist.count}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt_labels(key: LabelKey, le: str | None = None) -> str:
+    parts = [f'{k}="{_escape_label(v)}"' for k, v in key]
+    if le is not None:
+        parts.append(f'le="{le}"')
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _fmt_value(value: float) -> str:
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+REGISTRY = _Registry()
+REGISTRY.describe("http_request_duration_seconds", "Flask request latency by endpoint.")
+REGISTRY.describe("http_response_size_bytes", "Response body size by endpoint.", SIZE_BUCKETS)
+REGISTRY.describe("http_requests_total", "Requests by endpoint, method and status.")
+REGISTRY.describe("http_request_db_queries", "SQLite statements executed per request.", (0, 1, 2, 5, 10, 25, 50, 100))
+REGISTRY.describe("db_query_duration_seconds", "SQLite statement latency by endpoint/event.")
+REGISTRY.describe("socketio_event_duration_seconds", "Socket.IO handler latency by event.")
+REGISTRY.describe("socketio_events_total", "Socket.IO events handled, by event and outcome.")
+REGISTRY.describe("workbook_parse_seconds", "pandas/openpyxl workbook parse time by source.")
+
+
+def _enabled() -> bool:
+    return (os.getenv("METRICS_ENABLED") or "1").strip().lower() not in {"0", "false", "no", "off"}
+
+
+def _slow_threshold_s() -> float | None:
+    raw = (os.getenv("METRICS_SLOW_REQUEST_MS") or "").strip()
+    if not raw:
+        return None
+    try:
+        return max(0.0, float(raw)) / 1000.0
+    except ValueError:
+        return None
+
+
+def _current_scope() -> str:
+    """Label for whatever is running now: request endpoint, socket event, or 'background'."""
+    if has_app_context():
+        scope = g.get("_metrics_scope")
+        if scope:
+            return scope
+    return "background"
+
+
+def _record_db_query(duration: float) -> None:
+    REGISTRY.observe("db_query_duration_seconds", {"scope": _current_scope()}, duration)
+    if has_app_context():
+        g._metrics_db_count = g.get("_metrics_db_count", 0) + 1
+        g._metrics_db_time = g.get("_metrics_db_time", 0.0) + duration
+
+
+# ---------------------------------------------------------------------------
+# Shared SQLite connection layer
+# ---------------------------------------------------------------------------
+class TimedCursor(sqlite3.Cursor):
+    """Cursor that records statement counts/durations for the current request."""
+
+    def execute(self, sql, parameters=()):
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            _record_db_query(time.perf_counter() - start)
+
+    def executemany(self, sql, seq_of_parameters):
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            _record_db_query(time.perf_counter() - start)
+
+
+class TimedConnection(sqlite3.Connection):
+    """Pass as sqlite3.connect(..., factory=TimedConnection) to instrument a connection."""
+
+    def cursor(self, factory=TimedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+def connect(path: str, **kwargs) -> sqlite3.Connection:
+    """sqlite3.connect() that uses the timed connection when metrics are on."""
+    if _enabled():
+        kwargs.setdefault("factory", TimedConnection)
+    return sqlite3.connect(path, **kwargs)
+
+
+# ---------------------------------------------------------------------------
+# Workbook parse timing
+# ---------------------------------------------------------------------------
+@contextmanager
+def track_workbook_parse(source: str) -> Iterator[None]:
+    """Time a pandas/openpyxl workbook read: `with track_workbook_parse("races"): ...`."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        REGISTRY.observe("workbook_parse_seconds", {"source": source}, time.perf_counter() - start)
+
+
+# ---------------------------------------------------------------------------
+# Flask / Socket.IO wiring
+# ---------------------------------------------------------------------------
+def _positional_limit(handler) -> int | None:
+    """How many positional arguments handler accepts (None for *args or an unreadable signature)."""
+    try:
+        params = inspect.signature(handler).parameters.values()
+    except (TypeError, ValueError):
+        return None
+    if any(p.kind == p.VAR_POSITIONAL for p in params):
+        return None
+    return sum(1 for p in params if p.kind in (p.POSITIONAL_ONLY, p.POSITIONAL_OR_KEYWORD))
+
+
+def _wrap_socket_handler(event: str, handler):
+    # Flask-SocketIO calls connect handlers as handler(auth) and retries with
+    # handler() on TypeError. Drop the argument here instead, so that probe is
+    # not recorded as a failed event.
+    limit = _positional_limit(handler) if event == "connect" else None
+
+    @wraps(handler)
+    def wrapper(*args, **kwargs):
+        if limit is not None and len(args) > limit:
+            args = args[:limit]
+        if has_app_context():
+            g._metrics_scope = f"socket:{event}"
+            g._metrics_db_count = 0
+            g._metrics_db_time = 0.0
+        start = time.perf_counter()
+        outcome = "ok"
+        try:
+            return handler(*args, **kwargs)
+        except Exception:
+            outcome = "error"
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            REGISTRY.observe("socketio_event_duration_seconds", {"event": event}, elapsed)
+            REGISTRY.inc("socketio_events_total", {"event": event, "outcome": outcome})
+            slow = _slow_threshold_s()
+            if slow is not None and elapsed >= slow:
+                print(f"[slow] socket event={event} {elapsed * 1000:.1f}ms")
+
+    return wrapper
+
+
+def init_metrics(app, socketio=None):
+    """Register timing hooks, the Socket.IO wrapper and the admin-only /__metrics view."""
+    if getattr(app, "_metrics_init_done", False):
+        return
+    app._metrics_init_done = True
+    app.metrics_registry = REGISTRY
+
+    if not _enabled():
+        return
+
+    @app.before_request
+    def _metrics_start():
+        g._metrics_start = time.perf_counter()
+        g._metrics_scope = request.endpoint or "unmatched"
+        g._metrics_db_count = 0
+        g._metrics_db_time = 0.0
+
+    @app.after_request
+    def _metrics_finish(response):
+        start = g.get("_metrics_start")
+        if start is None:
+            return response
+        g._metrics_start = None
+        elapsed = time.perf_counter() - start
+        endpoint = request.endpoint or "unmatched"
+        method = request.method
+        REGISTRY.observe("http_request_duration_seconds", {"endpoint": endpoint, "method": method}, elapsed)
+        REGISTRY.inc("http_requests_total", {"endpoint": endpoint, "method": method, "status": response.status_code})
+        REGISTRY.observe("http_request_db_queries", {"endpoint": endpoint}, g.get("_metrics_db_count", 0))
+        # Streamed/file responses have no known length up front; skip them.
+        size = response.content_length
+        if size is None and not response.is_streamed and not response.direct_passthrough:
+            size = len(response.get_data())
+        if size is not None:
+            REGISTRY.observe("http_response_size_bytes", {"endpoint": endpoint}, size)
+        slow = _slow_threshold_s()
+        if slow is not None and elapsed >= slow:
+            print(
+                f"[slow] {method} {request.path} endpoint={endpoint} status={response.status_code} "
+                f"{elapsed * 1000:.1f}ms db={g.get('_metrics_db_count', 0)}q/{g.get('_metrics_db_time', 0.0) * 1000:.1f}ms"
+            )
+        return response
+
+    @app.teardown_request
+    def _metrics_teardown(exc):
+        # Requests that raised never reach after_request.
+        start = g.get("_metrics_start")
+        if start is None or exc is None:
+            return
+        endpoint = request.endpoint or "unmatched"
+        REGISTRY.observe(
+            "http_request_duration_seconds",
+            {"endpoint": endpoint, "method": request.method},
+            time.perf_counter() - start,
+        )
+        REGISTRY.inc("http_requests_total", {"endpoint": endpoint, "method": request.method, "status": 500})
+
+    if socketio is not None:
+        original_on = socketio.on
+
+        def timed_on(message, namespace=None):
+            register = original_on(message, namespace)
+
+            def decorator(handler):
+                return register(_wrap_socket_handler(str(message), handler))
+
+            return decorator
+
+        socketio.on = timed_on
+
+    def _admin_only(f):
+        # init_metrics runs before admin_ext.init_admin (it has to wrap the Socket.IO
+        # handlers first), so app.admin_required is looked up per request.
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            guard = getattr(app, "admin_required", None)
+            if guard is None:
+                return "Admins only.", 403
+            return guard(f)(*args, **kwargs)
+
+        return wrapper
+
+    @app.route("/__metrics")
+    @_admin_only
+    def metrics_view():
+        return Response(REGISTRY.render(), mimetype="text/plain; version=0.0.4")
+
+    return app
@@ -0,0 +1,256 @@
+# profiler_ext.py — opt-in, admin-only per-request profiling
+# Usage in app.py (after admin_ext.init_admin: needs the hydrated admin flag and app.admin_required):
+#   import profiler_ext
+#   profiler_ext.init_profiler(app)
+#
+# Trigger on any page as an admin:
+#   /races?__profile=1         run under the sampling profiler, store the profile,
+#                              add X-Profile-Id / X-Profile-Url headers
+#   /races?__profile=raw       same, but return the folded stacks instead of the page
+#   /races?__profile=cprofile  deterministic cProfile instead (pstats text)
+# or send the header "X-Profile: 1|raw|cprofile".
+#
+# Stored profiles: /__profiles (list), /__profiles/<id> (download).
+# Folded stacks ("a;b;c 12" per line) load directly into speedscope or flamegraph.pl.
+#
+# Env:
+#   PROFILER_ENABLED=0             disable the flag entirely
+#   PROFILER_INTERVAL_MS=5         sampling interval
+#   PROFILER_MIN_INTERVAL_S=10     per-admin rate limit between profiled requests
+#   PROFILER_MAX_STORED=20         stored profiles kept (oldest dropped)
+#   PROFILER_MAX_PROFILE_BYTES=524288  per-profile size cap (rarest stacks dropped)
+
+from __future__ import annotations
+
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from typing import Any, Dict, List
+
+from flask import Response, abort, g, jsonify, request, session
+
+PROFILE_QUERY_PARAM = "__profile"
+PROFILE_HEADER = "X-Profile"
+MAX_STACK_DEPTH = 128
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _real_threading():
+    """The OS-level threading module, even when eventlet has monkey patched it.
+
+    The sampler must be a real thread so it keeps ticking while the request
+    greenlet is busy on the CPU.
+    """
+    try:
+        from eventlet import patcher
+
+        if patcher.is_monkey_patched("thread"):
+            return patcher.original("threading")
+    except Exception:
+        pass
+    return threading
+
+
+class _StackSampler:
+    """Polls one thread's current frame and counts folded call stacks."""
+
+    def __init__(self, thread_id: int, interval_s: float):
+        real_threading = _real_threading()
+        self.thread_id = thread_id
+        self.interval_s = interval_s
+        self.counts: Counter = Counter()
+        self.samples = 0
+        self._stop = real_threading.Event()
+        self._thread = real_threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join(timeout=1.0)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_s):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack: List[str] = []
+            while frame is not None and len(stack) < MAX_STACK_DEPTH:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            stack.reverse()
+            self.counts[";".join(stack)] += 1
+            self.samples += 1
+
+    def folded(self, max_bytes: int) -> tuple[str, bool]:
+        """Folded-stack text, most frequent stacks first, truncated to max_bytes."""
+        lines: List[str] = []
+        size = 0
+        truncated = False
+        for stack, count in self.counts.most_common():
+            line = f"{stack} {count}\n"
+            if size + len(line) > max_bytes:
+                truncated = True
+                break
+            lines.append(line)
+            size += len(line)
+        return "".join(lines), truncated
+
+
+def init_profiler(app):
+    """Wire the ?__profile flag and the admin-only stored-profile views."""
+    if getattr(app, "_profiler_init_done", False):
+        return
+    app._profiler_init_done = True
+
+    interval_s = max(1, _env_int("PROFILER_INTERVAL_MS", 5)) / 1000.0
+    min_interval_s = max(0, _env_int("PROFILER_MIN_INTERVAL_S", 10))
+    max_stored = max(1, _env_int("PROFILER_MAX_STORED", 20))
+    max_bytes = max(4096, _env_int("PROFILER_MAX_PROFILE_BYTES", 512 * 1024))
+
+    stored: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+    last_run_by_user: Dict[Any, float] = {}
+    state_lock = threading.Lock()
+    # One profiled request at a time per process; profiling is not free.
+    active = {"busy": False}
+
+    def _requested_mode() -> str | None:
+        raw = request.args.get(PROFILE_QUERY_PARAM) or request.headers.get(PROFILE_HEADER) or ""
+        raw = raw.strip().lower()
+        if not raw or raw in {"0", "false", "no", "off"}:
+            return None
+        if raw in {"raw", "cprofile"}:
+            return raw
+        return "sample"
+
+    def _store(entry: Dict[str, Any]) -> None:
+        with state_lock:
+            stored[entry["id"]] = entry
+            while len(stored) > max_stored:
+                stored.popitem(last=False)
+
+    @app.before_request
+    def _profiler_start():
+        if (os.getenv("PROFILER_ENABLED") or "1").strip().lower() in {"0", "false", "no", "off"}:
+            return None
+        mode = _requested_mode()
+        if mode is None:
+            return None
+        if not session.get("user_id") or not session.get("is_admin"):
+            return None  # silently ignored for everyone else
+        uid = session.get("user_id")
+        now = time.monotonic()
+        with state_lock:
+            last = last_run_by_user.get(uid)
+            if active["busy"] or (last is not None and now - last < min_interval_s):
+                return Response("Profiler rate limit: try again shortly.", status=429, mimetype="text/plain")
+            active["busy"] = True
+            last_run_by_user[uid] = now
+
+        g._profile_mode = mode
+        g._profile_started = time.perf_counter()
+        if mode == "cprofile":
+            profiler = cProfile.Profile()
+            profiler.enable()
+            g._profile_cprofile = profiler
+        else:
+            sampler = _StackSampler(_real_threading().get_ident(), interval_s)
+            sampler.start()
+            g._profile_sampler = sampler
+        return None
+
+    def _finish_profile() -> Dict[str, Any] | None:
+        mode = g.get("_profile_mode")
+        if not mode:
+            return None
+        g._profile_mode = None
+        elapsed_ms = (time.perf_counter() - g.get("_profile_started", time.perf_counter())) * 1000
+        try:
+            if mode == "cprofile":
+                profiler = g.get("_profile_cprofile")
+                profiler.disable()
+                buf = io.StringIO()
+                pstats.Stats(profiler, stream=buf).sort_stats("cumulative").print_stats(120)
+                body = buf.getvalue()
+                truncated = len(body) > max_bytes
+                body = body[:max_bytes]
+                fmt = "pstats"
+                samples = None
+            else:
+                sampler = g.get("_profile_sampler")
+                sampler.stop()
+                body, truncated = sampler.folded(max_bytes)
+                fmt = "folded"
+                samples = sampler.samples
+        finally:
+            with state_lock:
+                active["busy"] = False
+
+        entry = {
+            "id": uuid.uuid4().hex[:12],
+            "path": request.full_path.rstrip("?"),
+            "endpoint": request.endpoint,
+            "format": fmt,
+            "samples": samples,
+            "elapsed_ms": round(elapsed_ms, 1),
+            "truncated": truncated,
+            "created_at": time.time(),
+            "body": body,
+        }
+        _store(entry)
+        return entry
+
+    @app.after_request
+    def _profiler_finish(response):
+        mode = g.get("_profile_mode")
+        entry = _finish_profile()
+        if entry is None:
+            return response
+        if mode == "raw":
+            return Response(entry["body"], mimetype="text/plain")
+        response.headers["X-Profile-Id"] = entry["id"]
+        response.headers["X-Profile-Url"] = f"/__profiles/{entry['id']}"
+        return response
+
+    @app.teardown_request
+    def _profiler_teardown(exc):
+        # Requests that raised skip after_request; still stop the sampler and keep the profile.
+        if g.get("_profile_mode"):
+            _finish_profile()
+
+    admin_required = app.admin_required
+
+    @app.route("/__profiles")
+    @admin_required
+    def profiles_index():
+        with state_lock:
+            items = [{k: v for k, v in entry.items() if k != "body"} for entry in reversed(stored.values())]
+        return jsonify({"profiles": items, "max_stored": max_stored, "max_bytes": max_bytes})
+
+    @app.route("/__profiles/<profile_id>")
+    @admin_required
+    def profiles_download(profile_id: str):
+        with state_lock:
+            entry = stored.get(profile_id)
+        if not entry:
+            abort(404)
+        ext = "txt" if entry["format"] == "pstats" else "folded"
+        resp = Response(entry["body"], mimetype="text/plain")
+        resp.headers["Content-Disposition"] = f'attachment; filename="profile-{profile_id}.{ext}"'
+        return resp
+
+    return app
@@ -0,0 +1,400 @@
+"""End-to-end load test / benchmark for the Flask app.
+
+Boots `app` in-process (Flask test client + Socket.IO test client) or targets
+an already running server, logs in fake users, hammers the main pages and
+Socket.IO events at a given concurrency, and reports p50/p95/p99 latency and
+throughput per target.
+
+Local stand-ins (in-process mode):
+- Auth DB and map storage go to a throwaway temp dir.
+- Redis is replaced by an in-memory fake (the map detail room state/presence
+  code path still runs, just without a server). The Socket.IO message queue
+  stays disabled.
+- Google OAuth gets dummy credentials and is never contacted; fake users are
+  inserted straight into the users table and their ids seeded into the
+  session cookie.
+
+Usage:
+  py scripts/bench_app.py                              # all targets, defaults
+  py scripts/bench_app.py -n 200 -c 8 --targets home,races,socket_chat
+  py scripts/bench_app.py --save bench.json
+  py scripts/bench_app.py --compare bench.json --max-regression 0.25   # exit 1 on p95 regression
+  py scripts/bench_app.py --base-url http://127.0.0.1:8080 --targets home,races
+    (server mode: HTTP targets only; fake users self-register via /register)
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+HTTP_TARGETS = {
+    "home": "/",
+    "view_sheet": "/view/{sheet}",
+    "races": "/races",
+    "merchant": "/merchant",
+    "chest": "/chest",
+    "events_random": "/api/events/random?biome=Grasslands",
+    "sentient": "/sentient-generator",
+    # ?job= renders the preview inline instead of queueing a job behind a pending page,
+    # so every request (a new seed each) still times generation itself.
+    "map_preview": "/map-skeletons/{skeleton}/preview?seed={seed}&job=bench",
+}
+SOCKET_TARGETS = ("socket_chat", "socket_detail")
+BENCH_ADMIN_EMAIL = "bench-admin@example.invalid"
+
+
+class FakeRedis:
+    """In-memory stand-in for the redis client calls map_skeleton_ext makes."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._kv = {}
+        self._hashes = {}
+
+    def ping(self):
+        return True
+
+    def get(self, key):
+        with self._lock:
+            return self._kv.get(key)
+
+    def set(self, key, value):
+        with self._lock:
+            self._kv[key] = value
+        return True
+
+    def expire(self, key, seconds):
+        return True
+
+    def delete(self, *keys):
+        with self._lock:
+            removed = 0
+            for key in keys:
+                removed += int(self._kv.pop(key, None) is not None)
+                removed += int(self._hashes.pop(key, None) is not None)
+            return removed
+
+    def hset(self, key, field, value):
+        with self._lock:
+            self._hashes.setdefault(key, {})[field] = value
+        return 1
+
+    def hdel(self, key, *fields):
+        with self._lock:
+            bucket = self._hashes.get(key, {})
+            return sum(1 for f in fields if bucket.pop(f, None) is not None)
+
+    def hgetall(self, key):
+        with self._lock:
+            return dict(self._hashes.get(key, {}))
+
+
+class _FakeRedisModule:
+    def __init__(self):
+        self.client = FakeRedis()
+
+    def from_url(self, url, **kwargs):
+        return self.client
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * pct / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def _summarize(name, latencies, errors, wall_s):
+    values = sorted(latencies)
+    return {
+        "target": name,
+        "requests": len(values),
+        "errors": errors,
+        "throughput_rps": round(len(values) / wall_s, 2) if wall_s > 0 else 0.0,
+        "mean_ms": round(statistics.fmean(values) * 1000, 2) if values else 0.0,
+        "p50_ms": round(_percentile(values, 50) * 1000, 2),
+        "p95_ms": round(_percentile(values, 95) * 1000, 2),
+        "p99_ms": round(_percentile(values, 99) * 1000, 2),
+        "max_ms": round(values[-1] * 1000, 2) if values else 0.0,
+    }
+
+
+def _run_workers(concurrency, total, make_worker):
+    """Run `total` operations split over `concurrency` threads; return (latencies, errors, wall)."""
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    per_worker = [total // concurrency + (1 if i < total % concurrency else 0) for i in range(concurrency)]
+    workers = [make_worker(i) for i in range(concurrency)]
+    start_gate = threading.Barrier(concurrency + 1)
+
+    def run(idx):
+        op = workers[idx]
+        local = []
+        local_errors = 0
+        start_gate.wait()
+        for n in range(per_worker[idx]):
+            t0 = time.perf_counter()
+            try:
+                ok = op(n)
+            except Exception:
+                ok = False
+            local.append(time.perf_counter() - t0)
+            if not ok:
+                local_errors += 1
+        with lock:
+            latencies.extend(local)
+            errors[0] += local_errors
+
+    threads = [threading.Thread(target=run, args=(i,), daemon=True) for i in range(concurrency)]
+    for t in threads:
+        t.start()
+    start_gate.wait()
+    t_start = time.perf_counter()
+    for t in threads:
+        t.join()
+    return latencies, errors[0], time.perf_counter() - t_start
+
+
+# ---------------------------------------------------------------------------
+# In-process mode
+# ---------------------------------------------------------------------------
+def _boot_in_process(tmp_dir):
+    os.environ["AUTH_DB_PATH"] = str(Path(tmp_dir) / "auth.db")
+    os.environ["MAPGEN_DATA_ROOT"] = str(Path(tmp_dir) / "mapgen")
+    os.environ["ADMIN_EMAILS"] = BENCH_ADMIN_EMAIL
+    os.environ["GOOGLE_CLIENT_ID"] = "bench-fake-client-id"
+    os.environ["GOOGLE_CLIENT_SECRET"] = "bench-fake-client-secret"
+    os.environ["MAPGEN_REDIS_URL"] = "redis://fake-for-bench/0"
+    for key in ("REDIS_URL", "SOCKETIO_MESSAGE_QUEUE"):
+        os.environ.pop(key, None)
+
+    sys.path.insert(0, str(REPO_ROOT))
+    os.chdir(REPO_ROOT)
+    import map_skeleton_ext
+
+    map_skeleton_ext.redis_lib = _FakeRedisModule()
+    import app as app_module
+
+    app_module.app.config["SESSION_COOKIE_SECURE"] = False
+    return app_module
+
+
+def _create_fake_users(app_module, count):
+    conn = app_module.get_db()
+    try:
+        ids = []
+        for i in range(count):
+            email = BENCH_ADMIN_EMAIL if i == 0 else f"bench-{i}-{uuid.uuid4().hex[:6]}@example.invalid"
+            username = f"bench_{i}_{uuid.uuid4().hex[:6]}"
+            cur = conn.execute(
+                "INSERT INTO users (email, username, created_at) VALUES (?, ?, ?)",
+                (email, username, "bench"),
+            )
+            ids.append((cur.lastrowid, email, username))
+        conn.commit()
+        return ids
+    finally:
+        conn.close()
+
+
+def _logged_in_client(app_module, user):
+    client = app_module.app.test_client()
+    with client.session_transaction() as sess:
+        sess["user_id"], sess["email"], sess["username"] = user
+        sess.permanent = True
+    return client
+
+
+def run_in_process(args):
+    tmp = tempfile.TemporaryDirectory(prefix="warped-bench-")
+    app_module = _boot_in_process(tmp.name)
+    # Every worker logs in as the admin so admin-only routes (map preview) are reachable;
+    # the extra users exist so the user table is not trivially small.
+    users = _create_fake_users(app_module, max(2, args.concurrency))
+    admin_user = users[0]
+    results = []
+
+    for target in args.targets:
+        if target in HTTP_TARGETS:
+            def make_worker(idx, target=target):
+                client = _logged_in_client(app_module, admin_user)
+                template = HTTP_TARGETS[target]
+
+                def op(n):
+                    path = template.format(sheet=args.sheet, skeleton=args.skeleton, seed=args.seed_base + n)
+                    resp = client.get(path)
+                    resp.get_data()
+                    return resp.status_code < 400
+
+                return op
+        elif target == "socket_chat":
+            def make_worker(idx):
+                client = _logged_in_client(app_module, admin_user)
+                sio = app_module.socketio.test_client(app_module.app, flask_test_client=client)
+
+                def op(n):
+                    sio.emit("chat_message", {"text": f"bench {idx}-{n}"})
+                    received = sio.get_received()
+                    return any(pkt.get("name") == "chat_message" for pkt in received)
+
+                return op
+        elif target == "socket_detail":
+            def make_worker(idx):
+                client = _logged_in_client(app_module, admin_user)
+                sio = app_module.socketio.test_client(app_module.app, flask_test_client=client)
+                room = {"map_name": args.skeleton, "seed": args.seed_base}
+                sio.emit("detail_map_join", room)
+                sio.get_received()
+
+                def op(n):
+                    sio.emit(
+                        "detail_map_patch",
+                        dict(room, cells=[{"row": n % 5, "col": idx % 5, "role": "outer_area", "active": True}]),
+                    )
+                    sio.get_received()
+                    return sio.is_connected()
+
+                return op
+        else:
+            print(f"[bench] unknown target {target!r}, skipping")
+            continue
+
+        # Warm caches (workbooks, lru_caches, templates) before timing.
+        warm = make_worker(0)
+        for n in range(args.warmup):
+            warm(n)
+
+        latencies, errors, wall = _run_workers(args.concurrency, args.requests, make_worker)
+        results.append(_summarize(target, latencies, errors, wall))
+        _print_row(results[-1])
+
+    tmp.cleanup()
+    return results
+
+
+# ---------------------------------------------------------------------------
+# Server mode
+# ---------------------------------------------------------------------------
+def run_against_server(args):
+    import requests
+
+    base = args.base_url.rstrip("/")
+    results = []
+
+    def _session():
+        sess = requests.Session()
+        tag = uuid.uuid4().hex[:8]
+        resp = sess.post(
+            f"{base}/register",
+            data={"email": f"bench-{tag}@example.invalid", "username": f"bench_{tag}", "password": tag},
+            allow_redirects=False,
+        )
+        # The app marks cookies Secure; re-add it without the flag so plain-http local runs keep it.
+        cookie = resp.cookies.get("session")
+        if cookie:
+            sess.cookies.clear()
+            sess.cookies.set("session", cookie)
+        return sess
+
+    for target in args.targets:
+        if target not in HTTP_TARGETS:
+            print(f"[bench] {target} needs in-process mode, skipping")
+            continue
+
+        def make_worker(idx, target=target):
+            sess = _session()
+            template = HTTP_TARGETS[target]
+
+            def op(n):
+                path = template.format(sheet=args.sheet, skeleton=args.skeleton, seed=args.seed_base + n)
+                resp = sess.get(base + path, allow_redirects=False)
+                return resp.status_code < 400
+
+            return op
+
+        warm = make_worker(0)
+        for n in range(args.warmup):
+            warm(n)
+        latencies, errors, wall = _run_workers(args.concurrency, args.requests, make_worker)
+        results.append(_summarize(target, latencies, errors, wall))
+        _print_row(results[-1])
+    return results
+
+
+# ---------------------------------------------------------------------------
+# Reporting / regression gate
+# ---------------------------------------------------------------------------
+def _print_row(row):
+    print(
+        f"{row['target']:<16} n={row['requests']:<5} err={row['errors']:<3} "
+        f"rps={row['throughput_rps']:<8} p50={row['p50_ms']:<8} p95={row['p95_ms']:<8} "
+        f"p99={row['p99_ms']:<8} max={row['max_ms']}"
+    )
+
+
+def _compare(results, baseline_path, max_regression):
+    baseline = {row["target"]: row for row in json.loads(Path(baseline_path).read_text(encoding="utf-8"))["results"]}
+    failed = False
+    for row in results:
+        prev = baseline.get(row["target"])
+        if not prev or not prev.get("p95_ms"):
+            continue
+        ratio = row["p95_ms"] / prev["p95_ms"]
+        status = "OK"
+        if ratio > 1.0 + max_regression:
+            status = "REGRESSION"
+            failed = True
+        print(f"[compare] {row['target']:<16} p95 {prev['p95_ms']} -> {row['p95_ms']} ms ({ratio:.2f}x) {status}")
+    return failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the Flask app and report latency percentiles.")
+    parser.add_argument("--targets", default=",".join(list(HTTP_TARGETS) + list(SOCKET_TARGETS)),
+                        help="comma separated: " + ", ".join(list(HTTP_TARGETS) + list(SOCKET_TARGETS)))
+    parser.add_argument("-n", "--requests", type=int, default=100, help="timed operations per target")
+    parser.add_argument("-c", "--concurrency", type=int, default=4, help="concurrent clients per target")
+    parser.add_argument("--warmup", type=int, default=3, help="untimed operations per target")
+    parser.add_argument("--sheet", default="LEGACY", help="sheet for /view/<sheet>")
+    parser.add_argument("--skeleton", default="8p_cross_01", help="skeleton for map preview / detail rooms")
+    parser.add_argument("--seed-base", type=int, default=1000, help="first preview seed; each request uses the next")
+    parser.add_argument("--base-url", default="", help="benchmark a running server instead of booting in-process")
+    parser.add_argument("--save", default="", help="write results JSON here")
+    parser.add_argument("--compare", default="", help="baseline results JSON to gate against")
+    parser.add_argument("--max-regression", type=float, default=0.25, help="allowed p95 slowdown vs baseline (0.25 = 25%%)")
+    args = parser.parse_args()
+    args.targets = [t.strip() for t in args.targets.split(",") if t.strip()]
+    args.concurrency = max(1, args.concurrency)
+
+    results = run_against_server(args) if args.base_url else run_in_process(args)
+
+    if args.save:
+        out = Path(args.save)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        out.write_text(json.dumps({
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "mode": "server" if args.base_url else "in_process",
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "results": results,
+        }, indent=2), encoding="utf-8")
+        print(f"Wrote {out}")
+
+    if args.compare and _compare(results, args.compare, args.max_regression):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+"""Benchmark the map generator, phase by phase, across skeleton sizes.
+
+Targets are synthetic skeletons (a centre boss hex, a guardian ring, four core
+regions, a water ring crossed by eight connector bridges and eight outer
+sectors with a player spawn each, scaled to the board) at --sizes, plus the
+checked-in skeletons. For each target the generator runs over the same seeds
+and every phase of _generate_map is traced (biome plan, overrides, spawn heroes,
+outer content, zones, portals, shipwrecks, ... fill textures), plus the compact
+preview emission: ms per seed (best of --repeat runs), and per-seed means of
+cells touched, RNG draws and overlays placed/removed (see _MapTrace).
+
+When NumPy is installed the scalar and NumPy texture-override passes are also
+compared (override_passes_ms / generate_ms per mode).
+
+Save a run with --save and pass it back with --compare on a later commit to
+print per-phase deltas.
+
+Usage:
+  py scripts/bench_mapgen.py                                   # synthetic 25/50/80/120 + data/map_skeletons/*.json
+  py scripts/bench_mapgen.py data/map_skeletons/8p_cross_01.json data/map_skeletons/luney_toons2.json --sizes ""
+  py scripts/bench_mapgen.py --sizes 50,120 --seeds 50 --repeat 5
+  py scripts/bench_mapgen.py --save bench_before.json
+  py scripts/bench_mapgen.py --compare bench_before.json --save bench_after.json
+"""
+
+import argparse
+import json
+import math
+import random
+import sys
+import time
+from array import array
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+import map_skeleton_ext  # noqa: E402
+
+SECTORS = 8
+CORE_QUADRANTS = ("core_ne", "core_nw", "core_sw", "core_se")
+
+
+def synthetic_skeleton(width, height):
+    """A normalized skeleton with the role/region layout of the hand-made 8-player maps."""
+    m = map_skeleton_ext
+    rng = random.Random(f"{width}x{height}")
+    center = (height // 2, width // 2)
+    radius = max(6, min(width, height) // 2 - 1)
+    core_radius = max(4, int(radius * 0.35))
+    water_radius = max(core_radius + 1, int(radius * 0.42))
+    water_mid = (core_radius + 1 + water_radius) // 2
+    spawn_radius = max(water_radius + 2, int(round(radius * 0.85)))
+    cy, cx = center[0] * 0.866, center[1] + 0.5 * (center[0] & 1)
+
+    cells = []
+    spawn_choice = {}
+    bridge_boss = set()
+    for row in range(height):
+        for col in range(width):
+            d = m._hex_distance((row, col), center)
+            if d > radius:
+                continue
+            angle = math.atan2(row * 0.866 - cy, col + 0.5 * (row & 1) - cx)
+            turn = (angle + math.pi) / (2 * math.pi) * SECTORS
+            sector = int(turn) % SECTORS
+            frac = turn - int(turn)
+            arc = 2 * math.pi * d / SECTORS  # hexes along this ring per sector
+            cell = {"row": row, "col": col, "role": "outer_area", "region": f"outer_{sector}"}
+            if d == 0:
+                cell.update(role="center_core", region="mid_core", special="God")
+            elif d == 1:
+                cell.update(role="center_core", region="mid_core", special="Guardian" if rng.random() < 0.35 else None)
+            elif d <= 3:
+                cell.update(role="center_ring", region="core")
+            elif d <= core_radius:
+                cell.update(role="core_area", region=CORE_QUADRANTS[sector // 2])
+            elif d <= water_radius:
+                if abs(frac - 0.5) * arc <= 0.75:
+                    special = None
+                    if d == water_mid and sector not in bridge_boss:
+                        bridge_boss.add(sector)
+                        special = "boss"
+                    elif rng.random() < 0.4:
+                        special = "Elite"
+                    cell.update(role="connector", region="", special=special)
+                else:
+                    cell.update(role="water", region="none")
+            elif min(frac, 1 - frac) * arc < 0.6:
+                cell.update(role="connector", region="")
+            elif d == spawn_radius:
+                off = abs(frac - 0.5) * arc
+                if off < spawn_choice.get(sector, (9e9, None))[0]:
+                    spawn_choice[sector] = (off, len(cells))
+            cells.append(cell)
+
+    for _, index in spawn_choice.values():
+        cells[index].update(role="spawn", spawn=True, special="player_spawn")
+    # One zone hex per core region, as on the hand-made maps.
+    for region in CORE_QUADRANTS:
+        options = [cell for cell in cells if cell["region"] == region and cell["role"] == "core_area"]
+        if options:
+            rng.choice(options)["special"] = "zone"
+    return m._normalize_payload(
+        {"name": f"synthetic_{width}x{height}", "width": width, "height": height, "cells": cells},
+        f"synthetic_{width}x{height}",
+    )
+
+
+def _best_ms_per_seed(fn, seeds, repeat):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for seed in seeds:
+            fn(seed)
+        elapsed = (time.perf_counter() - started) * 1000 / max(1, len(seeds))
+        best = elapsed if best is None else min(best, elapsed)
+    return round(best, 3)
+
+
+def bench_phases(payload, seeds, repeat, assets):
+    """Per-phase trace of _build_compact_preview, per seed.
+
+    Times come from the best of `repeat` timing-only runs; cells touched, RNG
+    draws and overlay counts from one extra detailed run (its counting RNG and
+    snapshots would skew the times).
+    """
+    m = map_skeleton_ext
+    asset_url = m._static_asset_url()
+    best = {}
+    best_total = None
+    m._skeleton_plan_for(payload)
+    for _ in range(repeat):
+        trace = m._MapTrace(detail=False)
+        started = time.perf_counter()
+        for seed in seeds:
+            m._build_compact_preview(payload, seed, assets, trace=trace, asset_url=asset_url)
+        total = (time.perf_counter() - started) * 1000 / max(1, len(seeds))
+        best_total = total if best_total is None else min(best_total, total)
+        for row in trace.as_dict()["phases"]:
+            best[row["phase"]] = min(best.get(row["phase"], row["ms"]), row["ms"])
+    detail = m._MapTrace()
+    for seed in seeds:
+        m._build_compact_preview(payload, seed, assets, trace=detail, asset_url=asset_url)
+    phases = {}
+    for row in detail.as_dict()["phases"]:
+        phase = row.pop("phase")
+        row["ms"] = best.get(phase, row["ms"])
+        phases[phase] = row
+    return phases, round(best_total, 3)
+
+
+def bench_override_modes(payload, seeds, repeat, assets):
+    m = map_skeleton_ext
+    plan = m._skeleton_plan_for(payload)
+    # A finished state per seed gives the passes realistic textures to work on.
+    states = {seed: m._generate_map(payload, seed, assets, plan, vectorized=False) for seed in seeds}
+    base_tex = {seed: array("h", state.tex) for seed, state in states.items()}
+
+    def passes(vectorized):
+        build = m._build_texture_overrides_np if vectorized else m._build_texture_overrides
+        enforce = m._enforce_lava_water_separation_np if vectorized else m._enforce_lava_water_separation
+
+        def run(seed):
+            state = states[seed]
+            state.stream("overrides")
+            state.tex = array("h", base_tex[seed])
+            build(state)
+            enforce(state)
+        return run
+
+    def whole(vectorized):
+        return lambda seed: m._generate_map(payload, seed, assets, plan, vectorized=vectorized)
+
+    result = {}
+    for vectorized in [False, True] if m.np is not None else [False]:
+        passes(vectorized)(seeds[0])  # warm per-plan NumPy arrays
+        result["numpy" if vectorized else "scalar"] = {
+            "override_passes_ms": _best_ms_per_seed(passes(vectorized), seeds, repeat),
+            "generate_ms": _best_ms_per_seed(whole(vectorized), seeds, repeat),
+        }
+    return result
+
+
+def bench_skeleton(payload, seeds, repeat, assets=None):
+    m = map_skeleton_ext
+    assets = assets or m._map_assets()
+    plan = m._skeleton_plan_for(payload)
+    phases, total = bench_phases(payload, seeds, repeat, assets)
+    return {
+        "width": plan.grid.width,
+        "height": plan.grid.height,
+        "cells": plan.grid.size,
+        "active": sum(1 for cell in plan.grid.cells if cell.get("active")),
+        "seeds": len(seeds),
+        "numpy": m.MAPGEN_NUMPY and m.np is not None,
+        "phases": phases,
+        "total_ms": total,
+        "override_modes": bench_override_modes(payload, seeds, repeat, assets),
+    }
+
+
+def _print_result(name, res, before=None):
+    print(f"\n{name}  {res['width']}x{res['height']}  active={res['active']}  total={res['total_ms']:.3f} ms/seed", end="")
+    if before:
+        print(f"  (was {before['total_ms']:.3f}, {_delta(before['total_ms'], res['total_ms'])})")
+    else:
+        print()
+    old_phases = (before or {}).get("phases", {})
+    print(f"  {'phase':<18} {'ms':>9} {'cells':>9} {'rng':>9} {'+ovl':>7} {'-ovl':>7}")
+    for phase, row in res["phases"].items():
+        line = (
+            f"  {phase:<18} {row['ms']:>9.3f} {row['cells']:>9.1f} {row['rng_draws']:>9.1f} "
+            f"{row['overlays_placed']:>7.1f} {row['overlays_removed']:>7.1f}"
+        )
+        if phase in old_phases:
+            old_ms = old_phases[phase]["ms"]
+            line += f"   was {old_ms:>9.3f}  {_delta(old_ms, row['ms'])}"
+        print(line)
+    for mode, numbers in res["override_modes"].items():
+        print(f"  [{mode}] override passes {numbers['override_passes_ms']:.3f}  generate {numbers['generate_ms']:.3f}")
+
+
+def _delta(old, new):
+    if not old:
+        return "n/a"
+    return f"{(new - old) / old * 100:+.1f}%"
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("skeletons", nargs="*", help="skeleton JSON files (default: data/map_skeletons/*.json)")
+    parser.add_argument("--sizes", default="25,50,80,120", help="synthetic square board sizes, comma separated ('' for none)")
+    parser.add_argument("--seeds", type=int, default=20, help="seeds per skeleton")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per measurement; the best is kept")
+    parser.add_argument("--save", help="also write the results as JSON")
+    parser.add_argument("--compare", help="earlier --save output to diff against")
+    args = parser.parse_args(argv)
+
+    m = map_skeleton_ext
+    targets = []
+    for size in [int(s) for s in args.sizes.split(",") if s.strip()]:
+        payload = synthetic_skeleton(size, size)
+        targets.append((payload["name"], payload))
+    paths = [Path(p) for p in args.skeletons] or sorted((REPO_ROOT / "data" / "map_skeletons").glob("*.json"))
+    for path in paths:
+        with path.open("r", encoding="utf-8") as f:
+            targets.append((path.stem, m._normalize_payload(json.load(f), path.stem)))
+    if m.np is None:
+        print("numpy is not installed; timing the scalar override passes only", file=sys.stderr)
+
+    before = {}
+    if args.compare:
+        before = json.loads(Path(args.compare).read_text(encoding="utf-8")).get("skeletons", {})
+
+    assets = m._map_assets()
+    seeds = list(range(1, args.seeds + 1))
+    results = {}
+    for name, payload in targets:
+        results[name] = bench_skeleton(payload, seeds, args.repeat, assets)
+        _print_result(name, results[name], before.get(name))
+
+    if args.save:
+        out = {"seeds": len(seeds), "repeat": args.repeat, "skeletons": results}
+        Path(args.save).write_text(json.dumps(out, indent=2) + "\n", encoding="utf-8")
+        print(f"\nsaved -> {args.save}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
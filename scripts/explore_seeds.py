@@ -0,0 +1,85 @@
+"""Generate many seeds of a map skeleton and rank them by compact summaries.
+
+Runs the same generator as /map-skeletons/<name>/preview, but only keeps a
+per-seed summary: region biomes, the preview `summary` counts, portal and
+shipwreck counts, and spawn-distance stats for chests and companions. Seeds are
+spread over a process pool; each worker loads the skeleton plan and the mapgen
+assets once.
+
+Metrics are dotted paths into a summary:
+  portals, shipwrecks
+  counts.landmark:Gold, counts.entity:Elite, counts.texture:Grasslands
+  biome_regions.Grasslands                  (regions that rolled that biome)
+  chest_spawn_distance.min|mean|max|count
+  companion_spawn_distance.min|mean|max|count
+
+Usage:
+  py scripts/explore_seeds.py data/map_skeletons/codlea.json --count 500
+  py scripts/explore_seeds.py data/map_skeletons/codlea.json --start 1000 --count 2000 --workers 8 \\
+      --filter "portals>=2" --filter "chest_spawn_distance.min>=2" \\
+      --sort=-companion_spawn_distance.mean --sort counts.landmark:Gold --limit 20
+  py scripts/explore_seeds.py data/map_skeletons/codlea.json --count 200 --out ranked.json
+  py scripts/explore_seeds.py data/map_skeletons/codlea.json --count 200 --profile data/mapgen/example_params.json
+"""
+
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+import map_skeleton_ext  # noqa: E402
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("skeleton", help="skeleton JSON file")
+    parser.add_argument("--start", type=int, default=1, help="first seed (default 1)")
+    parser.add_argument("--count", type=int, default=100, help=f"number of seeds (max {map_skeleton_ext.EXPLORE_MAX_SEEDS})")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="process pool size (1 = in-process)")
+    parser.add_argument("--filter", action="append", default=[], help="keep seeds matching METRIC(>=|<=|==|!=|>|<)VALUE; repeatable")
+    parser.add_argument("--sort", action="append", default=[], help="sort by METRIC, or --sort=-METRIC for descending; repeatable")
+    parser.add_argument("--limit", type=int, default=None, help="keep only the first N results")
+    parser.add_argument("--out", help="write the JSON result here instead of stdout")
+    parser.add_argument("--profile", help="generation profile JSON (e.g. data/mapgen/example_params.json; default: built-in values)")
+    args = parser.parse_args(argv)
+
+    path = Path(args.skeleton)
+    with path.open("r", encoding="utf-8") as f:
+        payload = map_skeleton_ext._normalize_payload(json.load(f), path.stem)
+
+    count = max(1, min(map_skeleton_ext.EXPLORE_MAX_SEEDS, args.count))
+    try:
+        profile = map_skeleton_ext._load_generation_profile(args.profile) if args.profile else None
+    except (OSError, ValueError) as e:
+        parser.error(f"--profile: {e}")
+    try:
+        result = map_skeleton_ext._explore_seeds(
+            payload,
+            list(range(args.start, args.start + count)),
+            workers=args.workers,
+            filters=args.filter,
+            sort=args.sort,
+            limit=args.limit,
+            profile=profile,
+        )
+    except ValueError as e:
+        parser.error(str(e))
+
+    text = json.dumps(result, indent=2)
+    if args.out:
+        Path(args.out).write_text(text + "\n", encoding="utf-8")
+        print(
+            f"{result['matched']}/{result['generated']} seeds matched in {result['elapsed_ms']:.0f} ms -> {args.out}",
+            file=sys.stderr,
+        )
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,179 +1,90 @@
+"""Generate maps from a skeleton with the real map generator, many seeds at once.
+
+Runs the same engine as /map-skeletons/<name>/preview (map_skeleton_ext), but
+without a Flask app, so map libraries can be baked offline. Every seed becomes
+a compact preview: an asset table (asset dicts plus their static URLs), a
+[region, biome] list, role colors and rows of small cells indexing into those
+tables (see map_skeleton_ext._build_compact_preview), plus the skeleton name,
+content hash and asset version it was generated from (plus the profile, with
+--profile). Seeds are spread over a process pool; each worker loads the
+skeleton plan and the mapgen assets once.
+
+Output:
+  --out DIR            one <skeleton>_seed_<seed>.json per seed (default data/generated_maps)
+  --out FILE.jsonl     every seed as one JSON line, in seed order
+
+Usage:
+  py scripts/generate_map_from_skeleton.py data/map_skeletons/8p_cross_01.json --start 12345
+  py scripts/generate_map_from_skeleton.py data/map_skeletons/codlea.json --start 1 --count 500 --workers 8 --out codlea_1_500.jsonl
+  py scripts/generate_map_from_skeleton.py data/map_skeletons/codlea.json --count 50 --profile data/mapgen/example_params.json --out dense.jsonl
+  py scripts/generate_map_from_skeleton.py data/map_skeletons/codlea.json --count 20 --out baked/ --asset-base-url https://cdn.example.com/static
+"""
+
+import argparse
 import json
-import random
+import os
 import sys
+import time
 from pathlib import Path
 
-DEFAULT_TEXTURES = {
-    "desert": ["desert_01", "desert_02"],
-    "grass": ["grass_01", "grass_02"],
-    "forest": ["forest_01"],
-    "sundune": ["sundune_01"],
-    "corruption": ["corruption_01"],
-    "frostreach": ["frostreach_01"],
-}
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+import map_skeleton_ext  # noqa: E402
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("skeleton", help="skeleton JSON file")
+    parser.add_argument("--start", type=int, default=1, help="first seed (default 1)")
+    parser.add_argument("--count", type=int, default=1, help="number of seeds (default 1)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="process pool size (1 = in-process)")
+    parser.add_argument(
+        "--out",
+        default=str(REPO_ROOT / "data" / "generated_maps"),
+        help="directory for one JSON file per seed, or a .jsonl file for all of them",
+    )
+    parser.add_argument("--asset-base-url", default="/static", help="prefix of asset URLs (default /static, as served)")
+    parser.add_argument("--indent", type=int, default=None, help="indent per-seed JSON files (default compact)")
+    parser.add_argument("--profile", help="generation profile JSON (e.g. data/mapgen/example_params.json; default: built-in values)")
+    args = parser.parse_args(argv)
+
+    path = Path(args.skeleton)
+    with path.open("r", encoding="utf-8") as f:
+        payload = map_skeleton_ext._normalize_payload(json.load(f), path.stem)
+    if args.count < 1:
+        parser.error("--count must be at least 1")
+    try:
+        profile = map_skeleton_ext._load_generation_profile(args.profile) if args.profile else None
+    except (OSError, ValueError) as e:
+        parser.error(f"--profile: {e}")
+
+    seeds = list(range(args.start, args.start + args.count))
+    baked = map_skeleton_ext._bake_maps(
+        payload, seeds, workers=args.workers, asset_base=args.asset_base_url, profile=profile
+    )
+    out = Path(args.out)
+    started = time.perf_counter()
+    written = 0
+    if out.suffix.lower() == ".jsonl":
+        out.parent.mkdir(parents=True, exist_ok=True)
+        with out.open("w", encoding="utf-8") as f:
+            for preview in baked:
+                f.write(json.dumps(preview, separators=(",", ":")) + "\n")
+                written += 1
+    else:
+        out.mkdir(parents=True, exist_ok=True)
+        separators = None if args.indent is not None else (",", ":")
+        for preview in baked:
+            target = out / f"{payload['name']}_seed_{preview['seed']}.json"
+            with target.open("w", encoding="utf-8") as f:
+                json.dump(preview, f, indent=args.indent, separators=separators)
+                f.write("\n")
+            written += 1
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    print(f"{written} map(s) of {payload['name']} in {elapsed_ms:.0f} ms -> {out}", file=sys.stderr)
+    return 0
 
-ENTITY_POOL_OUTER = ["bandit", "beast", "undead"]
-ENTITY_POOL_CORE = ["bandit_elite", "corruption_spawn", "legion_elite", "undead_elite"]
-
-def load_json(path):
-    with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
-
-def clamp01(x):
-    return max(0.0, min(1.0, float(x)))
-
-def assign_region_biomes(skeleton, params, rng):
-    regions = {}
-    outer_pool = params.get("biome_pool_outer", ["desert", "grass", "forest"])
-    core_pool = params.get("biome_pool_core", ["grass", "corruption"])
-    for cell in skeleton["cells"]:
-        if not cell["active"] or not cell.get("allow_biomes", False):
-            continue
-        region = cell["region"]
-        if region in regions:
-            continue
-        role = cell["role"]
-        if role == "core_area":
-            regions[region] = rng.choice(core_pool)
-        elif role in {"center_ring", "center_core"}:
-            regions[region] = rng.choice(core_pool)
-        else:
-            regions[region] = rng.choice(outer_pool)
-    return regions
-
-def choose_cells(cells, n, rng):
-    if n <= 0 or not cells:
-        return []
-    if n >= len(cells):
-        return list(cells)
-    return rng.sample(cells, n)
-
-def generate_map(skeleton, params):
-    rng = random.Random(int(params.get("seed", 12345)))
-    region_biomes = assign_region_biomes(skeleton, params, rng)
-
-    out = {
-        "name": f'{skeleton["name"]}_seed_{params.get("seed", 12345)}',
-        "seed": int(params.get("seed", 12345)),
-        "skeleton": skeleton["name"],
-        "cells": [],
-    }
-
-    # candidate pools
-    active_cells = [c for c in skeleton["cells"] if c["active"]]
-    outer_cells = [c for c in active_cells if c["role"] in {"outer_area", "connector"} and not c["spawn"]]
-    core_cells = [c for c in active_cells if c["role"] in {"core_area", "center_ring", "center_core"} and not c["spawn"]]
-
-    outer_landmark_candidates = [c for c in outer_cells if c.get("allow_landmarks")]
-    core_landmark_candidates = [c for c in core_cells if c.get("allow_landmarks")]
-    outer_entity_candidates = [c for c in outer_cells if c.get("allow_entities")]
-    core_entity_candidates = [c for c in core_cells if c.get("allow_entities")]
-
-    landmark_marks = {}
-    counts = params.get("landmark_counts", {})
-    all_landmark_candidates = outer_landmark_candidates + core_landmark_candidates
-    used_ids = set()
-    for landmark, cfg in counts.items():
-        lo = int(cfg.get("min", 0))
-        hi = int(cfg.get("max", lo))
-        n = rng.randint(lo, hi)
-        available = [c for c in all_landmark_candidates if (c["row"], c["col"]) not in used_ids]
-        for c in choose_cells(available, n, rng):
-            key = (c["row"], c["col"])
-            used_ids.add(key)
-            landmark_marks[key] = landmark
-
-    outer_entity_density = params.get("entity_density_outer", params.get("enemy_density_outer", 0.12))
-    core_entity_density = params.get("entity_density_core", params.get("enemy_density_core", 0.18))
-    outer_entity_count = int(len(outer_entity_candidates) * clamp01(outer_entity_density))
-    core_entity_count = int(len(core_entity_candidates) * clamp01(core_entity_density))
-    entity_marks = {}
-    for c in choose_cells(outer_entity_candidates, outer_entity_count, rng):
-        entity_marks[(c["row"], c["col"])] = rng.choice(ENTITY_POOL_OUTER)
-    for c in choose_cells(core_entity_candidates, core_entity_count, rng):
-        entity_marks[(c["row"], c["col"])] = rng.choice(ENTITY_POOL_CORE)
-
-    outer_loot_count = int(len(outer_landmark_candidates) * clamp01(params.get("loot_density_outer", 0.10)))
-    core_loot_count = int(len(core_landmark_candidates) * clamp01(params.get("loot_density_core", 0.14)))
-    loot_marks = {}
-    for c in choose_cells([c for c in outer_landmark_candidates if (c["row"], c["col"]) not in landmark_marks], outer_loot_count, rng):
-        loot_marks[(c["row"], c["col"])] = "loot"
-    for c in choose_cells([c for c in core_landmark_candidates if (c["row"], c["col"]) not in landmark_marks], core_loot_count, rng):
-        loot_marks[(c["row"], c["col"])] = "loot"
-
-    for cell in skeleton["cells"]:
-        role = cell["role"]
-        key = (cell["row"], cell["col"])
-
-        biome = region_biomes.get(cell["region"])
-        if role == "void":
-            biome = None
-
-        if role == "center_core":
-            landmark = cell.get("special") or "boss"
-        else:
-            landmark = landmark_marks.get(key)
-
-        if cell["spawn"]:
-            landmark = None
-
-        entity = entity_marks.get(key)
-        if cell["spawn"]:
-            entity = None
-
-        loot_type = loot_marks.get(key)
-        defended = False
-        if landmark or loot_type:
-            if role in {"center_ring", "center_core", "core_area"}:
-                defended = rng.random() < clamp01(params.get("defended_chance_core", 0.4))
-            else:
-                defended = rng.random() < clamp01(params.get("defended_chance_outer", 0.15))
-
-        texture = None
-        if biome:
-            texture = rng.choice(DEFAULT_TEXTURES.get(biome, [biome]))
-
-        zone = None
-        if role == "spawn":
-            zone = "spawn"
-        elif role == "center_core":
-            zone = "objective"
-
-        out["cells"].append({
-            "row": cell["row"],
-            "col": cell["col"],
-            "active": cell["active"],
-            "role": role,
-            "region": cell["region"],
-            "spawn": cell["spawn"],
-            "special": cell.get("special"),
-            "biome": biome,
-            "texture": texture,
-            "zone": zone,
-            "landmark": landmark,
-            "entity": entity,
-            "hero": None,
-            "loot": loot_type,
-            "defended": defended,
-        })
-
-    return out
-
-def main():
-    if len(sys.argv) < 4:
-        print("Usage: py scripts/generate_map_from_skeleton.py data/map_skeletons/8p_cross_01.json data/mapgen/example_params.json data/generated_maps/8p_cross_01_seed_12345.json")
-        raise SystemExit(1)
-
-    skeleton = load_json(sys.argv[1])
-    params = load_json(sys.argv[2])
-    result = generate_map(skeleton, params)
-
-    out_path = Path(sys.argv[3])
-    out_path.parent.mkdir(parents=True, exist_ok=True)
-    with out_path.open("w", encoding="utf-8") as f:
-        json.dump(result, f, indent=2)
-
-    print(f"Wrote {out_path}")
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
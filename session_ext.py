@@ -0,0 +1,277 @@
+# session_ext.py — optional server-side sessions (cookie carries only an id)
+# Usage in app.py (after get_db exists):
+#   import session_ext
+#   session_ext.init_sessions(app, get_db)
+#
+# Env:
+#   SESSION_BACKEND=cookie   (default) Flask's signed-cookie sessions, unchanged
+#   SESSION_BACKEND=sqlite   sessions table in the auth DB
+#   SESSION_BACKEND=redis    SESSION_REDIS_URL or REDIS_URL (falls back to sqlite if unreachable)
+#   SESSION_BACKEND=memory   in-process dict; local dev / tests only (not shared across workers)
+#
+# In server-side mode the session is written (and Set-Cookie sent) only when its
+# contents change. Permanent sessions are re-touched once they are past half of
+# PERMANENT_SESSION_LIFETIME instead of on every request.
+
+from __future__ import annotations
+
+import json
+import os
+import secrets
+import threading
+import time
+from typing import Any, Dict, Tuple
+
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SecureCookieSession, SessionInterface
+
+try:
+    import redis as redis_lib
+except Exception:
+    redis_lib = None
+
+SESSION_ID_BYTES = 32
+_serializer = TaggedJSONSerializer()
+
+
+def _new_sid() -> str:
+    return secrets.token_urlsafe(SESSION_ID_BYTES)
+
+
+class ServerSideSession(SecureCookieSession):
+    """Session dict keyed by a random id; contents live in a store."""
+
+    def __init__(self, initial=None, sid: str | None = None, new: bool = True, expires_at: float | None = None):
+        super().__init__(initial)
+        self.sid = sid or _new_sid()
+        self.new = new
+        self.expires_at = expires_at
+        self.stale_sid: str | None = None
+
+    def clear(self) -> None:
+        # Rotate the id whenever the session is wiped (login/logout/ban), so an
+        # id seen before authentication never carries an authenticated session.
+        if not self.new and self.stale_sid is None:
+            self.stale_sid = self.sid
+        self.sid = _new_sid()
+        self.new = True
+        super().clear()
+
+
+# ---------------------------------------------------------------------------
+# Stores: get(sid) -> (expires_at, data) | None, set(sid, data, expires_at), delete(sid)
+# ---------------------------------------------------------------------------
+class MemorySessionStore:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._items: Dict[str, Tuple[float, str]] = {}
+
+    def get(self, sid: str):
+        with self._lock:
+            item = self._items.get(sid)
+            if item is None:
+                return None
+            if item[0] <= time.time():
+                self._items.pop(sid, None)
+                return None
+        return item[0], _serializer.loads(item[1])
+
+    def set(self, sid: str, data: Dict[str, Any], expires_at: float) -> None:
+        payload = _serializer.dumps(data)
+        with self._lock:
+            self._items[sid] = (expires_at, payload)
+
+    def delete(self, sid: str) -> None:
+        with self._lock:
+            self._items.pop(sid, None)
+
+
+class SqliteSessionStore:
+    PURGE_EVERY_S = 600
+
+    def __init__(self, get_db):
+        self._get_db = get_db
+        self._last_purge = 0.0
+        conn = get_db()
+        try:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS sessions (
+                    id TEXT PRIMARY KEY,
+                    data TEXT NOT NULL,
+                    expires_at REAL NOT NULL
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_expires_at ON sessions(expires_at)")
+            conn.commit()
+        finally:
+            conn.close()
+
+    def get(self, sid: str):
+        conn = self._get_db()
+        try:
+            row = conn.execute("SELECT data, expires_at FROM sessions WHERE id = ?", (sid,)).fetchone()
+        finally:
+            conn.close()
+        if not row or float(row[1]) <= time.time():
+            return None
+        return float(row[1]), _serializer.loads(row[0])
+
+    def set(self, sid: str, data: Dict[str, Any], expires_at: float) -> None:
+        now = time.time()
+        conn = self._get_db()
+        try:
+            conn.execute(
+                "INSERT INTO sessions (id, data, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET data = excluded.data, expires_at = excluded.expires_at",
+                (sid, _serializer.dumps(data), expires_at),
+            )
+            if now - self._last_purge > self.PURGE_EVERY_S:
+                self._last_purge = now
+                conn.execute("DELETE FROM sessions WHERE expires_at <= ?", (now,))
+            conn.commit()
+        finally:
+            conn.close()
+
+    def delete(self, sid: str) -> None:
+        conn = self._get_db()
+        try:
+            conn.execute("DELETE FROM sessions WHERE id = ?", (sid,))
+            conn.commit()
+        finally:
+            conn.close()
+
+
+class RedisSessionStore:
+    KEY_PREFIX = "session:"
+
+    def __init__(self, client):
+        self._client = client
+
+    def get(self, sid: str):
+        raw = self._client.get(self.KEY_PREFIX + sid)
+        if not raw:
+            return None
+        try:
+            envelope = json.loads(raw)
+            return float(envelope["e"]), _serializer.loads(envelope["d"])
+        except Exception:
+            return None
+
+    def set(self, sid: str, data: Dict[str, Any], expires_at: float) -> None:
+        ttl = max(1, int(expires_at - time.time()))
+        envelope = json.dumps({"e": expires_at, "d": _serializer.dumps(data)})
+        self._client.setex(self.KEY_PREFIX + sid, ttl, envelope)
+
+    def delete(self, sid: str) -> None:
+        self._client.delete(self.KEY_PREFIX + sid)
+
+
+class ServerSideSessionInterface(SessionInterface):
+    """Keeps session data in a store; the cookie only holds the session id."""
+
+    # Non-permanent sessions still need a server-side expiry.
+    NON_PERMANENT_TTL_S = 24 * 60 * 60
+
+    def __init__(self, store):
+        self.store = store
+
+    def _lifetime_s(self, app, session) -> float:
+        if session.permanent:
+            return app.permanent_session_lifetime.total_seconds()
+        return float(self.NON_PERMANENT_TTL_S)
+
+    def open_session(self, app, request):
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if sid:
+            try:
+                found = self.store.get(sid)
+            except Exception:
+                found = None
+            if found is not None:
+                expires_at, data = found
+                return ServerSideSession(data, sid=sid, new=False, expires_at=expires_at)
+        return ServerSideSession()
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+
+        if session.accessed:
+            response.vary.add("Cookie")
+
+        if session.stale_sid:
+            try:
+                self.store.delete(session.stale_sid)
+            except Exception:
+                pass
+            session.stale_sid = None
+
+        if not session:
+            if session.modified:
+                response.delete_cookie(name, domain=domain, path=path,
+                                       secure=self.get_cookie_secure(app),
+                                       samesite=self.get_cookie_samesite(app),
+                                       httponly=self.get_cookie_httponly(app))
+            return
+
+        now = time.time()
+        lifetime = self._lifetime_s(app, session)
+        needs_touch = (
+            session.permanent
+            and app.config.get("SESSION_REFRESH_EACH_REQUEST", True)
+            and session.expires_at is not None
+            and (session.expires_at - now) < lifetime / 2
+        )
+        if not (session.modified or session.new or needs_touch):
+            return
+
+        expires_at = now + lifetime
+        self.store.set(session.sid, dict(session), expires_at)
+        session.expires_at = expires_at
+        session.new = False
+        cookie_kwargs = {}
+        if hasattr(self, "get_cookie_partitioned"):  # Flask >= 3.1
+            cookie_kwargs["partitioned"] = self.get_cookie_partitioned(app)
+        response.set_cookie(
+            name,
+            session.sid,
+            expires=self.get_expiration_time(app, session),
+            httponly=self.get_cookie_httponly(app),
+            domain=domain,
+            path=path,
+            secure=self.get_cookie_secure(app),
+            samesite=self.get_cookie_samesite(app),
+            **cookie_kwargs,
+        )
+
+
+def _build_store(backend: str, get_db):
+    if backend == "memory":
+        return MemorySessionStore()
+    if backend == "redis":
+        url = os.getenv("SESSION_REDIS_URL") or os.getenv("REDIS_URL") or ""
+        if url and redis_lib is not None:
+            try:
+                client = redis_lib.from_url(url, decode_responses=True)
+                client.ping()
+                return RedisSessionStore(client)
+            except Exception as e:
+                print(f"[session] redis unavailable ({e}); falling back to sqlite")
+        else:
+            print("[session] SESSION_BACKEND=redis but no redis URL/client; falling back to sqlite")
+    return SqliteSessionStore(get_db)
+
+
+def init_sessions(app, get_db):
+    """Install the server-side session interface when SESSION_BACKEND asks for one."""
+    backend = (os.getenv("SESSION_BACKEND") or app.config.get("SESSION_BACKEND") or "cookie").strip().lower()
+    if backend in {"", "cookie", "signed_cookie"}:
+        print("[session] backend=cookie")
+        return app
+    store = _build_store(backend, get_db)
+    app.session_interface = ServerSideSessionInterface(store)
+    print(f"[session] backend={type(store).__name__}")
+    return app
@@ -188,6 +188,8 @@
       description: state.description || '',
       save_label: state.save_label || '',
       seed: state.seed,
+      rerolls: state.rerolls || {},
+      profile: state.profile || '',
       width: state.width,
       height: state.height,
       region_biomes: state.region_biomes || {},
@@ -701,6 +703,8 @@
     state.description = detailMap.description || state.description;
     state.save_label = detailMap.save_label || '';
     state.seed = detailMap.seed || state.seed;
+    state.rerolls = detailMap.rerolls || state.rerolls || {};
+    state.profile = detailMap.profile || state.profile || '';
     state.width = detailMap.width || state.width;
     state.height = detailMap.height || state.height;
     state.region_biomes = detailMap.region_biomes || state.region_biomes || {};
@@ -0,0 +1,54 @@
+import sqlite3
+
+from flask import Flask
+
+import admin_ext
+
+
+def _app(tmp_path):
+    db_path = tmp_path / "users.db"
+
+    def get_db():
+        return sqlite3.connect(db_path)
+
+    conn = get_db()
+    conn.execute(
+        "CREATE TABLE users (id INTEGER PRIMARY KEY, email TEXT, username TEXT, created_at TEXT, is_admin INTEGER)"
+    )
+    conn.executemany(
+        "INSERT INTO users (id, email, username, created_at, is_admin) VALUES (?, ?, ?, '', ?)",
+        [
+            (1, "admin@example.com", "admin", 1),
+            (2, "Zed@example.com", "zed", 0),
+            (3, "zoe@example.com", "Zoe", 0),
+            (4, "MixedCase@example.com", "mc", 0),
+            (5, "mixer@example.com", "mixer", 0),
+            (6, "[bracket@example.com", "bracket", 0),
+        ],
+    )
+    conn.commit()
+    conn.close()
+
+    app = Flask(__name__)
+    app.secret_key = "test"
+    admin_ext.init_admin(app, get_db)
+    return app
+
+
+def _search(client, query):
+    res = client.get("/admin/api/users", query_string={"q": query})
+    assert res.status_code == 200
+    return sorted(user["id"] for user in res.get_json()["users"])
+
+
+def test_user_search_prefix_is_case_insensitive(tmp_path):
+    client = _app(tmp_path).test_client()
+    with client.session_transaction() as sess:
+        sess["user_id"] = 1
+
+    assert _search(client, "Z") == [2, 3]
+    assert _search(client, "z") == [2, 3]
+    assert _search(client, "ZE") == [2]
+    assert _search(client, "MiXeD") == [4]
+    assert _search(client, "MIX") == [4, 5]
+    assert _search(client, "[") == [6]
@@ -0,0 +1,91 @@
+import json
+import os
+
+import pytest
+
+import map_skeleton_ext as m
+
+
+def _write(path, raw):
+    path.write_text(json.dumps(raw), encoding="utf-8")
+
+
+@pytest.fixture
+def profile_dir(tmp_path, monkeypatch):
+    folder = tmp_path / "profiles"
+    folder.mkdir()
+    monkeypatch.setattr(m, "MAPGEN_PROFILE_DIR", folder)
+    return folder
+
+
+def test_profile_overrides_and_defaults():
+    profile = m._GenerationProfile.from_dict({"name": "dense", "shipwreck_chance": 0.5, "zones_per_region": 0})
+    assert profile.shipwreck_chance == 0.5
+    assert profile.zones_per_region == 0
+    assert profile.portal_pair_chance == m.PORTAL_PAIR_CHANCE
+    assert profile.key() != ""
+    assert m._GenerationProfile.from_dict({"description": "defaults"}).key() == ""
+
+
+@pytest.mark.parametrize(
+    "raw, message",
+    [
+        ({"shipwreck_chanse": 0.5}, "Unknown generation profile keys: shipwreck_chanse"),
+        ({"biome_balance": {"max_per_biom": 2}}, "Unknown biome balance keys"),
+        ({"shipwreck_chance": 1.5}, "between 0 and 1"),
+        ({"portal_pair_chance": -0.1}, "between 0 and 1"),
+        ({"outer_weakling_density": 0}, "positive integer"),
+        ({"zones_per_region": -1}, "non-negative integer"),
+        ({"zones_per_region": 1.5}, "non-negative integer"),
+        ({"zones_per_region": True}, "must be a number"),
+        ({"zones_per_region": "2"}, "must be a number"),
+        ({"outer_biome_hints": []}, "non-empty list"),
+        ({"biome_balance": {"max_per_biome": 0}}, "positive integer"),
+        ([1, 2], "must be an object"),
+    ],
+)
+def test_profile_rejects_bad_values(raw, message):
+    with pytest.raises(ValueError, match=message):
+        m._GenerationProfile.from_dict(raw)
+
+
+def test_named_profile_stays_in_profile_dir(profile_dir):
+    _write(profile_dir / "dense.json", {"shipwreck_chance": 0.5})
+    _write(profile_dir.parent / "secret.json", {"shipwreck_chance": 0.9})
+
+    assert m._named_generation_profile("dense").shipwreck_chance == 0.5
+    assert m._named_generation_profile("") is m._DEFAULT_PROFILE
+    for raw in ("../secret", "..%2Fsecret", "/etc/passwd", "..\\secret"):
+        name = m._profile_name(raw)
+        assert "/" not in name and "\\" not in name and "." not in name
+        with pytest.raises(ValueError, match="Unknown generation profile"):
+            m._named_generation_profile(raw)
+
+
+def test_named_profile_bad_file(profile_dir):
+    (profile_dir / "broken.json").write_text("{", encoding="utf-8")
+    _write(profile_dir / "typo.json", {"shipwrek_chance": 0.5})
+    with pytest.raises(ValueError, match="not valid JSON"):
+        m._named_generation_profile("broken")
+    with pytest.raises(ValueError, match="Unknown generation profile keys"):
+        m._named_generation_profile("typo")
+
+
+def test_profile_file_reloads_when_it_changes(profile_dir):
+    path = profile_dir / "tuned.json"
+    _write(path, {"shipwreck_chance": 0.25})
+    first = m._named_generation_profile("tuned")
+    assert m._named_generation_profile("tuned") is first
+
+    # Different size.
+    _write(path, {"shipwreck_chance": 0.125})
+    second = m._named_generation_profile("tuned")
+    assert second.shipwreck_chance == 0.125
+
+    # Same size, newer mtime.
+    _write(path, {"shipwreck_chance": 0.375})
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 5_000_000_000))
+    third = m._named_generation_profile("tuned")
+    assert third.shipwreck_chance == 0.375
+    assert m._named_generation_profile("tuned") is third
@@ -0,0 +1,224 @@
+import shutil
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+import pytest
+from flask import Flask, session
+
+import admin_ext
+import jobs_ext
+import map_skeleton_ext as m
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def _wait(queue, job_id, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = queue.get(job_id)
+        if job["status"] in jobs_ext.FINISHED_STATES:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} still {queue.get(job_id)['status']}")
+
+
+def _blocker(queue):
+    """Submit a job that holds a worker until the returned event is set."""
+    release = threading.Event()
+    job_id = queue.submit("block", lambda ctx: release.wait(5))
+    return job_id, release
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    for name in ("JOBS_REDIS_URL", "REDIS_URL", "MAPGEN_REDIS_URL"):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setenv("JOBS_WORKERS", "1")
+    db_path = tmp_path / "auth.db"
+
+    def get_db():
+        return sqlite3.connect(db_path)
+
+    conn = get_db()
+    conn.execute(
+        "CREATE TABLE users (id INTEGER PRIMARY KEY, email TEXT, username TEXT, created_at TEXT, is_admin INTEGER)"
+    )
+    conn.executemany(
+        "INSERT INTO users (id, email, username, created_at, is_admin) VALUES (?, ?, ?, '', ?)",
+        [(1, "admin@example.com", "admin", 1), (2, "user@example.com", "user", 0)],
+    )
+    conn.commit()
+    conn.close()
+
+    app = Flask(__name__, root_path=str(ROOT))
+    app.secret_key = "test"
+    app.config["AUTH_DB_PATH"] = str(db_path)
+    admin_ext.init_admin(app, get_db)
+    jobs_ext.init_jobs(app)
+    return app
+
+
+def _client(app, user_id=1):
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess["user_id"] = user_id
+    return client
+
+
+def test_submit_runs_job_and_records_result(app):
+    queue = app.job_queue
+    with app.app_context():
+        job_id = queue.submit("echo", lambda ctx, x, scale=1: {"x": x * scale}, 3, scale=2)
+
+    job = _wait(queue, job_id)
+    assert job["kind"] == "echo"
+    assert job["status"] == "done"
+    assert job["progress"] == 1.0
+    assert job["result"] == {"x": 6}
+    assert job["error"] is None
+    assert job["owner"] is None
+    assert job["started_at"] is not None and job["finished_at"] is not None
+
+
+def test_failed_job_records_error(app):
+    queue = app.job_queue
+
+    def explode(ctx):
+        ctx.progress(1, 2, "half way")
+        raise RuntimeError("boom")
+
+    job = _wait(queue, queue.submit("explode", explode))
+    assert job["status"] == "failed"
+    assert job["error"] == "boom"
+    assert job["result"] is None
+    assert job["message"] == "half way"
+
+
+def test_cancel_is_cooperative(app):
+    queue = app.job_queue
+    started = threading.Event()
+
+    def spin(ctx):
+        started.set()
+        for _ in range(500):
+            ctx.progress(0, 1)
+            time.sleep(0.01)
+        return "finished anyway"
+
+    job_id = queue.submit("spin", spin)
+    assert started.wait(5)
+    assert queue.cancel(job_id)["status"] == "running"
+    job = _wait(queue, job_id)
+    assert job["status"] == "cancelled"
+    assert job["result"] is None
+    # Cancelling a finished job leaves it alone.
+    assert queue.cancel(job_id)["status"] == "cancelled"
+
+
+def test_cancel_queued_job_never_runs_it(app):
+    queue = app.job_queue
+    ran = []
+    blocker_id, release = _blocker(queue)
+    job_id = queue.submit("late", lambda ctx: ran.append(1))
+
+    assert queue.cancel(job_id)["status"] == "cancelled"
+    release.set()
+    assert _wait(queue, blocker_id)["status"] == "done"
+    # The worker picks the cancelled job up next and skips it.
+    assert _wait(queue, queue.submit("after", lambda ctx: None))["status"] == "done"
+    assert ran == []
+    assert queue.get(job_id)["status"] == "cancelled"
+
+
+def test_memory_store_purges_expired_jobs():
+    store = jobs_ext.MemoryJobStore(ttl_s=60)
+    store.create({"id": "old", "finished_at": time.time() - 120})
+    store.request_cancel("old")
+    assert store.get("old") is not None
+
+    # Expired jobs are dropped when the next one is created.
+    store.create({"id": "recent", "finished_at": time.time()})
+    store.create({"id": "running", "finished_at": None})
+    store.update("recent", {"status": "done"})
+    assert store.get("old") is None
+    assert not store.cancel_requested("old")
+    assert store.get("recent")["version"] == 1
+    assert store.get("running") is not None
+
+
+def test_job_status_api(app):
+    queue = app.job_queue
+    client = _client(app)
+    with app.test_request_context("/"):
+        session["user_id"] = 1
+        job_id = queue.submit("echo", lambda ctx: {"ok": True})
+    _wait(queue, job_id)
+
+    res = client.get(f"/api/jobs/{job_id}")
+    assert res.status_code == 200
+    assert res.headers["Cache-Control"] == "no-store"
+    body = res.get_json()
+    assert body["id"] == job_id
+    assert body["status"] == "done"
+    assert body["result"] == {"ok": True}
+    assert "owner" not in body
+    assert queue.get(job_id)["owner"] == 1
+
+    res = client.get("/api/jobs/missing")
+    assert res.status_code == 404
+    assert res.get_json() == {"error": "Job not found"}
+    assert client.post("/api/jobs/missing/cancel").status_code == 404
+
+    assert _client(app, user_id=2).get(f"/api/jobs/{job_id}").status_code == 403
+
+
+def test_job_cancel_api(app):
+    queue = app.job_queue
+    client = _client(app)
+    blocker_id, release = _blocker(queue)
+    job_id = queue.submit("late", lambda ctx: None)
+
+    assert _client(app, user_id=2).post(f"/api/jobs/{job_id}/cancel").status_code == 403
+    res = client.post(f"/api/jobs/{job_id}/cancel")
+    assert res.status_code == 200
+    assert res.get_json()["status"] == "cancelled"
+    release.set()
+    _wait(queue, blocker_id)
+
+
+def test_preview_jobs_are_submitted_once(app, tmp_path, monkeypatch):
+    monkeypatch.setenv("MAPGEN_DATA_ROOT", str(tmp_path / "maps"))
+    (tmp_path / "maps" / "map_skeletons").mkdir(parents=True)
+    shutil.copy(ROOT / "data" / "map_skeletons" / "8p_cross_01.json", tmp_path / "maps" / "map_skeletons")
+    # The pending page extends the site layout, which needs the main app's routes.
+    monkeypatch.setattr(m, "render_template", lambda template, **context: f"job:{context.get('job_id')}")
+    monkeypatch.setattr(m, "_PREVIEW_CACHE", m._PreviewCache(4))
+    m.init_map_skeletons(app)
+    queue = app.job_queue
+    client = _client(app)
+
+    def preview(seed):
+        res = client.get(f"/map-skeletons/8p_cross_01/preview?seed={seed}&stream=0")
+        assert res.status_code == 200
+        return res.get_data(as_text=True).removeprefix("job:")
+
+    blocker_id, release = _blocker(queue)
+    first = preview(7)
+    assert preview(7) == first
+    assert preview(8) != first
+
+    # A cancelled job is not reused.
+    queue.cancel(first)
+    second = preview(7)
+    assert second != first
+    assert preview(7) == second
+
+    release.set()
+    job = _wait(queue, second, timeout=30)
+    assert job["status"] == "done"
+    assert "job=" in job["result"]["url"]
+    # Cached now: rendered inline, no new job.
+    assert preview(7) == "None"
+    _wait(queue, blocker_id)
@@ -0,0 +1,86 @@
+import json
+from pathlib import Path
+
+import pytest
+
+import map_skeleton_ext as m
+
+SKELETON = Path(__file__).resolve().parent.parent / "data" / "map_skeletons" / "8p_cross_01.json"
+
+
+def _payload():
+    return m._normalize_payload(json.loads(SKELETON.read_text(encoding="utf-8")), SKELETON.stem)
+
+
+def _map(state):
+    return list(state.tex), dict(state.overlays.records), dict(state.region_biomes)
+
+
+def _region_overlays(state, region, inside=True):
+    grid = state.grid
+    return {
+        i: record
+        for i, record in state.overlays.records.items()
+        if (grid.region_keys[grid.regions[i]] == region) == inside
+    }
+
+
+def test_no_rerolls_matches_generate_map():
+    payload = _payload()
+    assets = m._map_assets()
+    m._MAP_STATES.clear()
+
+    base = m._generate_map(payload, 11, assets)
+    assert _map(m._generate_map_reusing(payload, 11, assets)) == _map(base)
+    assert m._regenerate_map(base, {}) is base
+    # Reused layers: dropping a re-roll again gives the plain map back.
+    rerolled = m._regenerate_map(base, {"overlays": 1, "textures": 1})
+    assert _map(m._regenerate_map(rerolled, {})) == _map(base)
+    assert _map(m._generate_map_reusing(payload, 11, assets, {})) == _map(base)
+
+
+def test_region_overlay_reroll_changes_only_that_region():
+    payload = _payload()
+    assets = m._map_assets()
+    plan = m._skeleton_plan_for(payload)
+    regions = [r for r in plan.grid.region_keys if r and r not in {"none", "water"}]
+
+    changed = 0
+    for seed in (1, 2, 3):
+        base = m._generate_map(payload, seed, assets, plan)
+        for region in regions:
+            target = {f"overlays:{region}": seed}
+            rerolled = m._regenerate_map(base, target)
+            assert _region_overlays(rerolled, region, inside=False) == _region_overlays(base, region, inside=False)
+            assert rerolled.region_biomes == base.region_biomes
+            changed += _region_overlays(rerolled, region) != _region_overlays(base, region)
+            # Same map whether it was re-rolled from base or generated directly.
+            assert _map(m._generate_map(payload, seed, assets, plan, rerolls=target)) == _map(rerolled)
+    assert changed > len(regions)
+
+
+def test_parse_rerolls():
+    plan = m._skeleton_plan_for(_payload())
+    assert m._parse_rerolls(["overlays:North_Outer@2", "textures"], plan) == {
+        "overlays:north_outer": 2,
+        "textures": 1,
+    }
+    assert m._parse_rerolls(["biomes@0, overlays"], plan) == {"overlays": 1}
+
+
+@pytest.mark.parametrize(
+    "raw, message",
+    [
+        (["overlays@x"], "bad re-roll salt"),
+        (["clouds"], "unknown re-roll layer"),
+        (["overlays:"], "missing region"),
+        (["textures:north_outer"], "cannot be re-rolled per region"),
+        (["overlays:north_outer@1", "overlays:north_outer@2"], "duplicate re-roll target"),
+        (["biomes,biomes@3"], "duplicate re-roll target"),
+        (["overlays:atlantis"], "unknown region"),
+    ],
+)
+def test_parse_rerolls_rejects(raw, message):
+    plan = m._skeleton_plan_for(_payload())
+    with pytest.raises(ValueError, match=message):
+        m._parse_rerolls(raw, plan)